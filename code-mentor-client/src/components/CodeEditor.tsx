@@ -10,11 +10,13 @@ interface CodeEditorProps {
   disableRightClick?: boolean;
   // callback invoked when server detects a paste (backend detection)
   onServerPaste?: (detected: boolean) => void;
+  // assignment being edited, used to group paste fingerprints
+  assignmentId?: number | null;
 }
 
 const CodeEditor = forwardRef<any, CodeEditorProps>(
   (
-    { language, value, onChange, disableRightClick = false, onServerPaste },
+    { language, value, onChange, disableRightClick = false, onServerPaste, assignmentId },
     ref
   ) => {
     const [lastCode, setLastCode] = useState(value);
@@ -23,6 +25,8 @@ const CodeEditor = forwardRef<any, CodeEditorProps>(
     const keystrokeTimeout = useRef<NodeJS.Timeout | null>(null);
     const editorInstance = useRef<any | null>(null);
     const pasteCooldownRef = useRef<number>(0);
+    const socketRef = useRef<WebSocket | null>(null);
+    const sessionIdRef = useRef<string>(Date.now().toString(36));
 
     const languageMap: Record<string, string> = {
       python: "python",
@@ -44,8 +48,66 @@ const CodeEditor = forwardRef<any, CodeEditorProps>(
         const code = editorInstance.current?.getValue() || "";
         sendKeystroke("paste", code);
       },
+      isSocketOpen: () => isSocketOpen(),
     }));
 
+  // -----------------------------
+  // Editor telemetry socket (falls back to HTTP while not connected)
+  // -----------------------------
+  const isSocketOpen = () => socketRef.current?.readyState === WebSocket.OPEN;
+
+  const sendFrame = (frame: Record<string, any>) => {
+    if (!isSocketOpen()) return false;
+    socketRef.current!.send(JSON.stringify(frame));
+    return true;
+  };
+
+  const sendSync = (action: "typing" | "paste") => {
+    const code = editorInstance.current?.getValue() ?? lastCode;
+    return sendFrame({ type: "sync", action, code });
+  };
+
+  useEffect(() => {
+    const token = localStorage.getItem("token");
+    if (!token) return;
+
+    const params = new URLSearchParams({
+      session: sessionIdRef.current,
+      language,
+    });
+    if (assignmentId) params.set("assignment", String(assignmentId));
+    // The token travels as a subprotocol, not in the URL (which servers log)
+    const socket = new WebSocket(`ws://localhost:8000/ws/editor?${params.toString()}`, ["bearer", token]);
+    socketRef.current = socket;
+
+    socket.onopen = () => sendSync("typing");
+    socket.onmessage = (msg) => {
+      try {
+        const frame = JSON.parse(msg.data);
+        if (frame.type === "resync") sendSync("typing");
+        if (frame.type === "ack" && frame.paste) onServerPaste?.(true);
+      } catch (_e) {
+        // ignore malformed frames
+      }
+    };
+    socket.onerror = () => console.warn("Editor socket error, falling back to HTTP");
+
+    const heartbeat = setInterval(() => sendFrame({ type: "heartbeat" }), 15000);
+
+    return () => {
+      clearInterval(heartbeat);
+      socket.close();
+      if (socketRef.current === socket) socketRef.current = null;
+    };
+  }, [language, assignmentId]);
+
+  const hashText = async (text: string) => {
+    const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest))
+      .map((b) => b.toString(16).padStart(2, "0"))
+      .join("");
+  };
+
   // -----------------------------
   // Context Menu (Right Click)
   // -----------------------------
@@ -62,10 +124,16 @@ const CodeEditor = forwardRef<any, CodeEditorProps>(
   ) => {
     console.debug(`sendKeystroke called action=${action} code_len=${codeContent.length}`);
 
+    // Typing is streamed as deltas over the socket; only pastes need a full sync
+    if (isSocketOpen()) {
+      if (action === "paste") sendFrame({ type: "sync", action, code: codeContent });
+      return;
+    }
+
     // Fire-and-forget fetch
     fetchWithAuth("http://localhost:8000/keystroke", {
       method: "POST",
-      body: JSON.stringify({ action, code: codeContent, language }),
+      body: JSON.stringify({ action, code: codeContent, language, assignment_id: assignmentId ?? null }),
     }).catch((err) => {
       console.error("Failed to send keystroke event", err);
     });
@@ -85,6 +153,19 @@ const CodeEditor = forwardRef<any, CodeEditorProps>(
       const editor = editorInstance.current;
       const code = editor ? editor.getValue() : lastCode;
       console.info("Native paste event detected, sending paste keystroke");
+      const pasted = e.clipboardData?.getData("text") || "";
+      if (pasted && isSocketOpen()) {
+        hashText(pasted)
+          .then((textHash) =>
+            sendFrame({
+              type: "paste",
+              textLength: pasted.length,
+              textHash,
+              t: new Date().toISOString(),
+            })
+          )
+          .catch(() => sendFrame({ type: "paste", textLength: pasted.length }));
+      }
       sendKeystroke("paste", code);
       onChange(code, true);
       setLastCode(code);
@@ -159,6 +240,22 @@ const CodeEditor = forwardRef<any, CodeEditorProps>(
   // -----------------------------
   const handleEditorMount = (editor: any) => {
     editorInstance.current = editor;
+    editor.onDidChangeModelContent((e: any) => {
+      if (!isSocketOpen()) return;
+      if (e.changes.length === 1) {
+        const change = e.changes[0];
+        sendFrame({
+          type: "delta",
+          start: change.rangeOffset,
+          removed: change.rangeLength,
+          text: change.text,
+          t: new Date().toISOString(),
+        });
+      } else {
+        // Multi-cursor edits: offsets refer to the old buffer, so resync instead
+        sendSync("typing");
+      }
+    });
     const dom = editor.getDomNode && editor.getDomNode();
     if (dom && dom.addEventListener) {
       dom.addEventListener("paste", handleNativePaste as EventListener);
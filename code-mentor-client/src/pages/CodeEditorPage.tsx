@@ -120,8 +120,11 @@ const CodeEditorPage: React.FC = () => {
         token,
       });
 
-      const blob = new Blob([payload], { type: "application/json" });
-      navigator.sendBeacon("http://localhost:8000/keystroke/clear", blob);
+      // The editor socket clears server state when it disconnects
+      if (!editorRef.current?.isSocketOpen?.()) {
+        const blob = new Blob([payload], { type: "application/json" });
+        navigator.sendBeacon("http://localhost:8000/keystroke/clear", blob);
+      }
 
       e.preventDefault();
       e.returnValue = "";
@@ -368,6 +371,7 @@ const CodeEditorPage: React.FC = () => {
               <CodeEditor
                 ref={editorRef}
                 language={selectedLanguage}
+                assignmentId={assignmentId ? Number(assignmentId) : null}
                 value={code}
                 onChange={handleCodeChange}
                 disableRightClick
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, ChangeEvent, FormEvent } from 'react';
+import React, { useState, useEffect, useRef, ChangeEvent, FormEvent } from 'react';
 import Card from '../components/ui/Card';
 import { 
   SearchIcon, PaperclipIcon, SendIcon, SmileIcon, PlusIcon, PhoneIcon, VideoIcon 
@@ -45,6 +45,10 @@ const Messaging: React.FC = () => {
 const [users, setUsers] = useState<{ id: number; name: string; role: string }[]>([]);
   const [searchQuery, setSearchQuery] = useState(''); // State for search input
     const [userNames, setUserNames] = useState<{ [key: number]: string }>({}); // Store user names by ID
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  // Conversation the message list belongs to; late pages of another one are dropped
+  const currentConversationId = useRef<number | null>(null);
 
 
 useEffect(() => {
@@ -90,16 +94,16 @@ useEffect(() => {
     conversation.name.toLowerCase().includes(searchQuery.toLowerCase())
   );
 
-useEffect(() => {
-  if (!activeConversation) return;
-
-  const token = localStorage.getItem("token");
-  if (!token) {
-    console.error("Token is missing. User might not be logged in.");
-    return;
-  }
-
-  fetch(`http://localhost:8000/conversations/${activeConversation.id}/messages`, {
+// Messages come a page at a time, oldest first; the server returns the cursor
+// for the page before it in X-Next-Cursor (absent once the history is exhausted)
+const fetchMessagePage = (
+  conversationId: number,
+  token: string,
+  cursor: string | null
+): Promise<{ page: Message[]; older: string | null }> => {
+  const params = new URLSearchParams();
+  if (cursor) params.set('cursor', cursor);
+  return fetch(`http://localhost:8000/conversations/${conversationId}/messages?${params.toString()}`, {
     method: "GET",
     headers: {
       Authorization: `Bearer ${token}`, // Include the token in the Authorization header
@@ -109,25 +113,63 @@ useEffect(() => {
       if (!res.ok) {
         throw new Error("Failed to fetch messages");
       }
-      return res.json();
+      const older = res.headers.get('X-Next-Cursor');
+      return res.json().then(data => ({ data, older }));
     })
-    .then(data => {
-      if (Array.isArray(data)) {
-        const payload = JSON.parse(atob(token.split(".")[1])); // Decode the token payload
-        setMessages(data.map((message: any) => ({
-          id: message.message_id,
-          sender: message.sender_id,
-          text: message.text,
-          time: message.sent_at,
-          isMe: message.sender_id === payload.user_id, // Check if the sender is the logged-in user
-        })));
-      } else {
-        setMessages([]); // Fallback to an empty array if the response is invalid
-      }
+    .then(({ data, older }) => {
+      if (!Array.isArray(data)) return { page: [], older: null };
+      const payload = JSON.parse(atob(token.split(".")[1])); // Decode the token payload
+      const page = data.map((message: any): Message => ({
+        id: message.message_id,
+        sender: message.sender_id,
+        text: message.text,
+        time: message.sent_at,
+        isMe: message.sender_id === payload.user_id, // Check if the sender is the logged-in user
+      }));
+      return { page, older };
+    });
+};
+
+useEffect(() => {
+  if (!activeConversation) return;
+
+  const token = localStorage.getItem("token");
+  if (!token) {
+    console.error("Token is missing. User might not be logged in.");
+    return;
+  }
+
+  const conversationId = activeConversation.id;
+  currentConversationId.current = conversationId;
+  setOlderCursor(null);
+  fetchMessagePage(conversationId, token, null)
+    .then(({ page, older }) => {
+      if (currentConversationId.current !== conversationId) return;
+      setMessages(page);
+      setOlderCursor(older);
     })
-    .catch(err => console.error(err));
+    .catch(err => {
+      console.error(err);
+      if (currentConversationId.current === conversationId) setMessages([]);
+    });
 }, [activeConversation]);
 
+const loadOlderMessages = () => {
+  const token = localStorage.getItem("token");
+  if (!activeConversation || !olderCursor || !token) return;
+  const conversationId = activeConversation.id;
+  setLoadingOlder(true);
+  fetchMessagePage(conversationId, token, olderCursor)
+    .then(({ page, older }) => {
+      // The user may have switched conversations while the page loaded
+      if (currentConversationId.current !== conversationId) return;
+      setMessages(prev => [...page, ...prev]);
+      setOlderCursor(older);
+    })
+    .catch(err => console.error(err))
+    .finally(() => setLoadingOlder(false));
+};
+
  const handleSendMessage = async (e: FormEvent) => {
     e.preventDefault();
     if (!activeConversation || !newMessage.trim()) return;
@@ -410,6 +452,17 @@ return (
             </div>
             <div className="flex-1 p-4 overflow-y-auto bg-gray-50">
               <div className="space-y-4">
+                {olderCursor && (
+                  <div className="flex justify-center">
+                    <button
+                      className="px-3 py-1 text-sm border border-gray-300 rounded-md bg-white text-gray-700 disabled:opacity-50"
+                      onClick={loadOlderMessages}
+                      disabled={loadingOlder}
+                    >
+                      {loadingOlder ? 'Loading...' : 'Load older messages'}
+                    </button>
+                  </div>
+                )}
                 {messages.length > 0 ? (
                   messages.map(message => (
                     <div key={message.id} className={`flex ${message.isMe ? 'justify-end' : 'justify-start'}`}>
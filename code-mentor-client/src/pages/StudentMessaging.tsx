@@ -1,4 +1,4 @@
-import React, { useState, useEffect, ChangeEvent, FormEvent } from 'react';
+import React, { useState, useEffect, useRef, ChangeEvent, FormEvent } from 'react';
 import Card from '../components/ui/Card';
 import { fetchWithAuth } from '../utils/auth';
 
@@ -32,6 +32,10 @@ const StudentMessaging: React.FC = () => {
   const [searchQuery, setSearchQuery] = useState('');
   const [users, setUsers] = useState<User[]>([]);
   const [showNewMessageModal, setShowNewMessageModal] = useState(false);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  // Conversation the message list belongs to; late pages of another one are dropped
+  const currentConversationId = useRef<number | null>(null);
 
   // Fetch conversations
   useEffect(() => {
@@ -51,20 +55,36 @@ const StudentMessaging: React.FC = () => {
     fetchConversations();
   }, []);
 
+  // Messages come a page at a time, oldest first; the cursor for the page
+  // before it is returned in X-Next-Cursor (absent once the history is exhausted)
+  const fetchMessagePage = async (
+    conversationId: number,
+    cursor: string | null
+  ): Promise<{ page: Message[]; older: string | null }> => {
+    const params = new URLSearchParams();
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetchWithAuth(
+      `http://localhost:8000/student/conversations/${conversationId}/messages?${params.toString()}`
+    );
+    if (!res.ok) {
+      throw new Error("Failed to fetch messages");
+    }
+    return { page: await res.json(), older: res.headers.get('X-Next-Cursor') };
+  };
+
   // Fetch messages when active conversation changes
   useEffect(() => {
     if (!activeConversation) return;
 
+    const conversationId = activeConversation.conversation_id;
+    currentConversationId.current = conversationId;
     const fetchMessages = async () => {
+      setOlderCursor(null);
       try {
-        const res = await fetchWithAuth(
-          `http://localhost:8000/student/conversations/${activeConversation.conversation_id}/messages`
-        );
-        if (!res.ok) {
-          throw new Error("Failed to fetch messages");
-        }
-        const data = await res.json();
-        setMessages(data);
+        const { page, older } = await fetchMessagePage(conversationId, null);
+        if (currentConversationId.current !== conversationId) return;
+        setMessages(page);
+        setOlderCursor(older);
       } catch (err) {
         console.error(err);
       }
@@ -72,6 +92,23 @@ const StudentMessaging: React.FC = () => {
     fetchMessages();
   }, [activeConversation]);
 
+  const loadOlderMessages = async () => {
+    if (!activeConversation || !olderCursor) return;
+    const conversationId = activeConversation.conversation_id;
+    setLoadingOlder(true);
+    try {
+      const { page, older } = await fetchMessagePage(conversationId, olderCursor);
+      // The user may have switched conversations while the page loaded
+      if (currentConversationId.current !== conversationId) return;
+      setMessages(prev => [...page, ...prev]);
+      setOlderCursor(older);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   // Fetch users for new conversation modal
   useEffect(() => {
     if (showNewMessageModal) {
@@ -245,6 +282,17 @@ const StudentMessaging: React.FC = () => {
                   <h3 className="font-medium text-lg">{activeConversation.name}</h3>
                 </div>
                 <div className="flex-1 p-4 overflow-y-auto bg-gray-50">
+                  {olderCursor && (
+                    <div className="flex justify-center mb-4">
+                      <button
+                        className="px-3 py-1 text-sm border border-gray-300 rounded-md bg-white text-gray-700 disabled:opacity-50"
+                        onClick={loadOlderMessages}
+                        disabled={loadingOlder}
+                      >
+                        {loadingOlder ? 'Loading...' : 'Load older messages'}
+                      </button>
+                    </div>
+                  )}
                   {messages.map(message => {
                     const token = localStorage.getItem("token");
                     const payload = token ? JSON.parse(atob(token.split(".")[1])) : null;
@@ -24,15 +24,28 @@ const SubmissionsList = () => {
   const [pendingReviewCount, setPendingReviewCount] = useState(0);
   const [gradedCount, setGradedCount] = useState(0);
 
-  useEffect(() => {
-    setLoading(true);
-    fetch("http://localhost:8000/submission/")
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [statusFilter, setStatusFilter] = useState('');
+
+  // Pages come newest first; the server returns the next page's cursor in X-Next-Cursor
+  const fetchPage = (cursor: string | null) => {
+    const params = new URLSearchParams();
+    if (cursor) params.set('cursor', cursor);
+    if (statusFilter) params.set('status', statusFilter);
+    return fetch(`http://localhost:8000/submission/?${params.toString()}`)
       .then((res) => {
         if (!res.ok) {
           throw new Error("Failed to fetch submissions");
         }
+        setNextCursor(res.headers.get('X-Next-Cursor'));
         return res.json();
-      })
+      });
+  };
+
+  useEffect(() => {
+    setLoading(true);
+    fetchPage(null)
       .then((data) => {
         if (Array.isArray(data)) {
           setSubmissions(data);
@@ -48,8 +61,21 @@ const SubmissionsList = () => {
       .finally(() => {
         setLoading(false);
       });
-  }, []);
-  
+  }, [statusFilter]);
+
+  const loadMore = () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    fetchPage(nextCursor)
+      .then((data) => {
+        if (Array.isArray(data)) {
+          setSubmissions((prev) => [...prev, ...data]);
+        }
+      })
+      .catch((err) => console.error("Failed to fetch submissions:", err))
+      .finally(() => setLoadingMore(false));
+  };
+
   useEffect(() => {
     // Fetch pending review count
     fetch("http://localhost:8000/submissionlist-summary/pending-review-count")
@@ -103,7 +129,7 @@ const SubmissionsList = () => {
     return <div>Loading...</div>;
   }
 
-  if (!submissions || submissions.length === 0) {
+  if ((!submissions || submissions.length === 0) && !statusFilter) {
     return <div>No submissions found.</div>;
   }
 
@@ -182,11 +208,15 @@ const SubmissionsList = () => {
               <option>SQL Queries</option>
               <option>Java Classes</option>
             </select>
-            <select className="px-4 py-2 border border-gray-300 rounded-md bg-white text-gray-700">
-              <option>All Statuses</option>
-              <option>Pending</option>
-              <option>Graded</option>
-              <option>Flagged</option>
+            <select
+              className="px-4 py-2 border border-gray-300 rounded-md bg-white text-gray-700"
+              value={statusFilter}
+              onChange={(e) => setStatusFilter(e.target.value)}
+            >
+              <option value="">All Statuses</option>
+              <option value="Pending">Pending</option>
+              <option value="Graded">Graded</option>
+              <option value="Flagged">Flagged</option>
             </select>
           </div>
         </div>
@@ -281,21 +311,15 @@ const SubmissionsList = () => {
             
           </div>
           <div className="flex space-x-2">
-            <button className="px-3 py-1 border border-gray-300 rounded-md bg-white text-gray-700 disabled:opacity-50">
-              {/* Previous */}
-            </button>
-            <button className="px-3 py-1 bg-[#0D47A1] text-white rounded-md hover:bg-blue-800">
-              {/* 1 */}
-            </button>
-            <button className="px-3 py-1 border border-gray-300 rounded-md bg-white text-gray-700">
-              {/* 2 */}
-            </button>
-            <button className="px-3 py-1 border border-gray-300 rounded-md bg-white text-gray-700">
-              {/* 3 */}
-            </button>
-            <button className="px-3 py-1 border border-gray-300 rounded-md bg-white text-gray-700">
-              {/* Next */}
-            </button>
+            {nextCursor && (
+              <button
+                className="px-3 py-1 border border-gray-300 rounded-md bg-white text-gray-700 disabled:opacity-50"
+                onClick={loadMore}
+                disabled={loadingMore}
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         </div>
       </Card>
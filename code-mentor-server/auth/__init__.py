@@ -1,2 +1,8 @@
-from .auth import create_access_token, verify_token, verify_password
+from .auth import (
+    create_access_token,
+    hash_password_async,
+    verify_and_update_password,
+    verify_password,
+    verify_token,
+)
 from .dependencies import login_required, role_required
\ No newline at end of file
@@ -1,9 +1,18 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
+import asyncio
+import hashlib
+import hmac
+import threading
+import os
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt, ExpiredSignatureError
 from passlib.context import CryptContext
+from services.metrics import LatencyStats
 
 # ==========================
 # JWT Configuration
@@ -12,8 +21,22 @@ SECRET_KEY = "YOUR_VERY_STRONG_SECRET_KEY_HERE"  # change in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 1 week
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. Hashes made with a different cost are
+# upgraded on the next successful login (verify_and_update_password).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt runs in worker threads (it releases the GIL) so it never blocks the
+# event loop. At most PASSWORD_HASH_CONCURRENCY hashes run at once; further
+# logins wait on the semaphore instead of piling up in the executor.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(PASSWORD_HASH_WORKERS)))
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+
+password_wait_stats = LatencyStats()    # time waiting for a hashing slot
+password_hash_stats = LatencyStats()    # bcrypt work per hash or verify
+login_stats = LatencyStats()            # whole login request
 
 # OAuth2 scheme (reads token from Authorization header)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
@@ -30,6 +53,43 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return plain_password == hashed_password  # fallback
 
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        # fallback for values that are not hashes
+        return hmac.compare_digest(plain_password.encode(), hashed_password.encode()), None
+
+async def _run_hashing(fn, *args):
+    queued = time.perf_counter()
+    async with _hash_slots:
+        started = time.perf_counter()
+        password_wait_stats.observe(started - queued)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+        finally:
+            password_hash_stats.observe(time.perf_counter() - started)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    (valid, new_hash) off the event loop. new_hash is set when the stored
+    hash uses an outdated cost or scheme and should be replaced.
+    """
+    return await _run_hashing(_verify_and_update, plain_password, hashed_password)
+
+def password_metrics() -> Dict[str, dict]:
+    return {
+        "bcryptRounds": BCRYPT_ROUNDS,
+        "workers": PASSWORD_HASH_WORKERS,
+        "concurrency": PASSWORD_HASH_CONCURRENCY,
+        "wait": password_wait_stats.snapshot(),
+        "hash": password_hash_stats.snapshot(),
+        "login": login_stats.snapshot(),
+    }
+
 # ==========================
 # JWT Token Handling
 # ==========================
@@ -43,15 +103,47 @@ def create_access_token(data: Dict[str, str], expires_delta: Optional[timedelta]
 # ==========================
 # JWT Token Verification
 # ==========================
+# Verified tokens are remembered until their exp, keyed by a hash of the
+# token, so repeat requests skip the signature check and claim parsing.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "2048"))
+_token_cache: "OrderedDict[bytes, Tuple[float, Dict[str, str]]]" = OrderedDict()
+_token_cache_lock = threading.Lock()  # verify_token is a sync dependency, run in the threadpool
+
+def _cached_token(key: bytes) -> Optional[Dict[str, str]]:
+    with _token_cache_lock:
+        item = _token_cache.get(key)
+        if item is None:
+            return None
+        expires, claims = item
+        if expires <= time.time():
+            del _token_cache[key]
+            return None
+        _token_cache.move_to_end(key)
+        return dict(claims)
+
+def _remember_token(key: bytes, expires: float, claims: Dict[str, str]) -> None:
+    with _token_cache_lock:
+        _token_cache[key] = (expires, dict(claims))
+        _token_cache.move_to_end(key)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
 def verify_token(token: str = Depends(oauth2_scheme)) -> Dict[str, str]:
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = _cached_token(key)
+    if claims is not None:
+        return claims
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("user_id")
         role = payload.get("role", "user")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return {"user_id": user_id, "role": role}
+        claims = {"user_id": user_id, "role": role}
+        if payload.get("exp") is not None:
+            _remember_token(key, float(payload["exp"]), claims)
+        return claims
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token")
@@ -0,0 +1,58 @@
+from typing import Dict, Optional, Type
+
+from fastapi import Depends, HTTPException, Request
+
+from database import async_session
+from models import Admin, Instructor, Student
+from .auth import verify_token
+
+# Profile table of each role; the profile's primary key is the user_id
+PROFILE_MODELS: Dict[str, Type] = {
+    "student": Student,
+    "instructor": Instructor,
+    "admin": Admin,
+}
+
+
+class Principal:
+    """
+    The authenticated user of one request. The token is decoded once (and
+    cached across requests by verify_token); profile rows are loaded on
+    first use and reused for the rest of the request.
+    """
+
+    def __init__(self, user_id: int, role: str):
+        self.user_id = user_id
+        self.role = role
+        self._rows: Dict[Type, Optional[object]] = {}
+
+    async def load(self, model: Type, session=None):
+        """The `model` row whose primary key is this user's id, or None."""
+        if model not in self._rows:
+            if session is not None:
+                self._rows[model] = await session.get(model, self.user_id)
+            else:
+                async with async_session() as own_session:
+                    self._rows[model] = await own_session.get(model, self.user_id)
+        return self._rows[model]
+
+    async def profile(self, session=None):
+        """Student, Instructor or Admin row for the token's role (None for other roles)."""
+        model = PROFILE_MODELS.get(self.role)
+        return await self.load(model, session) if model else None
+
+    async def admin_uni_id(self, session=None) -> int:
+        """University of an admin; 404 when the user has no admin row."""
+        admin = await self.load(Admin, session)
+        if admin is None or not admin.uni_id:
+            raise HTTPException(status_code=404, detail="University not found for the admin")
+        return admin.uni_id
+
+
+def get_principal(request: Request, token_data: dict = Depends(verify_token)) -> Principal:
+    """Dependency: one Principal per request, shared by every dependency that asks for it."""
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = Principal(token_data["user_id"], token_data.get("role", "user"))
+        request.state.principal = principal
+    return principal
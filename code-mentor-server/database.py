@@ -1,35 +1,159 @@
 # database.py
+import os
 import ssl
+import time
+from dataclasses import dataclass
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from fastapi import Depends
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, Optional
+from dotenv import load_dotenv
+
+from services.metrics import LatencyStats
 
 # ===========================
-# Neon Database Configuration
+# Settings (environment / .env file)
 # ===========================
-DB_USER = "neondb_owner"              # from Neon GUI
-DB_PASSWORD = "npg_k5qcgEu0LSBP"     # from Neon GUI
-DB_HOST = "ep-steep-glitter-a1pg3spu-pooler.ap-southeast-1.aws.neon.tech"
-DB_NAME = "code_mentor_db"
+# DB_CONFIG_FILE points at a dotenv-style file; variables already set in the
+# environment take precedence over it.
+load_dotenv(os.getenv("DB_CONFIG_FILE", ".env"))
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+# Neon defaults, used when DATABASE_URL is not set
+DB_USER = os.getenv("DB_USER", "neondb_owner")              # from Neon GUI
+DB_PASSWORD = os.getenv("DB_PASSWORD", "npg_k5qcgEu0LSBP")  # from Neon GUI
+DB_HOST = os.getenv("DB_HOST", "ep-steep-glitter-a1pg3spu-pooler.ap-southeast-1.aws.neon.tech")
+DB_NAME = os.getenv("DB_NAME", "code_mentor_db")
+
+
+@dataclass
+class DatabaseSettings:
+    url: str
+    read_url: Optional[str] = None             # read replica; falls back to `url`
+    echo: bool = False                         # log every SQL statement
+    ssl: bool = True                           # required for Neon hosted Postgres
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30                     # seconds to wait for a free connection
+    pool_recycle: int = 1800                   # drop connections older than this (seconds)
+    pool_pre_ping: bool = True                 # detect connections closed by the pooler
+    statement_timeout_ms: int = 30000          # 0 disables
+    prepared_statement_cache_size: int = 100   # per connection; 0 disables
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            url=os.getenv("DATABASE_URL") or f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}",
+            read_url=os.getenv("DATABASE_READ_URL") or None,
+            echo=_env_bool("DB_ECHO", False),
+            ssl=_env_bool("DB_SSL", True),
+            pool_size=_env_int("DB_POOL_SIZE", 5),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", 1800),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", 30000),
+            prepared_statement_cache_size=_env_int("DB_PREPARED_STATEMENT_CACHE_SIZE", 100),
+        )
 
-# SSL context for Neon (required for Neon hosted Postgres)
+
+settings = DatabaseSettings.from_env()
+
+# SSL context for Neon (certificate checks are disabled as before)
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
-# Async database URL (asyncpg driver)
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+# ===========================
+# Pool checkout timing
+# ===========================
+# pool name -> time spent waiting for a connection
+pool_wait_stats: Dict[str, LatencyStats] = {}
+
+def _timed_pool_class(name: str):
+    stats = pool_wait_stats.setdefault(name, LatencyStats())
+
+    class TimedQueuePool(AsyncAdaptedQueuePool):
+        # _do_get blocks until a connection is free (or pool_timeout expires);
+        # recreate() uses self.__class__, so the stats survive dispose().
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                stats.observe(time.perf_counter() - started)
+
+    TimedQueuePool.__name__ = f"TimedQueuePool[{name}]"
+    return TimedQueuePool
 
 # ===========================
-# Create Async Engine
+# Create Async Engines
 # ===========================
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    connect_args={"ssl": ssl_context}  # SSL context explicitly
+def create_engine_from_settings(config: DatabaseSettings, url: Optional[str] = None, name: str = "primary"):
+    db_url = make_url(url or config.url)
+    if db_url.drivername == "postgresql+asyncpg":
+        # Size of SQLAlchemy's asyncpg prepared statement cache, per connection
+        db_url = db_url.update_query_dict(
+            {"prepared_statement_cache_size": str(config.prepared_statement_cache_size)}
+        )
+
+    connect_args = {}
+    if config.ssl:
+        connect_args["ssl"] = ssl_context
+    if config.statement_timeout_ms:
+        # Client-side timeout: asyncpg cancels the statement on the server when
+        # it expires. Unlike a statement_timeout startup parameter this also
+        # works through Neon's PgBouncer pooler.
+        connect_args["command_timeout"] = config.statement_timeout_ms / 1000
+
+    return create_async_engine(
+        db_url,
+        echo=config.echo,
+        poolclass=_timed_pool_class(name),
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_recycle=config.pool_recycle,
+        pool_pre_ping=config.pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
+engine = create_engine_from_settings(settings)
+
+# Read-only queries (dashboards, lists) can go to a replica when one is configured
+read_engine = (
+    create_engine_from_settings(settings, settings.read_url, name="replica")
+    if settings.read_url else engine
 )
 
+def pool_status() -> Dict[str, dict]:
+    """Pool occupancy and checkout wait times for each engine."""
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    out = {}
+    for name, eng in engines.items():
+        pool = eng.sync_engine.pool
+        out[name] = {
+            "size": pool.size(),
+            "checkedOut": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checkoutWait": pool_wait_stats[name].snapshot(),
+        }
+    return out
+
 # ===========================
 # Async Session Factory
 # ===========================
@@ -39,6 +163,12 @@ async_session = sessionmaker(
     expire_on_commit=False,  # prevents attributes from expiring after commit
 )
 
+read_session = sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 # ===========================
 # Declarative Base
 # ===========================
@@ -54,4 +184,13 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     Usage: db: AsyncSession = Depends(get_db)
     """
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Like get_db, but on the read replica when DATABASE_READ_URL is set.
+    Only use it for queries that can tolerate replication lag.
+    Usage: db: AsyncSession = Depends(get_read_db)
+    """
+    async with read_session() as session:
+        yield session
@@ -1,13 +1,21 @@
 from fastapi import FastAPI
-from routers import routers
+from routers import registry, check_routes
 from fastapi.middleware.cors import CORSMiddleware
 from auth.auth import create_access_token
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.future import  select
-from database import engine, Base, async_session
+from database import engine, read_engine, Base, async_session
 from models import User
 from sqlalchemy import text
+from services.paste_index import paste_index, flush_periodically
+from services.pagination import NEXT_CURSOR_HEADER
+from services.response_cache import CACHE_STATUS_HEADER
+from services.university_stats import reconcile_periodically
+from services.llm import preload_from_env
+from services.instrumentation import MetricsMiddleware, instrument_engine
+from services import query_guard
+import asyncio
 
 
 # Create FastAPI app
@@ -22,18 +30,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # allow all methods (GET, POST, etc.)
     allow_headers=["*"],  # allow all headers
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", CACHE_STATUS_HEADER],  # pagination cursor, response cache validators
 )
 
+# Per-route latency with DB/LLM/subprocess time per request (GET /metrics, structured logs)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+instrument_engine(read_engine)
+
+# Statement counts and N+1 detection per sampled request (QUERY_GUARD_MODE)
+app.add_middleware(query_guard.QueryGuardMiddleware)
+query_guard.install(engine)
+query_guard.install(read_engine)
+
 @app.on_event("startup")
 async def startup_event():
+    # LLM SDKs load on first use unless this worker preloads them (LLM_PRELOAD)
+    preload_from_env()
+
     try:
         async with engine.connect() as conn:
             await conn.execute(text("SELECT 1"))
         print("Database connection successful.")
+        database_up = True
     except Exception as e:
         print(f"Database connection failed: {e}")
+        database_up = False
+
+    # Rebuild the paste fingerprint index and keep persisting new pastes. The
+    # background tasks start even when the database is down at boot: they
+    # retry on every interval.
+    if database_up:
+        try:
+            async with async_session() as session:
+                await paste_index.load_from_db(session)
+        except Exception as e:
+            print(f"Loading paste fingerprints failed: {e}")
+    app.state.paste_flusher = asyncio.create_task(flush_periodically(async_session))
+
+    # Storage totals on the university dashboards are refreshed in the background
+    app.state.stats_reconciler = asyncio.create_task(reconcile_periodically(async_session))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in ("paste_flusher", "stats_reconciler"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    try:
+        async with async_session() as session:
+            await paste_index.flush_pending(session)
+    except Exception as e:
+        print(f"Persisting paste fingerprints failed: {e}")
 
-# Include all routers
-for router in routers:
-    app.include_router(router)
+# Include all routers, then report duplicate or shadowed routes
+registry.include_all(app)
+check_routes(app)
     
\ No newline at end of file
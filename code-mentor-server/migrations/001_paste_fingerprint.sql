@@ -0,0 +1,13 @@
+-- Cross-submission paste fingerprint index (services/paste_index.py)
+CREATE TABLE IF NOT EXISTS paste_fingerprint (
+    paste_id      SERIAL PRIMARY KEY,
+    text_hash     VARCHAR(64) NOT NULL,
+    student_id    INTEGER NOT NULL REFERENCES student(student_id) ON DELETE CASCADE,
+    assignment_id INTEGER REFERENCES assignment(assignment_id) ON DELETE SET NULL,
+    text_length   INTEGER NOT NULL DEFAULT 0,
+    shingles      BIGINT[],
+    seen_at       TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_paste_fingerprint_text_hash ON paste_fingerprint (text_hash);
+CREATE INDEX IF NOT EXISTS ix_paste_fingerprint_assignment ON paste_fingerprint (assignment_id, student_id);
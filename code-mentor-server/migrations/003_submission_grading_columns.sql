@@ -0,0 +1,63 @@
+-- Grading state as real columns on submission, kept in sync with
+-- report->'instructor-evaluation' by a trigger.
+ALTER TABLE submission
+    ADD COLUMN IF NOT EXISTS status    VARCHAR(32) NOT NULL DEFAULT 'Pending',
+    ADD COLUMN IF NOT EXISTS score     NUMERIC,
+    ADD COLUMN IF NOT EXISTS graded_at TIMESTAMPTZ;
+
+-- Same precedence the routers used: the instructor evaluation's status,
+-- then the AI evaluation's (submission details), then 'Pending'. Only the
+-- instructor can mark a submission 'Graded', as in the dashboard counts.
+CREATE OR REPLACE FUNCTION submission_report_status(report JSONB) RETURNS VARCHAR
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT COALESCE(
+        report -> 'instructor-evaluation' ->> 'status',
+        NULLIF(report -> 'ai-evaluation' ->> 'status', 'Graded'),
+        'Pending'
+    )::VARCHAR(32)
+$$;
+
+-- Fractional scores are kept as they are
+CREATE OR REPLACE FUNCTION submission_report_score(report JSONB) RETURNS NUMERIC
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE WHEN s ~ '^\s*-?[0-9]+(\.[0-9]+)?\s*$' THEN s::NUMERIC END
+    FROM (SELECT COALESCE(report -> 'instructor-evaluation' ->> 'score', report ->> 'score') AS s) v
+$$;
+
+CREATE OR REPLACE FUNCTION submission_sync_grading() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.status := submission_report_status(NEW.report);
+    NEW.score := submission_report_score(NEW.report);
+    IF NEW.status <> 'Graded' THEN
+        NEW.graded_at := NULL;
+    ELSIF TG_OP = 'INSERT'
+       OR OLD.status IS DISTINCT FROM 'Graded'
+       OR OLD.report -> 'instructor-evaluation' IS DISTINCT FROM NEW.report -> 'instructor-evaluation' THEN
+        -- Newly graded or re-graded
+        NEW.graded_at := now();
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_submission_sync_grading ON submission;
+CREATE TRIGGER trg_submission_sync_grading
+    BEFORE INSERT OR UPDATE OF report ON submission
+    FOR EACH ROW EXECUTE FUNCTION submission_sync_grading();
+
+-- Backfill. The trigger only fires on report updates, so this does not
+-- rewrite the reports; past gradings get the submission time as graded_at.
+UPDATE submission
+SET status = submission_report_status(report),
+    score = submission_report_score(report),
+    graded_at = CASE WHEN submission_report_status(report) = 'Graded' THEN submitted_at END;
+
+CREATE INDEX IF NOT EXISTS ix_submission_assignment_status ON submission (assignment_id, status);
+CREATE INDEX IF NOT EXISTS ix_submission_student_submitted ON submission (student_id, submitted_at);
+
+-- Expression indexes created by an earlier version of this migration set
+DROP INDEX IF EXISTS ix_submission_grading_status;
+DROP INDEX IF EXISTS ix_submission_pending_review;
+
+ANALYZE submission;
@@ -0,0 +1,9 @@
+-- Keyset pagination over (submitted_at, submission_id) (services/pagination.py).
+-- The cursor needs a timestamp on every row; submissions are always created
+-- with one, so only legacy rows are filled in.
+UPDATE submission SET submitted_at = COALESCE(graded_at, now()) WHERE submitted_at IS NULL;
+ALTER TABLE submission ALTER COLUMN submitted_at SET DEFAULT now();
+ALTER TABLE submission ALTER COLUMN submitted_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_submission_submitted_id
+    ON submission (submitted_at DESC, submission_id DESC);
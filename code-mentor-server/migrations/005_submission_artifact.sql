@@ -0,0 +1,64 @@
+-- Submission content moves out of submission.report into one row per
+-- report key (services/submission_artifacts.py).
+CREATE TABLE IF NOT EXISTS submission_artifact (
+    submission_id INTEGER NOT NULL REFERENCES submission(submission_id) ON DELETE CASCADE,
+    kind          VARCHAR(64) NOT NULL,
+    content       JSONB,
+    updated_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (submission_id, kind)
+);
+
+INSERT INTO submission_artifact (submission_id, kind, content)
+SELECT s.submission_id, r.key, r.value
+FROM submission s, jsonb_each(s.report) r
+WHERE jsonb_typeof(s.report) = 'object'
+ON CONFLICT DO NOTHING;
+
+-- Grading columns are now maintained from the artifacts. The report-based
+-- helper functions from 003 are reused on a report built from the
+-- grading-related rows only.
+DROP TRIGGER IF EXISTS trg_submission_sync_grading ON submission;
+DROP FUNCTION IF EXISTS submission_sync_grading();
+
+CREATE OR REPLACE FUNCTION submission_artifact_sync_grading() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    sid INTEGER := COALESCE(NEW.submission_id, OLD.submission_id);
+    grading JSONB;
+    new_status VARCHAR(32);
+    regraded BOOLEAN;
+BEGIN
+    IF COALESCE(NEW.kind, OLD.kind) NOT IN ('instructor-evaluation', 'ai-evaluation', 'score') THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT COALESCE(jsonb_object_agg(kind, content), '{}'::JSONB) INTO grading
+    FROM submission_artifact
+    WHERE submission_id = sid AND kind IN ('instructor-evaluation', 'ai-evaluation', 'score');
+
+    new_status := submission_report_status(grading);
+    regraded := TG_OP <> 'DELETE' AND NEW.kind = 'instructor-evaluation'
+        AND (TG_OP = 'INSERT' OR OLD.content IS DISTINCT FROM NEW.content);
+
+    UPDATE submission
+    SET status = new_status,
+        score = submission_report_score(grading),
+        graded_at = CASE
+            WHEN new_status <> 'Graded' THEN NULL
+            WHEN regraded OR status IS DISTINCT FROM 'Graded' THEN now()
+            ELSE graded_at
+        END
+    WHERE submission_id = sid;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_submission_artifact_sync_grading ON submission_artifact;
+CREATE TRIGGER trg_submission_artifact_sync_grading
+    AFTER INSERT OR UPDATE OR DELETE ON submission_artifact
+    FOR EACH ROW EXECUTE FUNCTION submission_artifact_sync_grading();
+
+ALTER TABLE submission DROP COLUMN IF EXISTS report;
+
+ANALYZE submission;
+ANALYZE submission_artifact;
@@ -0,0 +1,69 @@
+-- One row per message instead of the conversation.messages JSON array
+-- (services/messaging.py).
+CREATE TABLE IF NOT EXISTS message (
+    message_id      SERIAL PRIMARY KEY,
+    conversation_id INTEGER NOT NULL REFERENCES conversation(conversation_id) ON DELETE CASCADE,
+    sender_id       INTEGER NOT NULL,
+    text            TEXT NOT NULL,
+    sent_at         TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_message_conversation_sent ON message (conversation_id, sent_at, message_id);
+
+-- Copy the arrays in order, so the new ids follow the old message order.
+-- Timestamps were written with datetime.utcnow().isoformat() (naive UTC).
+-- Entries without a numeric sender_id cannot be attributed to anyone and
+-- would fail the NOT NULL constraint; they are skipped and counted. A
+-- sent_at that does not parse falls back to the conversation's creation
+-- time instead of aborting the migration.
+CREATE FUNCTION pg_temp.legacy_timestamp(value TEXT) RETURNS TIMESTAMP
+LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    RETURN value::TIMESTAMP;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    total       INTEGER;
+    copied      INTEGER;
+    bad_times   INTEGER;
+BEGIN
+    SELECT count(*) INTO total
+    FROM conversation c, json_array_elements(c.messages) m(value)
+    WHERE json_typeof(c.messages) = 'array';
+
+    INSERT INTO message (conversation_id, sender_id, text, sent_at)
+    SELECT c.conversation_id,
+           (m.value ->> 'sender_id')::INTEGER,
+           COALESCE(m.value ->> 'text', ''),
+           COALESCE(pg_temp.legacy_timestamp(m.value ->> 'sent_at') AT TIME ZONE 'UTC', c.created_at AT TIME ZONE 'UTC', now())
+    FROM conversation c,
+         json_array_elements(c.messages) WITH ORDINALITY AS m(value, ord)
+    WHERE json_typeof(c.messages) = 'array'
+      AND json_typeof(m.value) = 'object'
+      AND (m.value ->> 'sender_id') ~ '^\s*-?[0-9]{1,9}\s*$'
+    ORDER BY c.conversation_id, m.ord;
+    GET DIAGNOSTICS copied = ROW_COUNT;
+
+    IF copied < total THEN
+        RAISE NOTICE 'message: skipped % of % messages without a numeric sender_id', total - copied, total;
+    END IF;
+
+    SELECT count(*) INTO bad_times
+    FROM conversation c, json_array_elements(c.messages) m(value)
+    WHERE json_typeof(c.messages) = 'array'
+      AND json_typeof(m.value) = 'object'
+      AND m.value ->> 'sent_at' IS NOT NULL
+      AND pg_temp.legacy_timestamp(m.value ->> 'sent_at') IS NULL;
+    IF bad_times > 0 THEN
+        RAISE NOTICE 'message: % messages had an unreadable sent_at; used the conversation time', bad_times;
+    END IF;
+END
+$$;
+
+ALTER TABLE conversation DROP COLUMN IF EXISTS messages;
+
+ANALYZE message;
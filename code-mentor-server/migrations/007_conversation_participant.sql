@@ -0,0 +1,23 @@
+-- Indexed conversation membership (services/messaging.py); the JSON
+-- participants column stays as the ordered copy returned to clients.
+CREATE TABLE IF NOT EXISTS conversation_participant (
+    conversation_id INTEGER NOT NULL REFERENCES conversation(conversation_id) ON DELETE CASCADE,
+    user_id         INTEGER NOT NULL,
+    position        INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (conversation_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_conversation_participant_user ON conversation_participant (user_id, conversation_id);
+
+INSERT INTO conversation_participant (conversation_id, user_id, position)
+SELECT c.conversation_id, (p.value ->> 'user_id')::INTEGER, MIN(p.ord)::INTEGER - 1
+FROM conversation c,
+     json_array_elements(c.participants) WITH ORDINALITY AS p(value, ord)
+WHERE json_typeof(c.participants) = 'array'
+  AND json_typeof(p.value) = 'object'
+  -- Same guard as 006: a non-numeric legacy id is skipped, not cast
+  AND (p.value ->> 'user_id') ~ '^\s*-?[0-9]{1,9}\s*$'
+GROUP BY c.conversation_id, (p.value ->> 'user_id')::INTEGER
+ON CONFLICT DO NOTHING;
+
+ANALYZE conversation_participant;
@@ -0,0 +1,4 @@
+-- Subscriptions are listed per university (routers/package.py).
+CREATE INDEX IF NOT EXISTS ix_subscription_uni_created ON subscription (uni_id, created_at);
+
+ANALYZE subscription;
@@ -0,0 +1,5 @@
+-- Batch-wide work (services/report_fanout.py, batch filters) walks a
+-- batch's students in student_id order.
+CREATE INDEX IF NOT EXISTS ix_student_batch ON student (batch_id, student_id);
+
+ANALYZE student;
@@ -0,0 +1,45 @@
+-- Completed topics per student (services/topic_mastery.py), replacing the
+-- completed flags walked inside progress_report.content.
+CREATE TABLE IF NOT EXISTS student_topic_mastery (
+    student_id    INTEGER NOT NULL REFERENCES student(student_id) ON DELETE CASCADE,
+    concept_id    INTEGER NOT NULL,
+    topic_id      INTEGER NOT NULL,
+    assignment_id INTEGER REFERENCES assignment(assignment_id) ON DELETE SET NULL,
+    completed_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (student_id, concept_id, topic_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_student_topic_mastery_student_completed
+    ON student_topic_mastery (student_id, completed_at);
+
+-- Backfill from the completed flags. The completion time is the student's
+-- first submission to an assignment whose topic map covers the topic.
+INSERT INTO student_topic_mastery (student_id, concept_id, topic_id, assignment_id, completed_at)
+SELECT pr.student_id,
+       (cc ->> 'id')::INTEGER,
+       (ct ->> 'id')::INTEGER,
+       first_sub.assignment_id,
+       COALESCE(first_sub.submitted_at, now())
+FROM progress_report pr
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(pr.content -> 'concepts') = 'array' THEN pr.content -> 'concepts' ELSE '[]'::JSONB END
+) cc
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(cc -> 'topics') = 'array' THEN cc -> 'topics' ELSE '[]'::JSONB END
+) ct
+LEFT JOIN LATERAL (
+    SELECT s.assignment_id, s.submitted_at
+    FROM submission s
+    JOIN topic_map tm ON tm.assignment_id = s.assignment_id
+    WHERE s.student_id = pr.student_id
+      AND jsonb_typeof(tm.content -> (cc ->> 'id')) = 'array'
+      AND tm.content -> (cc ->> 'id') ? (ct ->> 'id')
+    ORDER BY s.submitted_at
+    LIMIT 1
+) first_sub ON true
+WHERE (ct ->> 'completed') = 'true'
+  AND (cc ->> 'id') ~ '^[0-9]+$'
+  AND (ct ->> 'id') ~ '^[0-9]+$'
+ON CONFLICT DO NOTHING;
+
+ANALYZE student_topic_mastery;
@@ -0,0 +1,139 @@
+-- Per-university counters for the dashboards (services/university_stats.py).
+-- Row counts are kept current by statement-level triggers; byte totals
+-- (and any drift in the counts) are recomputed by reconcile_university_stats(),
+-- which the app runs periodically.
+CREATE TABLE IF NOT EXISTS university_stats (
+    uni_id        INTEGER PRIMARY KEY REFERENCES university(university_id) ON DELETE CASCADE,
+    instructors   INTEGER NOT NULL DEFAULT 0,
+    students      INTEGER NOT NULL DEFAULT 0,
+    assignments   INTEGER NOT NULL DEFAULT 0,
+    code_bytes    BIGINT NOT NULL DEFAULT 0,
+    log_bytes     BIGINT NOT NULL DEFAULT 0,
+    report_bytes  BIGINT NOT NULL DEFAULT 0,
+    updated_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+    reconciled_at TIMESTAMPTZ
+);
+
+-- Recent-students list on the dashboard
+CREATE INDEX IF NOT EXISTS ix_student_uni ON student (uni_id, student_id);
+
+-- One upsert per affected university per statement, so bulk inserts do not
+-- update the counter row once per inserted row. An assignment belongs to
+-- the university of its batch, or of its instructor when it has no batch.
+CREATE OR REPLACE FUNCTION university_stats_count() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    counter TEXT := CASE TG_TABLE_NAME
+        WHEN 'instructor' THEN 'instructors'
+        WHEN 'student' THEN 'students'
+        ELSE 'assignments'
+    END;
+    uni TEXT := CASE TG_TABLE_NAME
+        WHEN 'assignment' THEN
+            'COALESCE((SELECT b.uni_id FROM batch b WHERE b.batch_id = r.batch_id),'
+            ' (SELECT i.uni_id FROM instructor i WHERE i.instructor_id = r.instructor_id))'
+        ELSE 'r.uni_id'
+    END;
+    changes TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        changes := format('SELECT %s AS uni_id, 1 AS d FROM new_rows r', uni);
+    ELSIF TG_OP = 'DELETE' THEN
+        changes := format('SELECT %s AS uni_id, -1 AS d FROM old_rows r', uni);
+    ELSE
+        changes := format('SELECT %1$s AS uni_id, 1 AS d FROM new_rows r UNION ALL SELECT %1$s, -1 FROM old_rows r', uni);
+    END IF;
+
+    EXECUTE format(
+        'INSERT INTO university_stats (uni_id, %1$I) '
+        'SELECT c.uni_id, sum(c.d) FROM (%2$s) c '
+        'WHERE c.uni_id IS NOT NULL AND EXISTS (SELECT 1 FROM university u WHERE u.university_id = c.uni_id) '
+        'GROUP BY c.uni_id HAVING sum(c.d) <> 0 '
+        'ON CONFLICT (uni_id) DO UPDATE SET %1$I = university_stats.%1$I + EXCLUDED.%1$I, updated_at = now()',
+        counter, changes
+    );
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['instructor', 'student', 'assignment'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%1$s_stats_insert ON %1$I', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%1$s_stats_update ON %1$I', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%1$s_stats_delete ON %1$I', t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_stats_insert AFTER INSERT ON %1$I '
+            'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION university_stats_count()', t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_stats_update AFTER UPDATE ON %1$I '
+            'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION university_stats_count()', t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_stats_delete AFTER DELETE ON %1$I '
+            'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION university_stats_count()', t);
+    END LOOP;
+END
+$$;
+
+-- Full recount. Storage is the stored (compressed) size of submission
+-- artifacts and progress reports: code and program output count as code,
+-- paste logs and typing analytics as logs, everything else as reports.
+CREATE OR REPLACE FUNCTION reconcile_university_stats() RETURNS INTEGER
+LANGUAGE sql AS $$
+    WITH instructors AS (
+        SELECT uni_id, count(*) AS n FROM instructor GROUP BY uni_id
+    ), students AS (
+        SELECT uni_id, count(*) AS n FROM student GROUP BY uni_id
+    ), assignments AS (
+        SELECT COALESCE(b.uni_id, i.uni_id) AS uni_id, count(*) AS n
+        FROM assignment a
+        LEFT JOIN batch b ON b.batch_id = a.batch_id
+        LEFT JOIN instructor i ON i.instructor_id = a.instructor_id
+        GROUP BY 1
+    ), artifacts AS (
+        SELECT st.uni_id,
+               sum(pg_column_size(sa.content)) FILTER (WHERE sa.kind IN ('code', 'output')) AS code_bytes,
+               sum(pg_column_size(sa.content)) FILTER (WHERE sa.kind IN ('paste', 'typing-analytics')) AS log_bytes,
+               sum(pg_column_size(sa.content)) FILTER (WHERE sa.kind NOT IN ('code', 'output', 'paste', 'typing-analytics')) AS report_bytes
+        FROM submission_artifact sa
+        JOIN submission s ON s.submission_id = sa.submission_id
+        JOIN student st ON st.student_id = s.student_id
+        GROUP BY st.uni_id
+    ), reports AS (
+        SELECT st.uni_id, sum(pg_column_size(pr.content)) AS bytes
+        FROM progress_report pr
+        JOIN student st ON st.student_id = pr.student_id
+        GROUP BY st.uni_id
+    ), upserted AS (
+        INSERT INTO university_stats AS us
+            (uni_id, instructors, students, assignments, code_bytes, log_bytes, report_bytes, updated_at, reconciled_at)
+        SELECT u.university_id,
+               COALESCE(i.n, 0), COALESCE(s.n, 0), COALESCE(a.n, 0),
+               COALESCE(art.code_bytes, 0), COALESCE(art.log_bytes, 0),
+               COALESCE(art.report_bytes, 0) + COALESCE(r.bytes, 0),
+               now(), now()
+        FROM university u
+        LEFT JOIN instructors i ON i.uni_id = u.university_id
+        LEFT JOIN students s ON s.uni_id = u.university_id
+        LEFT JOIN assignments a ON a.uni_id = u.university_id
+        LEFT JOIN artifacts art ON art.uni_id = u.university_id
+        LEFT JOIN reports r ON r.uni_id = u.university_id
+        ON CONFLICT (uni_id) DO UPDATE SET
+            instructors = EXCLUDED.instructors,
+            students = EXCLUDED.students,
+            assignments = EXCLUDED.assignments,
+            code_bytes = EXCLUDED.code_bytes,
+            log_bytes = EXCLUDED.log_bytes,
+            report_bytes = EXCLUDED.report_bytes,
+            updated_at = now(),
+            reconciled_at = now()
+        RETURNING 1
+    )
+    SELECT count(*)::INTEGER FROM upserted;
+$$;
+
+SELECT reconcile_university_stats();
+
+ANALYZE university_stats;
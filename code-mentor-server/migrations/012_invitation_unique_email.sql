@@ -0,0 +1,12 @@
+-- One invitation per email and university (services/invitation_import.py
+-- inserts with ON CONFLICT DO NOTHING against this index). Emails compare
+-- case-insensitively; older duplicates keep their lowest id.
+DELETE FROM invitation i
+USING invitation d
+WHERE d.uni_id = i.uni_id
+  AND lower(d.email) = lower(i.email)
+  AND d.id < i.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_invitation_uni_email ON invitation (uni_id, lower(email));
+
+ANALYZE invitation;
@@ -0,0 +1,9 @@
+-- Winnowed shingles used to be stored minus 2^60 while single-shingle
+-- (short) pastes were stored as is, so short and long pastes never matched.
+-- Both are now raw hashes (< 2^61, fit BIGINT). Undo the shift on rows from
+-- the winnowed branch: more than one shingle, or a paste longer than
+-- SHINGLE_SIZE + WINNOW_WINDOW (41) characters.
+UPDATE paste_fingerprint
+SET shingles = ARRAY(SELECT s + (1::BIGINT << 60) FROM unnest(shingles) WITH ORDINALITY AS t(s, n) ORDER BY n)
+WHERE shingles IS NOT NULL
+  AND (cardinality(shingles) > 1 OR text_length > 41);
@@ -0,0 +1,75 @@
+-- Databases that ran the earlier 003/005 read the top-level report status
+-- and rounded scores to integers. Bring them in line with the current
+-- 003/005: instructor status, then the AI evaluation's, then 'Pending';
+-- scores kept as NUMERIC. A no-op resync on fresh databases.
+ALTER TABLE submission ALTER COLUMN score TYPE NUMERIC;
+
+CREATE OR REPLACE FUNCTION submission_report_status(report JSONB) RETURNS VARCHAR
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT COALESCE(
+        report -> 'instructor-evaluation' ->> 'status',
+        NULLIF(report -> 'ai-evaluation' ->> 'status', 'Graded'),
+        'Pending'
+    )::VARCHAR(32)
+$$;
+
+-- The return type changes, which CREATE OR REPLACE cannot do
+DROP FUNCTION IF EXISTS submission_report_score(JSONB);
+CREATE FUNCTION submission_report_score(report JSONB) RETURNS NUMERIC
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE WHEN s ~ '^\s*-?[0-9]+(\.[0-9]+)?\s*$' THEN s::NUMERIC END
+    FROM (SELECT COALESCE(report -> 'instructor-evaluation' ->> 'score', report ->> 'score') AS s) v
+$$;
+
+CREATE OR REPLACE FUNCTION submission_artifact_sync_grading() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    sid INTEGER := COALESCE(NEW.submission_id, OLD.submission_id);
+    grading JSONB;
+    new_status VARCHAR(32);
+    regraded BOOLEAN;
+BEGIN
+    IF COALESCE(NEW.kind, OLD.kind) NOT IN ('instructor-evaluation', 'ai-evaluation', 'score') THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT COALESCE(jsonb_object_agg(kind, content), '{}'::JSONB) INTO grading
+    FROM submission_artifact
+    WHERE submission_id = sid AND kind IN ('instructor-evaluation', 'ai-evaluation', 'score');
+
+    new_status := submission_report_status(grading);
+    regraded := TG_OP <> 'DELETE' AND NEW.kind = 'instructor-evaluation'
+        AND (TG_OP = 'INSERT' OR OLD.content IS DISTINCT FROM NEW.content);
+
+    UPDATE submission
+    SET status = new_status,
+        score = submission_report_score(grading),
+        graded_at = CASE
+            WHEN new_status <> 'Graded' THEN NULL
+            WHEN regraded OR status IS DISTINCT FROM 'Graded' THEN now()
+            ELSE graded_at
+        END
+    WHERE submission_id = sid;
+    RETURN NULL;
+END
+$$;
+
+WITH grading AS (
+    SELECT s.submission_id,
+           COALESCE(jsonb_object_agg(a.kind, a.content) FILTER (WHERE a.kind IS NOT NULL), '{}'::JSONB) AS report
+    FROM submission s
+    LEFT JOIN submission_artifact a
+           ON a.submission_id = s.submission_id
+          AND a.kind IN ('instructor-evaluation', 'ai-evaluation', 'score')
+    GROUP BY s.submission_id
+)
+UPDATE submission s
+SET status = submission_report_status(g.report),
+    score = submission_report_score(g.report),
+    graded_at = CASE WHEN submission_report_status(g.report) = 'Graded' THEN s.graded_at END
+FROM grading g
+WHERE g.submission_id = s.submission_id
+  AND (s.status IS DISTINCT FROM submission_report_status(g.report)
+       OR s.score IS DISTINCT FROM submission_report_score(g.report));
+
+ANALYZE submission;
@@ -0,0 +1,8 @@
+-- The invitation import checks student and instructor emails
+-- case-insensitively (services/invitation_import.py); index lower(email) so
+-- those lookups do not scan the tables.
+CREATE INDEX IF NOT EXISTS ix_student_email_lower ON student (lower(email));
+CREATE INDEX IF NOT EXISTS ix_instructor_email_lower ON instructor (lower(email));
+
+ANALYZE student;
+ANALYZE instructor;
@@ -1,6 +1,6 @@
 from .user import User
 from .student import Student
-from .message import Conversation
+from .message import Conversation, ConversationParticipant, Message
 from .instructor import Instructor  
 from .student import Student       
 from .university import University  
@@ -20,3 +20,7 @@ from .admin import Admin
 from .progress_report import ProgressReport
 from .plan import Plan
 from .subscription import Subscription
+from .paste_fingerprint import PasteFingerprint
+from .submission_artifact import SubmissionArtifact
+from .student_topic_mastery import StudentTopicMastery
+from .university_stats import UniversityStats
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -12,4 +12,8 @@ class Invitation(Base):
     status = Column(Enum("pending", "sent", name="status_enum"), default="pending")
     uni_id = Column(Integer, ForeignKey("university.university_id"), nullable=False)
 
-    university = relationship("University", back_populates="invitations")
\ No newline at end of file
+    university = relationship("University", back_populates="invitations")
+
+    __table_args__ = (
+        Index("ux_invitation_uni_email", uni_id, func.lower(email), unique=True),
+    )
\ No newline at end of file
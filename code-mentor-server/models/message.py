@@ -1,13 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, TIMESTAMP, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, TIMESTAMP, Text, DateTime, Index, JSON, func
 from sqlalchemy.orm import relationship
 from database import Base
 
-from sqlalchemy import Column, Integer, String, Boolean, TIMESTAMP, JSON
-from database import Base
-
-from sqlalchemy.ext.mutable import MutableList
-from sqlalchemy import JSON
-
 class Conversation(Base):
     __tablename__ = "conversation"
 
@@ -15,5 +9,49 @@ class Conversation(Base):
     name = Column(String(255), nullable=False)
     is_group = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP, default="now()")
-    participants = Column(JSON, nullable=False)  # List of participants
-    messages = Column(MutableList.as_mutable(JSON), default=[])  # Track changes to the messages list
\ No newline at end of file
+    participants = Column(JSON, nullable=False)  # List of participants (copy of conversation_participant, in order)
+
+    # History lives in the message table; never load it through this
+    # relationship, page it with services.messaging instead.
+    messages = relationship("Message", back_populates="conversation", lazy="noload", passive_deletes=True)
+    participant_rows = relationship("ConversationParticipant", back_populates="conversation", lazy="noload", passive_deletes=True)
+
+
+class ConversationParticipant(Base):
+    """Indexed membership, so a user's conversations are found without scanning."""
+    __tablename__ = "conversation_participant"
+
+    conversation_id = Column(Integer, ForeignKey("conversation.conversation_id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    position = Column(Integer, nullable=False, default=0)  # order in Conversation.participants
+
+    conversation = relationship("Conversation", back_populates="participant_rows")
+
+    __table_args__ = (
+        Index("ix_conversation_participant_user", "user_id", "conversation_id"),
+    )
+
+
+class Message(Base):
+    __tablename__ = "message"
+
+    message_id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversation.conversation_id", ondelete="CASCADE"), nullable=False)
+    sender_id = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    conversation = relationship("Conversation", back_populates="messages")
+
+    __table_args__ = (
+        Index("ix_message_conversation_sent", "conversation_id", "sent_at", "message_id"),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "message_id": self.message_id,
+            "conversation_id": self.conversation_id,
+            "sender_id": self.sender_id,
+            "text": self.text,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None,
+        }
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import ARRAY
+from database import Base
+from datetime import datetime, timezone
+
+class PasteFingerprint(Base):
+    __tablename__ = "paste_fingerprint"
+
+    paste_id = Column(Integer, primary_key=True, index=True)
+    text_hash = Column(String(64), nullable=False, index=True)  # SHA-256 hex digest
+    student_id = Column(Integer, ForeignKey("student.student_id", ondelete="CASCADE"), nullable=False)
+    assignment_id = Column(Integer, ForeignKey("assignment.assignment_id", ondelete="SET NULL"), nullable=True)
+    text_length = Column(Integer, nullable=False, default=0)
+    shingles = Column(ARRAY(BigInteger), nullable=True)  # winnowed rolling-hash fingerprints
+    seen_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<PasteFingerprint(id={self.paste_id}, student_id={self.student_id}, hash={self.text_hash[:12]})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -17,5 +17,10 @@ class Student(Base):
     batch = relationship("Batch", back_populates="students")
     submissions = relationship("Submission", back_populates="student")
 
+    __table_args__ = (
+        Index("ix_student_batch", "batch_id", "student_id"),
+        Index("ix_student_uni", "uni_id", "student_id"),
+    )
+
     def __repr__(self):
         return f"<Student(id={self.student_id}, name={self.student_name})>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from database import Base
+from datetime import datetime, timezone
+
+class StudentTopicMastery(Base):
+    """
+    One row per topic a student has completed. Concept and topic ids are
+    the ones in the batch's conceptual map (and in the progress report).
+    """
+    __tablename__ = "student_topic_mastery"
+
+    student_id = Column(Integer, ForeignKey("student.student_id", ondelete="CASCADE"), primary_key=True)
+    concept_id = Column(Integer, primary_key=True)
+    topic_id = Column(Integer, primary_key=True)
+    assignment_id = Column(Integer, ForeignKey("assignment.assignment_id", ondelete="SET NULL"), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("ix_student_topic_mastery_student_completed", "student_id", "completed_at"),
+    )
+
+    def __repr__(self):
+        return f"<StudentTopicMastery(student_id={self.student_id}, concept={self.concept_id}, topic={self.topic_id})>"
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Numeric, String, ForeignKey, DateTime, FetchedValue, Index, text
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm.collections import attribute_mapped_collection
 from database import Base
 from datetime import datetime, timezone
 
@@ -10,11 +10,37 @@ class Submission(Base):
     submission_id = Column(Integer, primary_key=True, index=True)
     assignment_id = Column(Integer, ForeignKey("assignment.assignment_id", ondelete="CASCADE"), nullable=False)
     student_id = Column(Integer, ForeignKey("student.student_id", ondelete="CASCADE"), nullable=False)
-    report = Column(JSONB, nullable=True)
-    submitted_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    submitted_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    # Maintained from the grading artifacts by a database
+    # trigger (migrations/003, 005, 014); never assign these directly.
+    status = Column(String(32), nullable=False, server_default=text("'Pending'"), server_onupdate=FetchedValue())
+    score = Column(Numeric(asdecimal=False), nullable=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
+    graded_at = Column(DateTime(timezone=True), nullable=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
 
     assignment = relationship("Assignment", back_populates="submissions")
     student = relationship("Student", back_populates="submissions")
+    # Code, output and evaluations live in submission_artifact, keyed by kind.
+    # Lazy: list queries never touch them. Under asyncio load them explicitly
+    # (selectinload(Submission.artifacts) or services.submission_artifacts).
+    artifacts = relationship(
+        "SubmissionArtifact",
+        back_populates="submission",
+        collection_class=attribute_mapped_collection("kind"),
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        Index("ix_submission_assignment_status", "assignment_id", "status"),
+        Index("ix_submission_student_submitted", "student_id", "submitted_at"),
+        Index("ix_submission_submitted_id", submitted_at.desc(), submission_id.desc()),
+    )
+
+    @property
+    def report(self) -> dict:
+        """The submission content as the report dict clients see (needs artifacts loaded)."""
+        return {kind: artifact.content for kind, artifact in self.artifacts.items()}
 
     def __repr__(self):
         return f"<Submission(id={self.submission_id}, student_id={self.student_id})>"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
+from database import Base
+from datetime import datetime, timezone
+
+class SubmissionArtifact(Base):
+    """
+    One piece of a submission's content, keyed by the report key it came
+    from: "code", "output", "paste", "ai-evaluation", "instructor-evaluation", ...
+    """
+    __tablename__ = "submission_artifact"
+
+    submission_id = Column(Integer, ForeignKey("submission.submission_id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String(64), primary_key=True)
+    content = Column(JSONB, nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    submission = relationship("Submission", back_populates="artifacts")
+
+    def __repr__(self):
+        return f"<SubmissionArtifact(submission_id={self.submission_id}, kind={self.kind})>"
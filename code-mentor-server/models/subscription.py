@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
+from .plan import Plan
 
 
 class Subscription(Base):
@@ -13,5 +15,18 @@ class Subscription(Base):
     status = Column(String(50), nullable=False, default='active')
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Loaded in the same query as the subscription (LEFT OUTER JOIN on plan_key)
+    plan = relationship(
+        Plan,
+        primaryjoin="foreign(Subscription.plan_key) == Plan.plan_key",
+        viewonly=True,
+        lazy="joined",
+        innerjoin=False,
+    )
+
+    __table_args__ = (
+        Index("ix_subscription_uni_created", "uni_id", "created_at"),
+    )
+
     def __repr__(self):
         return f"<Subscription(id={self.subscription_id}, uni_id={self.uni_id}, plan_key={self.plan_key})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from database import Base
+
+class UniversityStats(Base):
+    """
+    Dashboard counters for one university. Counts are maintained by
+    triggers, byte totals by reconcile_university_stats() (migrations/011).
+    """
+    __tablename__ = "university_stats"
+
+    uni_id = Column(Integer, ForeignKey("university.university_id", ondelete="CASCADE"), primary_key=True)
+    instructors = Column(Integer, nullable=False, default=0)
+    students = Column(Integer, nullable=False, default=0)
+    assignments = Column(Integer, nullable=False, default=0)
+    code_bytes = Column(BigInteger, nullable=False, default=0)
+    log_bytes = Column(BigInteger, nullable=False, default=0)
+    report_bytes = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<UniversityStats(uni_id={self.uni_id}, students={self.students}, instructors={self.instructors})>"
@@ -1,10 +1,14 @@
 # routes/__init__.py
 
+from .registry import RouterRegistry, audit_routes, check_routes
+
 # Import routers from your route files
 from .code_runner import router as code_runner_router
 from .ai_chat import router as ai_chat_router
 from .key_stroke import router as key_stroke_router
 from .editor import router as code_editor_router
+from .editor_socket import router as editor_socket_router
+from .paste_index import router as paste_index_router
 from .user import router as user_router
 from .login import router as login_router
 from .forgot_password import router as forgot_password_router    
@@ -31,46 +35,51 @@ from .student_messaging import router as student_messaging_router
 from .settings import router as settings_router
 from .university_dashboard import router as university_dashboard_router
 from .admin_panel import router as admin_panel_router
+from .account_setup import router as account_setup_router
 from .dashboard import router as dashboard_router
 from .submission_list_summary import router as submission_list_summary_router
 from .student_submission import router as student_submission_router
+from .metrics import router as metrics_router
+
+# Registration order is matching order; a router can only be added once
+registry = RouterRegistry()
+registry.add(code_runner_router)
+registry.add(ai_chat_router)
+registry.add(key_stroke_router)
+registry.add(code_editor_router)
+registry.add(editor_socket_router)
+registry.add(paste_index_router)
+registry.add(user_router)
+registry.add(login_router)
+registry.add(forgot_password_router)
+registry.add(submission_list_router)
+registry.add(submission_details_router)
+registry.add(messaging_router)
+registry.add(account_details_router)
+registry.add(create_assignment_router)
+registry.add(assignment_list_router)
+registry.add(assignment_details_router)
+registry.add(code_submit_router)
+registry.add(assignment_router)
+registry.add(report_router)
+registry.add(student_router)
+registry.add(public_lists_router)
+registry.add(student_messaging_router)
+registry.add(settings_router)
+registry.add(instructor_router)
+registry.add(welcome_router)
+registry.add(package_router)
+registry.add(progress_router)
+registry.add(batch_router)
+registry.add(assignment_generate_router)
+registry.add(student_assignment_router)
+registry.add(university_dashboard_router)
+registry.add(admin_panel_router)
+# Not mounted before the registry; every endpoint authenticates an admin
+registry.add(account_setup_router)
+registry.add(dashboard_router)
+registry.add(submission_list_summary_router)
+registry.add(student_submission_router)
+registry.add(metrics_router)
 
-routers = [
-    code_runner_router,
-    ai_chat_router,
-    key_stroke_router,
-    code_editor_router,
-    user_router,
-    login_router,
-    forgot_password_router,
-    submission_list_router,
-    submission_details_router,
-    messaging_router,
-    account_details_router,
-    create_assignment_router,
-    assignment_list_router,
-    assignment_details_router,
-    code_submit_router,
-    assignment_router,
-    report_router,
-    student_router,
-    public_lists_router,
-    student_messaging_router,
-    settings_router,
-    student_router,
-    instructor_router,
-    #reset_password_router,
-    welcome_router,
-    package_router,
-    report_router,
-    public_lists_router,
-    progress_router,
-    batch_router,
-    assignment_generate_router,
-    student_assignment_router,
-    university_dashboard_router,
-    admin_panel_router,
-    dashboard_router,
-    submission_list_summary_router,
-    student_submission_router
-]
\ No newline at end of file
+routers = registry.routers
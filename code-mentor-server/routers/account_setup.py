@@ -1,47 +1,74 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import get_db
 from models.invitation import Invitation
-from models.admin import Admin
-from auth.auth import verify_token
-from typing import List
+from auth.dependencies import role_required
+from auth.principal import Principal, get_principal
+from services.invitation_import import CSVImportError, import_invitations
+from services.provisioning import MAX_PROVISION_RECORDS, provision_users
+from pydantic import BaseModel
+from typing import List, Optional
+import json
 
 router = APIRouter()
 
+# --------------------------
+# Pydantic schemas
+# --------------------------
+class ProvisionRecord(BaseModel):
+    role: str  # "student" or "instructor"
+    username: str
+    password: str
+    name: str
+    email: str
+    contact_no: Optional[str] = None
+    index_no: Optional[str] = None
+    batch_id: Optional[int] = None  # required for students
+
+class BulkProvisionRequest(BaseModel):
+    records: List[ProvisionRecord]
+
 # Add an invitation
-@router.post("/invitations")
+@router.post("/invitations", dependencies=[Depends(role_required(["admin"]))])
 async def add_invitation(
     email: str,
     name: str,
     role: str,
-    token: dict = Depends(verify_token),
+    principal: Principal = Depends(get_principal),
     db: AsyncSession = Depends(get_db),
 ):
-    admin_id = token["user_id"]
-
-    # Fetch uni_id for the admin
-    admin_query = await db.execute(select(Admin.uni_id).where(Admin.admin_id == admin_id))
-    uni_id = admin_query.scalar_one_or_none()
+    # uni_id of the admin (profile row loaded once per request)
+    uni_id = await principal.admin_uni_id(db)
 
-    if not uni_id:
-        raise HTTPException(status_code=404, detail="University not found for the admin")
-
-    # Add the invitation
-    new_invitation = Invitation(email=email, name=name, role=role, uni_id=uni_id)
+    # Add the invitation; emails are stored lowercased like the CSV import,
+    # one per university (unique index, migrations/012)
+    new_invitation = Invitation(email=email.strip().lower(), name=name, role=role, uni_id=uni_id)
     db.add(new_invitation)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="This email is already invited to the university")
     await db.refresh(new_invitation)
 
     return {"message": "Invitation added successfully", "invitation": new_invitation}
 
-# Remove an invitation
-@router.delete("/invitations/{invitation_id}")
-async def remove_invitation(invitation_id: int, db: AsyncSession = Depends(get_db)):
+# Remove an invitation (only the admin's own university)
+@router.delete("/invitations/{invitation_id}", dependencies=[Depends(role_required(["admin"]))])
+async def remove_invitation(
+    invitation_id: int,
+    principal: Principal = Depends(get_principal),
+    db: AsyncSession = Depends(get_db),
+):
+    uni_id = await principal.admin_uni_id(db)
     invitation_query = await db.execute(select(Invitation).where(Invitation.id == invitation_id))
     invitation = invitation_query.scalar_one_or_none()
 
-    if not invitation:
+    # Another university's invitation is reported as missing, not forbidden
+    if not invitation or invitation.uni_id != uni_id:
         raise HTTPException(status_code=404, detail="Invitation not found")
 
     await db.delete(invitation)
@@ -52,37 +79,48 @@ async def remove_invitation(invitation_id: int, db: AsyncSession = Depends(get_d
 # Process CSV file
 @router.post("/invitations/process-csv")
 async def process_csv(
-    csv_file: bytes,  # File content as bytes
-    token: dict = Depends(verify_token),
+    csv_file: UploadFile = File(...),
+    principal: Principal = Depends(get_principal),
     db: AsyncSession = Depends(get_db),
 ):
-    admin_id = token["user_id"]
-
-    # Fetch uni_id for the admin
-    admin_query = await db.execute(select(Admin.uni_id).where(Admin.admin_id == admin_id))
-    uni_id = admin_query.scalar_one_or_none()
-
-    if not uni_id:
-        raise HTTPException(status_code=404, detail="University not found for the admin")
-
-    # Parse CSV file (assuming name and email columns)
-    import csv
-    from io import StringIO
-
-    csv_content = StringIO(csv_file.decode("utf-8"))
-    reader = csv.DictReader(csv_content)
-
-    invitations = []
-    for row in reader:
-        email = row.get("email")
-        name = row.get("name")
-        role = row.get("role")
-
-        if email and name and role in ["instructor", "student"]:
-            new_invitation = Invitation(email=email, name=name, role=role, uni_id=uni_id)
-            db.add(new_invitation)
-            invitations.append(new_invitation)
-
-    await db.commit()
-
-    return {"message": "CSV processed successfully", "invitations": invitations}
\ No newline at end of file
+    # uni_id of the admin (profile row loaded once per request)
+    uni_id = await principal.admin_uni_id(db)
+
+    # Streamed parse, de-duplication and chunked inserts (columns: email, name, role)
+    try:
+        result = await import_invitations(db, uni_id, csv_file)
+    except CSVImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await csv_file.close()
+
+    return {
+        "message": "CSV processed successfully",
+        "invitations": result.invitations,
+        "report": result.report,
+        "summary": result.summary(),
+    }
+
+# Create student and instructor accounts in bulk
+@router.post("/provisioning/users", dependencies=[Depends(role_required(["admin"]))])
+async def provision_accounts(
+    payload: BulkProvisionRequest,
+    principal: Principal = Depends(get_principal),
+):
+    """
+    Creates the users with their student/instructor rows in batched
+    transactions and streams NDJSON progress: a "started" event, one
+    "batch" event per batch with a result per record, then "done".
+    """
+    if len(payload.records) > MAX_PROVISION_RECORDS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_PROVISION_RECORDS} records per request")
+
+    # Resolved before streaming so a missing admin row is still a 404
+    uni_id = await principal.admin_uni_id()
+    records = [record.dict() for record in payload.records]
+
+    async def encode():
+        async for event in provision_users(uni_id, records):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(encode(), media_type="application/x-ndjson")
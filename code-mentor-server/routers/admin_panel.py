@@ -1,22 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from database import get_db
-from models import Admin, Student, Submission
-from auth.auth import verify_token
+from database import get_db, pool_status
+from models import Student, Submission
+from auth.auth import password_metrics
+from auth.dependencies import role_required
+from auth.principal import Principal, get_principal
+from services.response_cache import response_cache
+from services import query_guard
 
 router = APIRouter()
 
 @router.get("/students")
-async def get_students(token: dict = Depends(verify_token), db: AsyncSession = Depends(get_db)):
-    admin_id = token["user_id"]
-
-    # Fetch uni_id for the admin
-    admin_query = await db.execute(select(Admin.uni_id).where(Admin.admin_id == admin_id))
-    uni_id = admin_query.scalar_one_or_none()
-
-    if not uni_id:
-        raise HTTPException(status_code=404, detail="University not found for the admin")
+async def get_students(principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)):
+    # uni_id of the admin (profile row loaded once per request)
+    uni_id = await principal.admin_uni_id(db)
 
     # Fetch students for the university
     students_query = await db.execute(select(Student).where(Student.uni_id == uni_id))
@@ -25,18 +23,32 @@ async def get_students(token: dict = Depends(verify_token), db: AsyncSession = D
     return [{"id": student.student_id, "name": student.student_name, "email": student.email, "progress": 75, "lastActive": "2 hours ago"} for student in students]
 
 @router.get("/submissions")
-async def get_submissions(token: dict = Depends(verify_token), db: AsyncSession = Depends(get_db)):
-    admin_id = token["user_id"]
-
-    # Fetch uni_id for the admin
-    admin_query = await db.execute(select(Admin.uni_id).where(Admin.admin_id == admin_id))
-    uni_id = admin_query.scalar_one_or_none()
-
-    if not uni_id:
-        raise HTTPException(status_code=404, detail="University not found for the admin")
+async def get_submissions(principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_db)):
+    # uni_id of the admin (profile row loaded once per request)
+    uni_id = await principal.admin_uni_id(db)
 
     # Fetch submissions for the university
     submissions_query = await db.execute(select(Submission).join(Student).where(Student.uni_id == uni_id))
     submissions = submissions_query.scalars().all()
 
-    return [{"id": submission.submission_id, "student": submission.student.student_name, "problem": "Two Sum Problem", "submitted": submission.submitted_at.isoformat(), "status": "passed", "score": 98} for submission in submissions]
\ No newline at end of file
+    return [{"id": submission.submission_id, "student": submission.student.student_name, "problem": "Two Sum Problem", "submitted": submission.submitted_at.isoformat(), "status": "passed", "score": 98} for submission in submissions]
+
+@router.get("/db/pool", dependencies=[Depends(role_required(["admin"]))])
+async def get_pool_status():
+    """Connection pool occupancy and checkout wait times per engine."""
+    return pool_status()
+
+@router.get("/auth/password-metrics", dependencies=[Depends(role_required(["admin"]))])
+async def get_password_metrics():
+    """Password hashing pool settings, slot wait and bcrypt times, login latency."""
+    return password_metrics()
+
+@router.get("/cache/responses", dependencies=[Depends(role_required(["admin"]))])
+async def get_response_cache_stats():
+    """Hit/miss counts of the response cache in this process."""
+    return response_cache.stats()
+
+@router.get("/db/query-guard", dependencies=[Depends(role_required(["admin"]))])
+async def get_query_guard_status():
+    """Query guard settings and the latest requests that exceeded the query budget."""
+    return query_guard.status()
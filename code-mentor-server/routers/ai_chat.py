@@ -1,16 +1,15 @@
 # ai_chat.py
 from fastapi import APIRouter, HTTPException, Header, Depends
 from pydantic import BaseModel
-from groq import Groq
 import traceback
-import os
 from typing import Optional, Dict, Any
 
 # === Import your JWT verification function ===
 from auth.dependencies import login_required
+from services.llm import lazy_client
 
-# === Initialize Groq client ===
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# === Groq client (SDK loaded on first use) ===
+client = lazy_client("groq")
 
 router = APIRouter()
 
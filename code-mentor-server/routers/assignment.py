@@ -6,7 +6,8 @@ from models.assignment import Assignment
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import date, time
-from auth.dependencies import login_required
+from auth.principal import Principal, get_principal
+from services.response_cache import ASSIGNMENTS, invalidate_tags
 from models.student import Student
 from models.topic_map import TopicMap
 from sqlalchemy.orm import aliased
@@ -98,6 +99,7 @@ async def create_assignment(assignmentRequest: AssignmentRequest):
             session.add(topic_map_entry)
 
             await session.commit()
+            await invalidate_tags(ASSIGNMENTS)
             await session.refresh(new_assignment)
 
             return new_assignment
@@ -110,16 +112,13 @@ async def create_assignment(assignmentRequest: AssignmentRequest):
 @router.get("/{assignment_id}", response_model=AssignmentOut)
 async def get_assignment(
     assignment_id: int,
-    token_data: dict = Depends(login_required),  # token_data contains user_id and role
+    principal: Principal = Depends(get_principal),
 ):
-    user_id = token_data["user_id"]
-    
     # fetch assignment for user (log omitted for cleanliness)
 
     async with async_session() as session:
-        # Fetch the student
-        result = await session.execute(select(Student).where(Student.student_id == user_id))
-        student = result.scalar_one_or_none()
+        # The student's profile row (loaded once per request)
+        student = await principal.load(Student, session)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
 
@@ -168,6 +167,7 @@ async def update_assignment(assignment_id: int, assignment_update: AssignmentUpd
 
         session.add(assignment)
         await session.commit()
+        await invalidate_tags(ASSIGNMENTS)
         await session.refresh(assignment)
         return assignment
 
@@ -182,4 +182,5 @@ async def delete_assignment(assignment_id: int):
 
         await session.delete(assignment)
         await session.commit()
+        await invalidate_tags(ASSIGNMENTS)
         return {"detail": "Assignment deleted successfully"}
\ No newline at end of file
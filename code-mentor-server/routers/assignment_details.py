@@ -21,6 +21,7 @@ async def get_assignment_details(assignment_id: int):
                     selectinload(Assignment.batch),
                     selectinload(Assignment.instructor),
                     selectinload(Assignment.submissions).selectinload(Submission.student),
+                    selectinload(Assignment.submissions).selectinload(Submission.artifacts),
                 )
             )
             result = await session.execute(stmt)
@@ -6,6 +6,7 @@ from database import async_session
 from models.batch import Batch
 from pydantic import BaseModel
 from auth.dependencies import role_required
+from services.response_cache import ASSIGNMENTS, CONCEPTS, CachedRoute, cached_response
 from typing import List, Optional, Dict, Set
 from models import Assignment
 from models import TopicMap
@@ -13,13 +14,12 @@ from models import ConceptualMap
 import json
 import re
 import traceback
-
-# Import Gemini client
-from google import genai
+from services.llm import lazy_client
 
 router = APIRouter(
     prefix="/assignment_generate",
-    tags=["Assignment Generate"]
+    tags=["Assignment Generate"],
+    route_class=CachedRoute
 )
 
 # --------------------------
@@ -54,13 +54,15 @@ class AssignmentGenerateRequest(BaseModel):
 class ConceptsResponse(BaseModel):
     concepts: List[ConceptOut] = []
 
-gemini_client = genai.Client(api_key="")
+# Gemini client (SDK loaded on first use)
+gemini_client = lazy_client("gemini")
 
 # --------------------------
 # Endpoints
 # --------------------------
 
 @router.get("/concept", response_model=ConceptsResponse, dependencies=[Depends(role_required(["admin", "instructor"]))])
+@cached_response(ttl=300, tags=[ASSIGNMENTS, CONCEPTS], vary_on_auth=True)
 async def get_concepts(batch_id: int):
     async with async_session() as session:
         # 1️⃣ Get all assignments for this batch
@@ -6,10 +6,12 @@ from database import async_session
 from models.batch import Batch
 from pydantic import BaseModel
 from auth.dependencies import role_required
+from services.response_cache import BATCHES, CachedRoute, cached_response, invalidate_tags
 
 router = APIRouter(
     prefix="/batch",
-    tags=["Batch"]
+    tags=["Batch"],
+    route_class=CachedRoute
 )
 
 # --------------------------
@@ -43,10 +45,12 @@ async def create_batch(batch: BatchCreate):
         session.add(new_batch)
         await session.commit()
         await session.refresh(new_batch)
+        await invalidate_tags(BATCHES)
         return new_batch
 
 # Get all batches - admin and instructor
 @router.get("/", response_model=list[BatchOut], dependencies=[Depends(role_required(["admin", "instructor"]))])
+@cached_response(ttl=300, tags=[BATCHES], vary_on_auth=True)
 async def get_batches():
     async with async_session() as session:
         result = await session.execute(select(Batch))
@@ -80,6 +84,7 @@ async def update_batch(batch_id: int, batch_update: BatchUpdate):
         session.add(batch)
         await session.commit()
         await session.refresh(batch)
+        await invalidate_tags(BATCHES)
         return batch
 
 # Delete a batch - admin only
@@ -93,4 +98,5 @@ async def delete_batch(batch_id: int):
 
         await session.delete(batch)
         await session.commit()
+        await invalidate_tags(BATCHES)
         return {"detail": "Batch deleted successfully"}
\ No newline at end of file
@@ -5,6 +5,7 @@ import logging
 
 # Import your dependencies
 from auth.dependencies import role_required
+from services.instrumentation import track_subprocess
 
 router = APIRouter()
 
@@ -43,19 +44,21 @@ async def run_code(
 
     try:
         if req.language == "python":
-            proc = subprocess.run(
-                ["python", file_path],
-                input=req.stdin.encode(),
-                capture_output=True,
-                timeout=5
-            )
+            with track_subprocess():
+                proc = subprocess.run(
+                    ["python", file_path],
+                    input=req.stdin.encode(),
+                    capture_output=True,
+                    timeout=5
+                )
         elif req.language == "javascript":
-            proc = subprocess.run(
-                ["node", file_path],
-                input=req.stdin.encode(),
-                capture_output=True,
-                timeout=5
-            )
+            with track_subprocess():
+                proc = subprocess.run(
+                    ["node", file_path],
+                    input=req.stdin.encode(),
+                    capture_output=True,
+                    timeout=5
+                )
         else:
             result["stderr"] = "Language not supported"
             return result
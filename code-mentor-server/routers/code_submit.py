@@ -7,6 +7,9 @@ from pydantic import BaseModel
 from database import async_session
 from models.submission import Submission
 from auth.dependencies import role_required
+from services.response_cache import SUBMISSIONS, invalidate_tags
+from services.submission_artifacts import load_report, put_artifacts
+from services.typing_analytics import SUMMARY_KEY, typing_analytics
 
 router = APIRouter(
     prefix="/submit",
@@ -42,10 +45,24 @@ async def submit_assignment(
             )
             existing = result.scalars().first()
 
+            # Typing statistics are kept server-side and merged into the
+            # summary saved with the previous submission, if any
+            report = dict(data.report)
+            report.pop(SUMMARY_KEY, None)
+            previous = None
+            if existing:
+                previous = (await load_report(session, existing.submission_id, [SUMMARY_KEY])).get(SUMMARY_KEY)
+            analytics = typing_analytics.collect(student_id, data.assignment_id, previous)
+            if analytics is not None:
+                report[SUMMARY_KEY] = analytics
+
             if existing:
-                existing.report = data.report
                 existing.submitted_at = now_utc
+                # A resubmission replaces the whole report; unchanged rows
+                # (e.g. the same code) are not rewritten
+                await put_artifacts(session, existing.submission_id, report, replace=True)
                 await session.commit()
+                await invalidate_tags(SUBMISSIONS)
                 await session.refresh(existing)
                 return {
                     "status": "updated",
@@ -56,11 +73,13 @@ async def submit_assignment(
             new_submission = Submission(
                 assignment_id=data.assignment_id,
                 student_id=student_id,
-                report=data.report,
                 submitted_at=now_utc
             )
             session.add(new_submission)
+            await session.flush()
+            await put_artifacts(session, new_submission.submission_id, report)
             await session.commit()
+            await invalidate_tags(SUBMISSIONS)
             await session.refresh(new_submission)
 
             return {
@@ -13,6 +13,7 @@ from models.assignment import Assignment
 from models.batch import Batch
 from models.instructor import Instructor
 from auth.dependencies import login_required
+from services.response_cache import ASSIGNMENTS, invalidate_tags
 from fastapi import Depends
 
 router = APIRouter()
@@ -103,6 +104,7 @@ async def create_assignment(assignment: AssignmentCreateIn, token_data: dict = D
 
         session.add(new_assignment)
         await session.commit()
+        await invalidate_tags(ASSIGNMENTS)
         await session.refresh(new_assignment)
 
         return {
@@ -187,6 +189,7 @@ async def update_assignment(assignment_id: int, assignment: AssignmentCreateIn,
 
         session.add(a)
         await session.commit()
+        await invalidate_tags(ASSIGNMENTS)
         await session.refresh(a)
 
         logger.info("[update_assignment] assignment %s updated", a.assignment_id)
@@ -224,6 +227,7 @@ async def delete_assignment(assignment_id: int, token_data: dict = Depends(login
 
         await session.delete(a)
         await session.commit()
+        await invalidate_tags(ASSIGNMENTS)
         return {"detail": "Assignment deleted"}
 
 
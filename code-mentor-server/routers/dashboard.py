@@ -2,10 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import cast, String
-from database import async_session
+from database import get_read_db
 from models.assignment import Assignment
 from models.submission import Submission
 from models.student import Student
+from services.response_cache import ASSIGNMENTS, SUBMISSIONS, CachedRoute, cached_response
+from services.submission_stats import grading_counts
 from datetime import date, datetime, timezone
 from typing import List, Optional
 from pydantic import BaseModel
@@ -13,7 +15,8 @@ import json
 
 router = APIRouter(
     prefix="/dashboard",
-    tags=["dashboard"]
+    tags=["dashboard"],
+    route_class=CachedRoute
 )
 
 # --------------------------
@@ -38,38 +41,23 @@ class SubmissionOut(BaseModel):
     class Config:
         orm_mode = True
 
-# --------------------------
-# Database Session Dependency
-# --------------------------
-async def get_db():
-    async with async_session() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
-
 # --------------------------
 # Endpoints
 # --------------------------
 
 @router.get("/graded-submissions")
-async def submission_get_graded(session: AsyncSession = Depends(get_db)):
+async def submission_get_graded(session: AsyncSession = Depends(get_read_db)):
     """Fetch the count of submissions with 'Graded' status."""
     try:
-        result = await session.execute(
-            select(Submission)
-            .where(Submission.report["instructor-evaluation"].has_key("status"))
-            .where(Submission.report["instructor-evaluation"]["status"].astext == "Graded")
-        )
-        submissions = result.scalars().all()
-        print(f"Graded Submissions: {len(submissions)}")  # Debugging log
-        return {"count": len(submissions)}
+        counts = await grading_counts(session)
+        return {"count": counts["graded"]}
     except Exception as e:
         print(f"Error fetching graded count: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/active-assignments", response_model=List[AssignmentOut])
-async def get_active_assignments(session: AsyncSession = Depends(get_db)):
+@cached_response(ttl=60, tags=[ASSIGNMENTS])
+async def get_active_assignments(session: AsyncSession = Depends(get_read_db)):
     """Fetch active assignments (assignments with a future due date)."""
     try:
         today = datetime.now(timezone.utc).date()
@@ -86,44 +74,19 @@ async def get_active_assignments(session: AsyncSession = Depends(get_db)):
 
 
 @router.get("/get-pending-review")
-async def pending_reviews():
+async def pending_reviews(session: AsyncSession = Depends(get_read_db)):
     """Fetch the count of submissions that are pending review."""
     try:
-        async with async_session() as session:
-            # Count submissions that are NOT graded (pending)
-            # This includes:
-            # 1. Submissions with no instructor-evaluation at all
-            # 2. Submissions with instructor-evaluation but no status field
-            # 3. Submissions with instructor-evaluation.status = "Pending"
-            # 4. Submissions with instructor-evaluation.status != "Graded"
-            
-            # First, get total submissions
-            total_result = await session.execute(select(Submission))
-            total_submissions = total_result.scalars().all()
-            
-            # Then get graded submissions
-            graded_result = await session.execute(
-                select(Submission).where(
-                    Submission.report["instructor-evaluation"]["status"].astext == "Graded"
-                )
-            )
-            graded_submissions = graded_result.scalars().all()
-            
-            # Pending = Total - Graded
-            pending_count = len(total_submissions) - len(graded_submissions)
-            
-            print(f"Total Submissions: {len(total_submissions)}")
-            print(f"Graded Submissions: {len(graded_submissions)}")
-            print(f"Pending Review Count: {pending_count}")
-            
-            return {"count": pending_count}
-            
+        # Submissions whose instructor-evaluation status is not "Graded"
+        counts = await grading_counts(session)
+        return {"count": counts["pending"]}
     except Exception as e:
         print(f"Error fetching pending review count: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/upcoming-deadlines", response_model=List[AssignmentOut])
-async def get_upcoming_deadlines(session: AsyncSession = Depends(get_db)):
+@cached_response(ttl=60, tags=[ASSIGNMENTS])
+async def get_upcoming_deadlines(session: AsyncSession = Depends(get_read_db)):
     """Fetch assignments with upcoming deadlines."""
     try:
         today = datetime.now(timezone.utc).date()
@@ -140,14 +103,15 @@ async def get_upcoming_deadlines(session: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @router.get("/recent-submissions", response_model=List[SubmissionOut])
-async def get_recent_submissions(session: AsyncSession = Depends(get_db)):
+@cached_response(ttl=30, tags=[SUBMISSIONS])
+async def get_recent_submissions(session: AsyncSession = Depends(get_read_db)):
     """Fetch recent submissions."""
     try:
         result = await session.execute(
             select(
                 Submission.submission_id,
                 Submission.submitted_at,
-                Submission.report,
+                Submission.status,
                 Assignment.assignment_name,
                 Student.student_name
             )
@@ -164,7 +128,7 @@ async def get_recent_submissions(session: AsyncSession = Depends(get_db)):
                 "submission_id": row.submission_id,
                 "assignment_name": row.assignment_name,
                 "student_name": row.student_name,
-                "status": row.report.get("instructor-evaluation", {}).get("status", "Pending"),
+                "status": row.status,
                 "submitted_at": row.submitted_at,
             }
             for row in submissions
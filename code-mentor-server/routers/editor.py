@@ -1,5 +1,6 @@
 # routers/editor.py
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
@@ -7,8 +8,17 @@ import os
 import json
 from pathlib import Path
 import hashlib
-import re
 import logging
+import re
+
+from auth.dependencies import role_required
+from services.paste_detection import (
+    PASTE_MIN_LEN,
+    PASTE_TIME_THRESHOLD_SEC,
+    looks_like_paste,
+)
+from services import session_replay
+from services.typing_analytics import typing_analytics
 
 router = APIRouter()
 
@@ -103,15 +113,6 @@ def compute_text_hash(text: str) -> str:
 last_events: Dict[str, Dict[str, Any]] = {}
 
 
-# -------------------------
-# Paste detection thresholds (tunable)
-# -------------------------
-PASTE_MIN_LEN = 10                 # minimal added length to consider
-PASTE_TIME_THRESHOLD_SEC = 0.12    # 120 ms (fast)
-PASTE_NEWLINE_DIFF = 2             # multiple new lines threshold
-STRUCTURED_PATTERN = re.compile(r"[{}\[\]();,'\"=<>+\-\s]{3,}")
-
-
 def append_paste_log(entry: dict):
     try:
         if not PASTE_LOG_FILE.exists():
@@ -132,68 +133,31 @@ def append_paste_log(entry: dict):
 
 
 # -------------------------
-# Server-side paste heuristic
-# -------------------------
-def looks_like_paste(prev_code: str, new_code: str, delta_time: float) -> bool:
-    """
-    Detects if the user likely pasted content instead of typing.
-    Heuristics:
-      - delta length >= PASTE_MIN_LEN
-      - operation happened very fast (delta_time < threshold)
-      - added section contains structured code characters OR multiple newlines
-    """
-    delta_len = abs(len(new_code) - len(prev_code))
-    if delta_len < PASTE_MIN_LEN:
-        return False
-
-    # Only consider fast events as possible paste
-    if delta_time < PASTE_TIME_THRESHOLD_SEC and delta_len >= PASTE_MIN_LEN:
-        # compute added portion in a robust way:
-        # if prev_code is prefix of new_code, use suffix; otherwise just use new_code
-        added_section = new_code[len(prev_code):] if new_code.startswith(prev_code) else new_code
-
-        new_lines_diff = new_code.count("\n") - prev_code.count("\n")
-
-        if STRUCTURED_PATTERN.search(added_section) or new_lines_diff >= PASTE_NEWLINE_DIFF:
-            return True
-    return False
-
-
-# -------------------------
-# Main endpoint - receive batched events
+# Batch processing (shared by POST /log and the editor socket)
 # -------------------------
-@router.post("/log")
-async def receive_event_batch(batch: KeystrokeBatch, request: Request):
+def process_event_batch(session_id: str, events: List[KeystrokeEvent]) -> Dict[str, Any]:
     """
-    Accepts a batch of keystroke/paste events for a session.
-    Client should not send raw pasted text — only metadata such as textLength and textHash.
+    Validates, scores and persists one batch of events for a session.
+    Callers are responsible for checking that the batch is non-empty and that
+    every event belongs to `session_id`.
     """
-    # Basic validation
-    if not batch.events or batch.sessionId.strip() == "":
-        raise HTTPException(status_code=400, detail="Empty batch or missing sessionId")
-
-    # All events must belong to same session
-    for ev in batch.events:
-        if ev.sessionId != batch.sessionId:
-            raise HTTPException(status_code=400, detail="Mismatched sessionId in events")
-
     # Validate order/timestamps
-    valid_order = _validate_event_order(batch.events)
+    valid_order = _validate_event_order(events)
     saved_events = []
 
     now = datetime.now(tz=timezone.utc)
 
     if not valid_order:
         # store events but mark them suspicious
-        for ev in batch.events:
+        for ev in events:
             rec = _create_event_record(ev)
             rec["_validation"] = "out_of_order_or_bad_timestamp"
             saved_events.append(rec)
-        _append_events_to_file(batch.sessionId, saved_events)
+        _append_events_to_file(session_id, saved_events)
         return {"status": "partial", "message": "Events saved but timestamp validation failed."}
 
     # Process events and run server-side paste checks using last_events memory
-    session_prev = last_events.get(batch.sessionId, {"time": now, "code": ""})
+    session_prev = last_events.get(session_id, {"time": now, "code": ""})
     prev_time = session_prev.get("time", now)
     prev_code = session_prev.get("code", "")
     # Use client's last timestamp if exist to compute delta_time more accurately
@@ -202,7 +166,7 @@ async def receive_event_batch(batch: KeystrokeBatch, request: Request):
     except Exception:
         prev_ts = now
 
-    for ev in batch.events:
+    for ev in events:
         rec = _create_event_record(ev)
 
         # basic server-side paste check for paste events and even for large keystroke events
@@ -236,6 +200,8 @@ async def receive_event_batch(batch: KeystrokeBatch, request: Request):
         if server_detected:
             rec["_server_detected"] = True
 
+        typing_analytics.observe(session_id, ev.type, ev_client_ts, rec["details"], server_detected)
+
         saved_events.append(rec)
 
         # update prev pointers for next event
@@ -252,10 +218,10 @@ async def receive_event_batch(batch: KeystrokeBatch, request: Request):
             prev_code = prev_code
 
     # persist saved events
-    _append_events_to_file(batch.sessionId, saved_events)
+    _append_events_to_file(session_id, saved_events)
 
     # Update in-memory last_events to current state
-    last_events[batch.sessionId] = {"time": now, "code": prev_code}
+    last_events[session_id] = {"time": now, "code": prev_code}
 
     # Produce a small server-side summary for quick checks
     typed = sum(1 for e in saved_events if e["type"] == "keystroke" or e["type"] == "typing")
@@ -267,7 +233,7 @@ async def receive_event_batch(batch: KeystrokeBatch, request: Request):
     suspicious_count = sum(1 for e in saved_events if e.get("_validation") or e.get("_server_detected"))
 
     summary = {
-        "sessionId": batch.sessionId,
+        "sessionId": session_id,
         "received": len(saved_events),
         "keystrokes": typed,
         "pasteEvents": pastes,
@@ -282,7 +248,7 @@ async def receive_event_batch(batch: KeystrokeBatch, request: Request):
         if e.get("_server_detected") or (e["type"] == "paste" and e.get("details", {}).get("textLength", 0) >= PASTE_MIN_LEN):
             paste_entry = {
                 "timestamp": e.get("receivedAt"),
-                "sessionId": batch.sessionId,
+                "sessionId": session_id,
                 "type": e.get("type"),
                 "details": {
                     "textLength": e.get("details", {}).get("textLength"),
@@ -292,7 +258,33 @@ async def receive_event_batch(batch: KeystrokeBatch, request: Request):
             }
             append_paste_log(paste_entry)
 
-    return {"status": "ok", "summary": summary}
+    return {"status": "ok", "summary": summary, "analytics": typing_analytics.stats(session_id).summary()}
+
+
+def forget_session(session_id: str) -> None:
+    """Drops the in-memory state kept for a session (called when it ends)."""
+    last_events.pop(session_id, None)
+
+
+# -------------------------
+# Main endpoint - receive batched events
+# -------------------------
+@router.post("/log")
+async def receive_event_batch(batch: KeystrokeBatch, request: Request):
+    """
+    Accepts a batch of keystroke/paste events for a session.
+    Client should not send raw pasted text — only metadata such as textLength and textHash.
+    """
+    # Basic validation
+    if not batch.events or batch.sessionId.strip() == "":
+        raise HTTPException(status_code=400, detail="Empty batch or missing sessionId")
+
+    # All events must belong to same session
+    for ev in batch.events:
+        if ev.sessionId != batch.sessionId:
+            raise HTTPException(status_code=400, detail="Mismatched sessionId in events")
+
+    return process_event_batch(batch.sessionId, batch.events)
 
 
 # -------------------------
@@ -303,4 +295,51 @@ async def get_session_logs(session_id: str):
     events = _load_events_from_file(session_id)
     if not events:
         raise HTTPException(status_code=404, detail="Session not found")
-    return {"sessionId": session_id, "events": events}
\ No newline at end of file
+    return {"sessionId": session_id, "events": events}
+
+# -------------------------
+# Session replay (admin/teacher)
+# -------------------------
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+def _replay_bounds(session_id: str):
+    bounds = session_replay.session_bounds(session_id) if SESSION_ID_PATTERN.match(session_id) else None
+    if bounds is None:
+        raise HTTPException(status_code=404, detail="No replay recorded for this session")
+    return bounds
+
+@router.get("/session/{session_id}/replay", dependencies=[Depends(role_required(["admin", "instructor"]))])
+async def get_session_document(session_id: str, at: Optional[float] = None):
+    """
+    The document as it was `at` seconds into the session
+    (the end of the session when omitted).
+    """
+    started, ended = _replay_bounds(session_id)
+    offset = ended - started if at is None else max(0.0, at)
+    return {
+        "sessionId": session_id,
+        "duration": round(ended - started, 3),
+        "at": offset,
+        "code": session_replay.document_at(session_id, started + offset),
+    }
+
+@router.get("/session/{session_id}/replay/stream", dependencies=[Depends(role_required(["admin", "instructor"]))])
+async def stream_session_replay(session_id: str, start: float = 0.0, end: Optional[float] = None):
+    """
+    Streams replay frames as NDJSON: the document at `start`, then every
+    change up to `end` (seconds into the session). Frame times are relative
+    to the start of the session.
+    """
+    started, _ = _replay_bounds(session_id)
+    frames = session_replay.iter_frames(
+        session_id,
+        started + max(0.0, start),
+        None if end is None else started + end,
+    )
+
+    def encode():
+        for frame in frames:
+            frame["t"] = round(frame["t"] - started, 3)
+            yield json.dumps(frame, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(encode(), media_type="application/x-ndjson")
@@ -0,0 +1,206 @@
+# routers/editor_socket.py
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Query, status
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import logging
+import re
+
+from auth.auth import verify_token
+from routers import key_stroke
+from routers.editor import KeystrokeEvent, process_event_batch, forget_session
+from services.session_replay import ReplayRecorder
+from services.typing_analytics import typing_analytics
+
+router = APIRouter()
+
+logger = logging.getLogger("routers.editor_socket")
+
+# Flush buffered telemetry to the session log after this many events
+# (and on every heartbeat / disconnect).
+FLUSH_EVERY = 50
+SESSION_NAME_PATTERN = re.compile(r"[^A-Za-z0-9_-]")
+# Subprotocol carrying the JWT: new WebSocket(url, ["bearer", token])
+AUTH_SUBPROTOCOL = "bearer"
+
+# Editor state in key_stroke is kept per user; several tabs share it, so it
+# is only cleared when the user's last socket closes.
+_open_sockets: Dict[Any, int] = {}
+
+
+def _session_id_for(user_id, client_session: Optional[str]) -> str:
+    # Prefix with the user id so a client can never write into another user's log
+    name = SESSION_NAME_PATTERN.sub("", client_session or "")[:64] or "editor"
+    return f"sess_{user_id}_{name}"
+
+
+def _delta_fields(frame: Dict[str, Any]) -> Optional[Tuple[int, int, str]]:
+    """(start, removed, text) of a delta frame, or None when it is malformed."""
+    start, removed, text = frame.get("start", 0), frame.get("removed", 0), frame.get("text", "")
+    for value in (start, removed):
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            return None
+    if not isinstance(text, str):
+        return None
+    return start, removed, text
+
+
+def _paste_fields(frame: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+    """(textLength, textHash) of a paste frame, or None when it is malformed."""
+    length, text_hash = frame.get("textLength", 0), frame.get("textHash")
+    if isinstance(length, bool) or not isinstance(length, int) or length < 0:
+        return None
+    if not isinstance(text_hash, str):
+        return None
+    return length, text_hash
+
+
+def _subprotocol_token(websocket: WebSocket) -> Optional[str]:
+    """The JWT offered as ["bearer", token] in Sec-WebSocket-Protocol, if any."""
+    offered = [value.strip() for value in websocket.headers.get("sec-websocket-protocol", "").split(",")]
+    if len(offered) == 2 and offered[0] == AUTH_SUBPROTOCOL and offered[1]:
+        return offered[1]
+    return None
+
+
+def _client_time(frame: Dict[str, Any]) -> str:
+    client_time = frame.get("t")
+    if isinstance(client_time, str):
+        return client_time
+    return datetime.now(tz=timezone.utc).isoformat()
+
+
+# -------------------------
+# Editor telemetry socket
+# -------------------------
+@router.websocket("/ws/editor")
+async def editor_socket(
+    websocket: WebSocket,
+    session: Optional[str] = Query(None),
+    language: str = Query("python"),
+    assignment: Optional[int] = Query(None),
+):
+    """
+    One authenticated socket per editor session. Browsers cannot set an
+    Authorization header on a WebSocket, so the JWT is offered as the second
+    subprotocol (Sec-WebSocket-Protocol: bearer, <token>); unlike the query
+    string, that header does not end up in access logs.
+
+    Client frames (JSON):
+      {"type": "sync", "code": "...", "action": "typing" | "paste"}   full buffer
+      {"type": "delta", "start": 12, "removed": 0, "text": "x", "t": iso}
+      {"type": "paste", "textLength": 120, "textHash": "...", "t": iso}
+      {"type": "heartbeat"}
+
+    Server frames:
+      {"type": "ack", "paste": bool}       after sync / heartbeat
+      {"type": "resync"}                   delta received before any sync
+      {"type": "error", "detail": "..."}   malformed frame, ignored
+    """
+    token = _subprotocol_token(websocket)
+    try:
+        if token is None:
+            raise HTTPException(status_code=401, detail="Missing token")
+        token_data = verify_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept(subprotocol=AUTH_SUBPROTOCOL)
+    user_id = token_data["user_id"]
+    role = token_data.get("role")
+    _open_sockets[user_id] = _open_sockets.get(user_id, 0) + 1
+    session_id = _session_id_for(user_id, session)
+    pending: List[KeystrokeEvent] = []
+    # Every applied change is also stored for GET /session/{id}/replay
+    recorder = ReplayRecorder(session_id)
+
+    def flush() -> None:
+        if pending:
+            process_event_batch(session_id, list(pending))
+            pending.clear()
+
+    logger.info("Editor socket opened user_id=%s session=%s", user_id, session_id)
+    try:
+        # Client-supplied; unknown assignments are not attached to indexed pastes
+        assignment = await key_stroke.validated_assignment_id(assignment)
+        # Lets POST /submit attach this session's typing statistics
+        typing_analytics.bind(session_id, user_id, assignment)
+
+        while True:
+            frame = await websocket.receive_json()
+            if not isinstance(frame, dict):
+                continue
+            kind = frame.get("type")
+
+            if kind == "delta":
+                fields = _delta_fields(frame)
+                if fields is None:
+                    await websocket.send_json({"type": "error", "detail": "Malformed delta frame"})
+                    continue
+                start, removed, text = fields
+                paste = key_stroke.record_delta(user_id, start, removed, text, recorder)
+                if paste is None:
+                    await websocket.send_json({"type": "resync"})
+                    continue
+                pending.append(KeystrokeEvent(
+                    sessionId=session_id,
+                    type="keystroke",
+                    details={"addedLength": len(text), "removedLength": removed},
+                    clientTime=_client_time(frame),
+                ))
+
+            elif kind == "sync":
+                code = str(frame.get("code", ""))
+                action = "paste" if frame.get("action") == "paste" else "typing"
+                if user_id not in key_stroke.user_documents and action == "typing":
+                    # First sync of the session: the buffer the page loaded with
+                    key_stroke.start_document(user_id, code, language, assignment, recorder, role=role)
+                    paste = False
+                else:
+                    paste = key_stroke.record_keystroke(user_id, action, code, language, assignment, recorder, role=role)
+                await websocket.send_json({"type": "ack", "paste": paste})
+
+            elif kind == "paste":
+                # Only flags the session here; the pasted text itself arrives as
+                # a delta and is fingerprinted from that.
+                fields = _paste_fields(frame)
+                if fields is None:
+                    await websocket.send_json({"type": "error", "detail": "Malformed paste frame"})
+                    continue
+                text_length, text_hash = fields
+                key_stroke.mark_paste(user_id)
+                pending.append(KeystrokeEvent(
+                    sessionId=session_id,
+                    type="paste",
+                    details={"textLength": text_length, "textHash": text_hash},
+                    clientTime=_client_time(frame),
+                ))
+
+            elif kind == "heartbeat":
+                flush()
+                state = key_stroke.user_code_cache.get(user_id, {})
+                await websocket.send_json({"type": "ack", "paste": state.get("paste", False)})
+
+            if len(pending) >= FLUSH_EVERY:
+                flush()
+
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("Editor socket failed for session %s", session_id)
+    finally:
+        try:
+            flush()
+        except Exception:
+            logger.exception("Failed to flush editor telemetry for session %s", session_id)
+        recorder.close()
+        # Session cleanup replaces the sendBeacon to /keystroke/clear on unload,
+        # once no other tab of the user is still editing
+        remaining = _open_sockets.get(user_id, 1) - 1
+        if remaining > 0:
+            _open_sockets[user_id] = remaining
+        else:
+            _open_sockets.pop(user_id, None)
+            key_stroke.clear_user_state(user_id)
+        forget_session(session_id)
+        logger.info("Editor socket closed user_id=%s session=%s", user_id, session_id)
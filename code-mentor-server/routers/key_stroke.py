@@ -1,11 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
-from datetime import datetime
+from typing import Optional
 import json
 import os
-import re
 import logging
 from auth.auth import verify_token
+from database import async_session
+from models.assignment import Assignment
+from services.paste_detection import DocumentModel, Edit, score_edit
+from services.paste_index import paste_index
+from services.session_replay import ReplayRecorder
 
 # Import auth dependency
 from auth.dependencies import login_required  # replaces get_current_user
@@ -14,16 +18,10 @@ from auth.dependencies import login_required  # replaces get_current_user
 # Setup router and file
 # ======================
 router = APIRouter()
-REPORT_FILE = "keystroke_reports.json"
 PASTE_LOG_FILE = "paste_events.json"
 
 user_code_cache = {}
 
-# Ensure the report file exists
-if not os.path.exists(REPORT_FILE):
-    with open(REPORT_FILE, "w") as f:
-        json.dump({}, f)
-
 # Logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("routers.key_stroke")
@@ -35,18 +33,11 @@ class KeystrokeEvent(BaseModel):
     action: str  # "typing" or "paste"
     code: str
     language: str
+    assignment_id: Optional[int] = None
 
 # ======================
 # File handling helpers
 # ======================
-def read_reports() -> dict:
-    with open(REPORT_FILE, "r") as f:
-        return json.load(f)
-
-def write_reports(data: dict):
-    with open(REPORT_FILE, "w") as f:
-        json.dump(data, f, indent=2)
-
 def append_paste_log(entry: dict):
     try:
         if not os.path.exists(PASTE_LOG_FILE):
@@ -63,59 +54,149 @@ def append_paste_log(entry: dict):
 # ======================
 # Backend Paste Detection Logic
 # ======================
-last_events: dict = {}
-PASTE_MIN_LEN = 10
-PASTE_TIME_THRESHOLD_SEC = 0.12
-PASTE_NEWLINE_DIFF = 2
-
-def looks_like_paste(prev_code: str, new_code: str, delta_time: float) -> bool:
-    delta_len = abs(len(new_code) - len(prev_code))
-    if delta_len < PASTE_MIN_LEN:
-        return False
-    if delta_time < PASTE_TIME_THRESHOLD_SEC and delta_len >= PASTE_MIN_LEN:
-        added_section = new_code[len(prev_code):] if len(new_code) > len(prev_code) else new_code
-        suspicious_patterns = r"[{}\[\]();,'\"=<>+\-\s]{3,}"
-        new_lines_diff = new_code.count("\n") - prev_code.count("\n")
-        if re.search(suspicious_patterns, added_section) or new_lines_diff >= PASTE_NEWLINE_DIFF:
-            return True
-    return False
-
-def get_newly_added_text(old_code: str, new_code: str) -> str:
+# Server-side copy of each user's editor buffer, used to find what a change inserted
+user_documents: dict = {}
+# Assignment each user is currently editing (for the paste fingerprint index)
+user_assignments: dict = {}
+# Users whose pastes go to the fingerprint index (students only)
+paste_indexed_users: set = set()
+# assignment_id -> exists, for ids sent by clients
+_known_assignments: dict = {}
+MAX_KNOWN_ASSIGNMENTS = 10_000
+
+STARTER_CODE = {
+    "javascript": "// Write your solution here\nconsole.log('Hello, world!');",
+    "python": "# Write your solution here\nprint('Hello, world!')",
+}
+
+def is_paste_edit(edit: Edit) -> bool:
     """
-    Returns the text that was added to new_code compared to old_code.
+    Detects whether an editor change looks like a paste action.
     """
-    start = 0
-    while start < len(old_code) and start < len(new_code) and old_code[start] == new_code[start]:
-        start += 1
-
-    end_old = len(old_code) - 1
-    end_new = len(new_code) - 1
-
-    while end_old >= start and end_new >= start and old_code[end_old] == new_code[end_new]:
-        end_old -= 1
-        end_new -= 1
-
-    return new_code[start:end_new+1]
-
+    # One request is sent per editor change, so timing between requests says
+    # nothing about how fast the text was entered.
+    score = score_edit(edit, use_timing=False)
+    logger.debug(
+        "Heuristic paste detection: inserted=%d tokens=%d structured=%s result=%s",
+        score.length, score.tokens, score.structured, score.is_paste
+    )
+    return score.is_paste
+
+async def validated_assignment_id(assignment_id: Optional[int]) -> Optional[int]:
+    """The client-supplied assignment id if that assignment exists, else None."""
+    if assignment_id is None:
+        return None
+    exists = _known_assignments.get(assignment_id)
+    if exists is None:
+        async with async_session() as session:
+            exists = await session.get(Assignment, assignment_id) is not None
+        if len(_known_assignments) >= MAX_KNOWN_ASSIGNMENTS:
+            _known_assignments.clear()
+        _known_assignments[assignment_id] = exists
+    return assignment_id if exists else None
+
+def _record_paste(user_id, edit: Edit) -> None:
+    user_code_cache[user_id]["paste"] = True
+    if edit.inserted.strip() and user_id in paste_indexed_users:
+        paste_index.add(user_id, user_assignments.get(user_id), text=edit.inserted)
+
+def _ensure_user_state(user_id, language: str, assignment_id: Optional[int] = None, role: Optional[str] = None) -> None:
+    if assignment_id is not None:
+        user_assignments[user_id] = assignment_id
+    if role == "student":
+        paste_indexed_users.add(user_id)
+    if user_id not in user_code_cache:
+        starter = STARTER_CODE.get(language, "")
+        user_code_cache[user_id] = {"code": starter, "paste": False}
+        user_documents[user_id] = DocumentModel(starter)
 
-def detect_paste_heuristically(old_code: str, new_code: str) -> bool:
+def _ensure_base_snapshot(recorder: Optional[ReplayRecorder], text: str) -> None:
     """
-    Detects whether the change from old_code to new_code looks like a paste action.
+    Snapshots the buffer before this recorder's first change. The document
+    may predate the socket (another tab, HTTP edits), and replays need a
+    base to apply the recorder's deltas to.
     """
-    print("Heuristic paste detection running...")
-    newly_added_code = get_newly_added_text(old_code, new_code)
-    print(f"Newly added code: {newly_added_code!r}")
-
-    if len(newly_added_code) < 10:
-        print("Heuristic paste detection result: False (too small to be a paste)")
-        return False
+    if recorder is not None and not recorder.has_snapshot:
+        recorder.snapshot(text)
+
+def start_document(
+    user_id,
+    code: str,
+    language: str,
+    assignment_id: Optional[int] = None,
+    recorder: Optional[ReplayRecorder] = None,
+    role: Optional[str] = None,
+) -> None:
+    """Starts tracking from the client's current buffer without scoring it."""
+    _ensure_user_state(user_id, language, assignment_id, role)
+    user_documents[user_id].replace(code)
+    user_code_cache[user_id]["code"] = code
+    if recorder is not None:
+        recorder.snapshot(code)
+
+def record_keystroke(
+    user_id,
+    action: str,
+    code: str,
+    language: str,
+    assignment_id: Optional[int] = None,
+    recorder: Optional[ReplayRecorder] = None,
+    role: Optional[str] = None,
+) -> bool:
+    """
+    Records a full-buffer update for the user (HTTP /keystroke and the editor
+    socket's "sync" frames). Returns the user's current paste flag.
+    `assignment_id` must already be validated (validated_assignment_id).
+    """
+    _ensure_user_state(user_id, language, assignment_id, role)
+
+    _ensure_base_snapshot(recorder, user_documents[user_id].text)
+    edit = user_documents[user_id].replace(code)
+    if recorder is not None:
+        recorder.record(edit.start, edit.removed, edit.inserted, code)
+    if action == "paste" or is_paste_edit(edit):
+        logger.info("Paste detected for user_id=%s", user_id)
+        _record_paste(user_id, edit)
+
+    user_code_cache[user_id]["code"] = code
+    return user_code_cache[user_id]["paste"]
+
+def record_delta(
+    user_id,
+    start: int,
+    removed: int,
+    text: str,
+    recorder: Optional[ReplayRecorder] = None,
+) -> Optional[bool]:
+    """
+    Applies an incremental editor change (offset, replaced length, new text).
+    Returns the user's paste flag, or None if there is no buffer to apply the
+    change to yet (the client has to send a full sync first).
+    """
+    document = user_documents.get(user_id)
+    if document is None:
+        return None
+
+    _ensure_base_snapshot(recorder, document.text)
+    edit = document.apply_delta(start, removed, text)
+    if recorder is not None:
+        recorder.record(edit.start, edit.removed, edit.inserted, document.text)
+    if is_paste_edit(edit):
+        logger.info("Paste detected for user_id=%s", user_id)
+        _record_paste(user_id, edit)
+
+    user_code_cache[user_id]["code"] = document.text
+    return user_code_cache[user_id]["paste"]
+
+def mark_paste(user_id) -> None:
+    if user_id in user_code_cache:
+        user_code_cache[user_id]["paste"] = True
 
-    # Detect structural paste (brackets, quotes, spaces, symbols)
-    structured_pattern = r'.*[A-Za-z0-9]*[,\ /<"\s].*'
-    looks_structured = bool(re.match(structured_pattern, newly_added_code))
-    
-    print("Heuristic paste detection result:", looks_structured)
-    return looks_structured
+def clear_user_state(user_id) -> None:
+    user_code_cache.pop(user_id, None)
+    user_documents.pop(user_id, None)
+    user_assignments.pop(user_id, None)
+    paste_indexed_users.discard(user_id)
 
 # ======================
 # Routes
@@ -126,29 +207,11 @@ async def track_keystroke(event: KeystrokeEvent, token_data: dict = Depends(logi
     Receives keystroke data from the frontend.
     Detects backend pastes and logs them.
     """
-    user_id = token_data["user_id"]
-    reports = read_reports()
-    now = datetime.utcnow()
-    user_key = f"user_{user_id}"
-
-    if user_id not in user_code_cache:
-        if event.language == "javascript":
-            user_code_cache[user_id] = {"code": "// Write your solution here\nconsole.log('Hello, world!');", "paste": False}
-        elif event.language == "python":
-            user_code_cache[user_id] = {"code": "# Write your solution here\nprint('Hello, world!')", "paste": False}
-    
-    if event.action == "paste":
-        user_code_cache[user_id]["code"] = event.code
-        user_code_cache[user_id]["paste"] = True
-    else:
-        isPaste = detect_paste_heuristically(user_code_cache[user_id]["code"], event.code)
-        user_code_cache[user_id]["code"] = event.code
-
-        if isPaste:
-            print("Paste detected")
-            user_code_cache[user_id]["code"] = event.code
-            user_code_cache[user_id]["paste"] = True
-    
+    assignment_id = await validated_assignment_id(event.assignment_id)
+    record_keystroke(
+        token_data["user_id"], event.action, event.code, event.language, assignment_id,
+        role=token_data.get("role"),
+    )
     return {"status": "ok"}
 
 @router.get("/keystroke/report")
@@ -180,8 +243,7 @@ async def clear_user_keystroke(request: Request):
         if not user_id:
             raise HTTPException(status_code=400, detail="Invalid token")
 
-        if user_id in user_code_cache:
-            del user_code_cache[user_id]
+        clear_user_state(user_id)
         return {"message": f"Cleared keystrokes for user {user_id}"}
 
     except Exception as e:
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update
 from pydantic import BaseModel
 from typing import Optional
+import logging
+import time
 
 from database import async_session
 from models import User
-from auth import verify_password, create_access_token
+from auth import verify_and_update_password, create_access_token
+from auth.auth import login_stats
+
+logger = logging.getLogger("routers.login")
 
 router = APIRouter(
     prefix="/login",
@@ -32,47 +38,69 @@ class TokenResponse(BaseModel):
 # --------------------------
 @router.post("/", response_model=TokenResponse)
 async def login_user(login_data: LoginRequest):
+    started = time.perf_counter()
+    try:
+        return await _login(login_data)
+    finally:
+        login_stats.observe(time.perf_counter() - started)
+
+
+async def _login(login_data: LoginRequest):
     # Always create a new session per request
     async with async_session() as session:
-        # Use transaction context to ensure connection stays alive
-        async with session.begin():
-            # Fetch user by username
-            result = await session.execute(
-                select(User).where(User.username == login_data.username)
+        # Fetch user by username
+        result = await session.execute(
+            select(User.user_id, User.password, User.role).where(User.username == login_data.username)
+        )
+        user = result.one_or_none()
+        # End the read transaction before hashing, so no connection is held during bcrypt
+        await session.commit()
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid username or password"
             )
-            user = result.scalar_one_or_none()
 
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid username or password"
-                )
+        # Verify password in the hashing pool (off the event loop)
+        valid, new_hash = await verify_and_update_password(login_data.password, user.password)
+        if not valid:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid username or password"
+            )
 
-            # Verify password
-            if not verify_password(login_data.password, user.password):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid username or password"
+        # Rehash made with an outdated cost factor; skipped if the password changed meanwhile
+        if new_hash:
+            try:
+                await session.execute(
+                    update(User)
+                    .where(User.user_id == user.user_id, User.password == user.password)
+                    .values(password=new_hash)
                 )
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                logger.exception("Password rehash failed for user %s", user.user_id)
 
-            # Create JWT token with user_id and role (default 'user')
-            role = getattr(user, "role", "user")
-            access_token = create_access_token(
-                data={"user_id": user.user_id, "role": role}
-            )
+        # Create JWT token with user_id and role (default 'user')
+        role = user.role or "user"
+        access_token = create_access_token(
+            data={"user_id": user.user_id, "role": role}
+        )
 
-            # Decide redirect URL based on role (frontend will perform the navigation)
-            redirect_url = None
-            if role == "admin":
-                redirect_url = "http://localhost:3000/Dashboard"
-            elif role == "student":
-                redirect_url = "http://localhost:3000/StudentDashboard"
-            elif role == "instructor":
-                redirect_url = "http://localhost:3000/UniversityDashboard"
+        # Decide redirect URL based on role (frontend will perform the navigation)
+        redirect_url = None
+        if role == "admin":
+            redirect_url = "http://localhost:3000/Dashboard"
+        elif role == "student":
+            redirect_url = "http://localhost:3000/StudentDashboard"
+        elif role == "instructor":
+            redirect_url = "http://localhost:3000/UniversityDashboard"
 
-            return {
-                "access_token": access_token,
-                "token_type": "bearer",
-                "role": role,
-                "redirect_url": redirect_url,
-            }
\ No newline at end of file
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "role": role,
+            "redirect_url": redirect_url,
+        }
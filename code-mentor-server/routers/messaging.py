@@ -1,13 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import async_session
 from models import Conversation
 from pydantic import BaseModel
-from typing import List
-from sqlalchemy import text
+from typing import List, Optional
 from models import Instructor, Student,Conversation
 from auth.auth import verify_token
+from services.messaging import DEFAULT_HISTORY_PAGE, append_message, create_conversation, inbox, message_page
+from services.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from datetime import datetime
 from fastapi import HTTPException
 
@@ -24,25 +25,23 @@ class ConversationOut(BaseModel):
     class Config:
         orm_mode = True
 
-from datetime import datetime
 @router.get("/conversations", response_model=List[ConversationOut])
 async def get_conversations(token: str = Depends(verify_token)):
     user_id = token["user_id"]  # Extract user_id from token
     async with async_session() as session:
-        result = await session.execute(
-            select(Conversation).where(
-                text("conversation.participants @> :user_id")
-            ).params(user_id=f'[{{"user_id": {user_id}}}]')
-        )
-        conversations = result.scalars().all()
+        # Conversations through the participant index, each with its latest message
+        rows = await inbox(session, user_id)
 
-        # Convert `created_at` to string for each conversation
         formatted_conversations = [
             {
-                **conversation.__dict__,
-                "created_at": conversation.created_at.isoformat()  # Convert datetime to ISO format string
+                "conversation_id": row["conversation"].conversation_id,
+                "name": row["conversation"].name,
+                "is_group": row["conversation"].is_group,
+                "created_at": row["conversation"].created_at.isoformat(),  # Convert datetime to ISO format string
+                "participants": row["conversation"].participants,
+                "messages": row["messages"],
             }
-            for conversation in conversations
+            for row in rows
         ]
         return formatted_conversations
 class MessageIn(BaseModel):
@@ -63,25 +62,8 @@ async def add_message(
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
         
-        # Create a new message
-        new_message = {
-            "message_id": len(conversation.messages) + 1,  # Increment message ID
-            "sender_id": sender_id,
-            "text": message_data["text"],
-            "sent_at": datetime.utcnow().isoformat()  # Use ISO format for timestamps
-        }
-
-        # Append the new message to the conversation's messages
-        if not conversation.messages:
-            conversation.messages = []  # Initialize messages as an empty list if it's None
-        conversation.messages.append(new_message)
-
-        # Save the updated conversation
-        session.add(conversation)
-        await session.commit()
-        await session.refresh(conversation)
-
-        return new_message
+        # Appending is a single INSERT into the message table
+        return await append_message(session, conversation_id, sender_id, message_data["text"])
 
 @router.get("/users", response_model=List[dict])
 async def get_users():
@@ -105,47 +87,47 @@ async def get_users():
         return users
     
 @router.post("/conversations")
-async def create_conversation(
+async def create_new_conversation(
     conversation_data: dict,
     token: dict = Depends(verify_token)
 ):
     user_id = token["user_id"]  # Extract user_id from token
     async with async_session() as session:
-        new_conversation = Conversation(
+        new_conversation = await create_conversation(
+            session,
             name=conversation_data["name"],
-            participants=[{"user_id": user_id}, *conversation_data["participants"]],
+            participant_ids=[user_id, *(p["user_id"] for p in conversation_data["participants"])],
             created_at=datetime.utcnow(),
-            messages=[]
         )
-        session.add(new_conversation)
-        await session.commit()
-        await session.refresh(new_conversation)
-        return new_conversation
+        return {
+            "conversation_id": new_conversation.conversation_id,
+            "name": new_conversation.name,
+            "is_group": new_conversation.is_group,
+            "created_at": new_conversation.created_at.isoformat(),
+            "participants": new_conversation.participants,
+            "messages": [],
+        }
 
 @router.get("/conversations/{conversation_id}/messages", response_model=List[dict])
-async def get_messages(conversation_id: int):
-    async with async_session() as session:
-        conversation = await session.get(Conversation, conversation_id)
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
-        
-        # Ensure messages is always an array
-        return conversation.messages if conversation.messages else []
-    
-@router.get("/conversations/{conversation_id}/messages", response_model=List[dict])
-async def get_messages(conversation_id: int):
+async def get_messages(
+    conversation_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_HISTORY_PAGE, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    The latest page of messages, oldest first. The cursor for older
+    messages is returned in the X-Next-Cursor header.
+    """
     async with async_session() as session:
         conversation = await session.get(Conversation, conversation_id)
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
-        
-        # Ensure messages is always an array and convert `sent_at` to string
-        formatted_messages = [
-            {
-                **message,
-                "sent_at": message["sent_at"] if isinstance(message["sent_at"], str) else message["sent_at"].isoformat()
-            }
-            for message in (conversation.messages or [])
-        ]
-        return formatted_messages
 
+        try:
+            messages, older = await message_page(session, conversation_id, cursor, limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if older:
+            response.headers[NEXT_CURSOR_HEADER] = older
+        return messages
@@ -0,0 +1,22 @@
+import hmac
+import os
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from database import pool_wait_stats
+from services.instrumentation import render_prometheus
+
+router = APIRouter(tags=["metrics"])
+
+# Scrapers authenticate with a static bearer token when METRICS_TOKEN is set
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(request: Request):
+    """Request latency, DB, LLM and subprocess metrics in the Prometheus text format."""
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_prometheus(pool_wait_stats), media_type="text/plain; version=0.0.4")
@@ -8,12 +8,15 @@ from database import async_session
 from models.plan import Plan
 from models.subscription import Subscription
 from models.university import University
+from services.plan_catalogue import plan_catalogue, plan_to_dict
+from services.response_cache import PLANS, CachedRoute, cached_response
 from pydantic import Field
 from datetime import datetime
 
 router = APIRouter(
     prefix="/packages",
-    tags=["packages"]
+    tags=["packages"],
+    route_class=CachedRoute
 )
 
 
@@ -84,28 +87,38 @@ class ConfirmIn(BaseModel):
 
 
 @router.get("/", response_model=List[PlanOut])
+@cached_response(ttl=300, tags=[PLANS])
 async def list_plans():
     async with async_session() as session:
-        result = await session.execute(select(Plan))
-        plans = result.scalars().all()
-        return [PlanOut(
-            plan_key=p.plan_key,
-            name=p.name,
-            description=p.description,
-            monthly_price=p.monthly_price,
-            yearly_price=p.yearly_price,
-            instructors=p.instructors,
-            students=p.students,
-            storage=p.storage
-        ) for p in plans]
+        plans = await plan_catalogue.all(session)
+        return [PlanOut(**p) for p in plans]
+
+
+def _plan_detail(plan) -> Optional[PlanDetail]:
+    """PlanDetail from a catalogue dict or a Plan row (None when missing)."""
+    if plan is None:
+        return None
+    if isinstance(plan, Plan):
+        plan = plan_to_dict(plan)
+    return PlanDetail(**plan)
+
+
+def _subscription_out(sub: Subscription) -> SubscriptionOut:
+    return SubscriptionOut(
+        subscription_id=sub.subscription_id,
+        uni_id=sub.uni_id,
+        plan=_plan_detail(sub.plan),
+        billing_cycle=sub.billing_cycle,
+        status=sub.status,
+        created_at=sub.created_at
+    )
 
 
 @router.post("/subscribe")
 async def subscribe(payload: SubscribeIn):
     async with async_session() as session:
         # Basic validation: does plan exist?
-        result = await session.execute(select(Plan).where(Plan.plan_key == payload.plan_key))
-        plan = result.scalar_one_or_none()
+        plan = await plan_catalogue.get(session, payload.plan_key)
         if not plan:
             raise HTTPException(status_code=404, detail="Plan not found")
 
@@ -131,22 +144,10 @@ async def subscribe(payload: SubscribeIn):
             raise HTTPException(status_code=500, detail=str(e))
 
         # Build response with plan detail
-        plan_detail = PlanDetail(
-            plan_key=plan.plan_key,
-            name=plan.name,
-            description=plan.description,
-            monthly_price=plan.monthly_price,
-            yearly_price=plan.yearly_price,
-            instructors=plan.instructors,
-            students=plan.students,
-            storage=plan.storage,
-            features=plan.features
-        )
-
         return SubscriptionOut(
             subscription_id=sub.subscription_id,
             uni_id=sub.uni_id,
-            plan=plan_detail,
+            plan=_plan_detail(plan),
             billing_cycle=sub.billing_cycle,
             status=sub.status,
             created_at=sub.created_at
@@ -156,67 +157,24 @@ async def subscribe(payload: SubscribeIn):
 @router.get("/subscription/{subscription_id}", response_model=SubscriptionOut)
 async def get_subscription(subscription_id: int):
     async with async_session() as session:
-        # get subscription
+        # get subscription (its plan is joined into the same query)
         result = await session.execute(select(Subscription).where(Subscription.subscription_id == subscription_id))
         sub = result.scalar_one_or_none()
         if not sub:
             raise HTTPException(status_code=404, detail="Subscription not found")
-
-        # get plan
-        plan_res = await session.execute(select(Plan).where(Plan.plan_key == sub.plan_key))
-        plan = plan_res.scalar_one_or_none()
-
-        plan_detail = PlanDetail(
-            plan_key=plan.plan_key,
-            name=plan.name,
-            description=plan.description,
-            monthly_price=plan.monthly_price,
-            yearly_price=plan.yearly_price,
-            instructors=plan.instructors,
-            students=plan.students,
-            storage=plan.storage,
-            features=plan.features
-        ) if plan else None
-
-        return SubscriptionOut(
-            subscription_id=sub.subscription_id,
-            uni_id=sub.uni_id,
-            plan=plan_detail,
-            billing_cycle=sub.billing_cycle,
-            status=sub.status,
-            created_at=sub.created_at
-        )
+        return _subscription_out(sub)
 
 
 @router.get('/uni/{uni_id}/subscriptions', response_model=List[SubscriptionOut])
 async def list_subscriptions_for_uni(uni_id: int):
     async with async_session() as session:
-        result = await session.execute(select(Subscription).where(Subscription.uni_id == uni_id))
-        subs = result.scalars().all()
-        out = []
-        for sub in subs:
-            plan_res = await session.execute(select(Plan).where(Plan.plan_key == sub.plan_key))
-            plan = plan_res.scalar_one_or_none()
-            plan_detail = PlanDetail(
-                plan_key=plan.plan_key,
-                name=plan.name,
-                description=plan.description,
-                monthly_price=plan.monthly_price,
-                yearly_price=plan.yearly_price,
-                instructors=plan.instructors,
-                students=plan.students,
-                storage=plan.storage,
-                features=plan.features
-            ) if plan else None
-            out.append(SubscriptionOut(
-                subscription_id=sub.subscription_id,
-                uni_id=sub.uni_id,
-                plan=plan_detail,
-                billing_cycle=sub.billing_cycle,
-                status=sub.status,
-                created_at=sub.created_at
-            ))
-        return out
+        # One query: subscriptions LEFT JOIN plan
+        result = await session.execute(
+            select(Subscription)
+            .where(Subscription.uni_id == uni_id)
+            .order_by(Subscription.created_at, Subscription.subscription_id)
+        )
+        return [_subscription_out(sub) for sub in result.scalars().all()]
 
 
 class PaymentMethodOut(BaseModel):
@@ -388,12 +346,11 @@ async def confirm_subscription(subscription_id: int, payload: ConfirmIn | None =
             session.add(sub)
 
             # Create a simulated payment transaction record (amount from plan)
-            # fetch plan for price
-            plan_res = await session.execute(select(Plan).where(Plan.plan_key == sub.plan_key))
-            plan = plan_res.scalar_one_or_none()
+            # plan price from the catalogue cache
+            plan = await plan_catalogue.get(session, sub.plan_key)
             amount = 0
             if plan:
-                amount = plan.monthly_price if sub.billing_cycle == 'monthly' else plan.yearly_price
+                amount = plan['monthly_price'] if sub.billing_cycle == 'monthly' else plan['yearly_price']
 
             insert_tx = text(
                 """
@@ -423,17 +380,7 @@ async def confirm_subscription(subscription_id: int, payload: ConfirmIn | None =
             raise HTTPException(status_code=500, detail=str(e))
 
         # Build plan detail for response
-        plan_detail = PlanDetail(
-            plan_key=plan.plan_key,
-            name=plan.name,
-            description=plan.description,
-            monthly_price=plan.monthly_price,
-            yearly_price=plan.yearly_price,
-            instructors=plan.instructors,
-            students=plan.students,
-            storage=plan.storage,
-            features=getattr(plan, 'features', None)
-        ) if plan else None
+        plan_detail = _plan_detail(plan)
 
         # Return subscription info and whether this is the first active subscription for this university
         return {
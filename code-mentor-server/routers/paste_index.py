@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from typing import Optional
+
+from auth.dependencies import role_required
+from services.paste_index import paste_index
+
+router = APIRouter(
+    prefix="/paste-index",
+    tags=["paste index"]
+)
+
+# --------------------------
+# Endpoints (instructors / admins)
+# --------------------------
+
+@router.get("/hash/{text_hash}", dependencies=[Depends(role_required(["admin", "instructor"]))])
+async def get_pastes_by_hash(text_hash: str):
+    """All recorded pastes with this SHA-256 text hash."""
+    occurrences = paste_index.by_hash(text_hash)
+    return {
+        "textHash": text_hash,
+        "students": sorted({o.student_id for o in occurrences}),
+        "occurrences": [o.to_dict() for o in occurrences],
+    }
+
+@router.get("/shared", dependencies=[Depends(role_required(["admin", "instructor"]))])
+async def get_shared_pastes(assignment_id: Optional[int] = None):
+    """Identical pastes that were made by more than one student."""
+    return {"groups": paste_index.shared(assignment_id)}
+
+@router.get("/student/{student_id}", dependencies=[Depends(role_required(["admin", "instructor"]))])
+async def get_student_paste_matches(student_id: int, assignment_id: Optional[int] = None):
+    """A student's pastes with identical and near-identical pastes by other students."""
+    return {"studentId": student_id, "pastes": paste_index.for_student(student_id, assignment_id)}
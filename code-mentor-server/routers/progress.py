@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import async_session
-from models import ProgressReport
+from models import ProgressReport, Student
 from auth.dependencies import role_required
+from services.topic_mastery import class_averages, completed_counts, weekly_completions
 
 router = APIRouter(prefix="/progress", tags=["Progress"])
 
@@ -28,30 +29,48 @@ async def get_progress(
         if not report:
             raise HTTPException(status_code=404, detail="Progress report not found")
 
-        # Extract stored content (JSON)
+        # Extract stored content (JSON): concept names and topic lists
         content = report.content or {}
         concepts = content.get("concepts", [])
         strengths = content.get("strengths", [])
         improvements = content.get("improvements", [])
 
+        # Completion comes from student_topic_mastery; class averages are
+        # an aggregate over the student's batch (cached per batch)
+        completed = await completed_counts(session, student_id)
+        batch_id = await session.scalar(select(Student.batch_id).where(Student.student_id == student_id))
+        averages = await class_averages.get(session, batch_id) if batch_id is not None else {}
+
         performance = []
+        total_topics = 0
         for c in concepts:
             name = c.get("name", "Unknown Concept")
-            topic_count = c.get("topic_count", 0)
-            completed = c.get("completed_count", 0)
+            topic_count = len(c.get("topics", [])) or c.get("topic_count", 0)
+            total_topics += topic_count
 
-            score = round((completed / topic_count) * 100, 2) if topic_count else 0
+            score = round((completed.get(c.get("id"), 0) / topic_count) * 100, 2) if topic_count else 0
 
             performance.append({
                 "name": name,
                 "score": score,
-                "avg": 70  # Optional: placeholder for class average
+                "avg": averages.get(c.get("id"), 0)
             })
 
-        progress_over_time = [
-            {"week": f"Week {i+1}", "score": min(100, 50 + i * 5)}
-            for i in range(6)
-        ]
+        # Cumulative share of all topics completed, by week of completion.
+        # "week" stays the chart label (Week 1 = first week with a completion);
+        # week_start is the Monday that week begins on.
+        progress_over_time = []
+        done = 0
+        first_week = None
+        for week, count in await weekly_completions(session, student_id):
+            done += count
+            week_start = week.date()
+            first_week = first_week or week_start
+            progress_over_time.append({
+                "week": f"Week {(week_start - first_week).days // 7 + 1}",
+                "week_start": week_start.isoformat(),
+                "score": min(100, round(done / total_topics * 100, 2)) if total_topics else 0
+            })
 
         needs_practice = [
             {"id": i, "name": imp, "score": 40}
@@ -70,7 +89,7 @@ async def get_progress(
                 "difficulty": "Medium"
             }
             for c in concepts
-            if c.get("completed_count", 0) < 2
+            if completed.get(c.get("id"), 0) < 2
         ]
 
         return {
@@ -80,4 +99,4 @@ async def get_progress(
             "needs_practice": needs_practice,
             "mastered": mastered,
             "new_concepts": new_concepts
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,92 @@
+# routers/registry.py
+"""
+Router registration and a route table audit.
+
+Routers are added to a RouterRegistry instead of a plain list, so mounting
+the same router twice fails at import time rather than silently doubling
+its routes. audit_routes() runs once the app is assembled and reports
+routes that can never be reached: exact duplicates (same method and path)
+and routes shadowed by an earlier, more general path. Starlette matches
+routes in order, so every unreachable route is also extra matching work
+for the requests that fall through to later routes.
+"""
+import logging
+import os
+from typing import Dict, List
+
+from fastapi import APIRouter
+from starlette.routing import Route
+
+logger = logging.getLogger("routers.registry")
+
+
+class DuplicateRouterError(ValueError):
+    pass
+
+
+class RouterRegistry:
+    def __init__(self):
+        self._routers: List[APIRouter] = []
+        self._ids = set()
+
+    def add(self, router: APIRouter) -> APIRouter:
+        """Registers a router; raises DuplicateRouterError when it is already registered."""
+        if id(router) in self._ids:
+            paths = sorted({route.path for route in router.routes})[:3]
+            raise DuplicateRouterError(f"Router already registered (routes {', '.join(paths)}, ...)")
+        self._ids.add(id(router))
+        self._routers.append(router)
+        return router
+
+    @property
+    def routers(self) -> List[APIRouter]:
+        return list(self._routers)
+
+    def include_all(self, app) -> None:
+        for router in self._routers:
+            app.include_router(router)
+
+
+# -------------------------
+# Route table audit
+# -------------------------
+def _describe(route: Route) -> str:
+    endpoint = getattr(route, "endpoint", None)
+    where = f"{endpoint.__module__}.{endpoint.__name__}" if endpoint is not None else "?"
+    return f"{','.join(sorted(route.methods or ()))} {route.path} ({where})"
+
+
+def audit_routes(app) -> Dict[str, list]:
+    """
+    {"duplicates": [...], "shadowed": [...]} for the HTTP routes of the app.
+    A later route is shadowed when an earlier route with a common method
+    matches its path template, i.e. the earlier route takes its requests.
+    """
+    routes = [route for route in app.router.routes if isinstance(route, Route)]
+    duplicates, shadowed = [], []
+    for position, later in enumerate(routes):
+        for earlier in routes[:position]:
+            common = (earlier.methods or set()) & (later.methods or set()) - {"HEAD"}
+            if not common:
+                continue
+            if earlier.path == later.path:
+                duplicates.append({"route": _describe(later), "by": _describe(earlier)})
+                break
+            if earlier.path_regex.match(later.path):
+                shadowed.append({"route": _describe(later), "by": _describe(earlier)})
+                break
+    return {"duplicates": duplicates, "shadowed": shadowed}
+
+
+def check_routes(app) -> Dict[str, list]:
+    """
+    Logs the audit at startup. With ROUTE_AUDIT_STRICT=1 an unreachable
+    route is a startup error instead of a warning.
+    """
+    report = audit_routes(app)
+    for kind in ("duplicates", "shadowed"):
+        for entry in report[kind]:
+            logger.warning("Unreachable route (%s): %s, matched first by %s", kind, entry["route"], entry["by"])
+    if os.getenv("ROUTE_AUDIT_STRICT") == "1" and (report["duplicates"] or report["shadowed"]):
+        raise RuntimeError(f"Route audit failed: {len(report['duplicates'])} duplicate, {len(report['shadowed'])} shadowed routes")
+    return report
@@ -2,27 +2,27 @@ from fastapi import APIRouter, HTTPException, Depends, Request, Query, Backgroun
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm.attributes import flag_modified
 from database import async_session
 import traceback
 import asyncio
+import contextvars
 
 from typing import Any, Dict, List
 import json
-import os
 import re
 import logging
 from auth.dependencies import role_required
-from groq import Groq
 from models.assignment import Assignment
 from models.conceptual_map import ConceptualMap
 from models.topic_map import TopicMap
-from models.student import Student
 from models.progress_report import ProgressReport
 from models.submission import Submission
-from sqlalchemy.orm.attributes import flag_modified
-
-# Import Gemini client
-from google import genai
+from services.report_fanout import get_job, start_concept_fanout
+from services.response_cache import CONCEPTS, SUBMISSIONS, invalidate_tags
+from services.submission_artifacts import AI_EVALUATION, CODE, load_report, put_artifacts
+from services.topic_mastery import record_mastery
+from services.llm import lazy_client
 
 router = APIRouter(
     prefix="/report",
@@ -52,30 +52,9 @@ class ConceptCreate(BaseModel):
     concept: str
     description: str
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-gemini_client = genai.Client(api_key="")
-
-async def update_all_student_reports(batch_id: int, concept: dict):
-    async with async_session() as session:
-        # Get all progress reports of students in this batch
-        subq = select(Student.student_id).where(Student.batch_id == batch_id).subquery()
-        progress_result = await session.execute(
-            select(ProgressReport).where(ProgressReport.student_id.in_(subq))
-        )
-        progress_reports = progress_result.scalars().all()
-
-        if "topics" in concept and isinstance(concept["topics"], list):
-            for topic in concept["topics"]:
-                topic["completed"] = False
-
-        for progress_report in progress_reports:
-            report = progress_report.content or {}  # Get existing JSON
-            concepts = report.get("concepts", [])
-            concepts.append(concept)  # Add new concept
-            report["concepts"] = concepts  # Save updated list
-            progress_report.content = report  # Assign back to ORM object
-
-        await session.commit()
+# LLM clients (SDKs loaded on first use)
+groq_client = lazy_client("groq")
+gemini_client = lazy_client("gemini")
 
 async def update_student_report_with_submission(submission_id: int):
     async with async_session() as session:
@@ -97,48 +76,35 @@ async def update_student_report_with_submission(submission_id: int):
         if not progress_report:
             raise HTTPException(status_code=404, detail="Progress report not found")
         
-        # Get the topic map by assignment ID
-        topic_result = await session.execute(
-            select(TopicMap).where(TopicMap.assignment_id == submission.assignment_id)
+        # Mark the assignment's topics in student_topic_mastery; only the
+        # topics completed by this submission come back
+        new_topics = await record_mastery(
+            session, submission.student_id, submission.assignment_id, submission.submitted_at
         )
-        topic_map = topic_result.scalar_one_or_none()
+        completed_by_concept: Dict[int, set] = {}
+        for concept_id, topic_id in new_topics:
+            completed_by_concept.setdefault(concept_id, set()).add(topic_id)
 
-        if not topic_map:
-            raise HTTPException(status_code=404, detail="Topic map not found")
-        
+        # Keep the counters in the JSON report in step
         report_data = progress_report.content or {}
-        concepts = report_data.get("concepts", [])
-        topic_data = topic_map.content or {}
+        report_data.setdefault("assignment_scores", [])
 
-        topic_data = {int(k): [int(v) for v in vals] for k, vals in topic_data.items()}
-
-        if "assignment_scores" not in report_data:
-            report_data["assignment_scores"] = []
-        
-        assignment_score = {
-            "assignment_id": submission.assignment_id,
-            "concept_scores": []
-        }
-
-        for concept in concepts:
-            new_topics = 0
-            if concept["id"] in topic_data:
-                for topic in concept.get("topics"):
-                    if topic["id"] in topic_data[concept["id"]]:
-                        if topic["completed"] == False:
-                            topic["completed"] = True
-                            new_topics += 1
-            
+        for concept in report_data.get("concepts", []):
             if "topic_count" not in concept:
                 concept["topic_count"] = len(concept.get("topics", []))
-            
             if "completed_count" not in concept:
                 concept["completed_count"] = 0
-            
-            concept["completed_count"] += new_topics
-        
-        report_data["concepts"] = concepts
+
+            completed = completed_by_concept.get(concept.get("id"))
+            if not completed:
+                continue
+            for topic in concept.get("topics", []):
+                if topic.get("id") in completed and not topic.get("completed"):
+                    topic["completed"] = True
+                    concept["completed_count"] += 1
+
         progress_report.content = report_data
+        flag_modified(progress_report, "content")
 
         await session.commit()
 
@@ -324,6 +290,7 @@ async def create_or_update_conceptual_map(
 
             session.add(new_map)
             await session.commit()
+            await invalidate_tags(CONCEPTS)
         
         except Exception as e:
             logger.error(f"Error creating/updating conceptual map: {str(e)}")
@@ -335,7 +302,8 @@ async def update_progress_report(
     submission_id: int = Query(..., description="ID of the submission"),
     token_data: dict = Depends(role_required(["student"]))
 ):
-    asyncio.create_task(update_student_report_with_submission(submission_id))
+    # Fresh context: the update outlives the request and its query scope
+    asyncio.create_task(update_student_report_with_submission(submission_id), context=contextvars.Context())
 
 # Creating new concept
 @router.post("/concept", summary="Create new concept")
@@ -405,19 +373,32 @@ async def create_or_update_progress_report(
             concepts.append(concept_json)
             concept_map.content["concepts"] = concepts
             await session.commit()
+            await invalidate_tags(CONCEPTS)
 
-            asyncio.create_task(update_all_student_reports(data.batch_id, concept_json))
+            job = start_concept_fanout(data.batch_id, concept_json)
 
             return {
                 "concept": concept_json["name"],
                 "description": concept_json["description"],
-                "topics": topics
+                "topics": topics,
+                "job_id": job.job_id
             }
         except Exception as e:
             print("❌ Error generating topics:", e)
             traceback.print_exc()
             raise HTTPException(status_code=500, detail=str(e))
 
+# Progress of the report fan-out started by POST /concept
+@router.get("/concept/jobs/{job_id}", summary="Concept fan-out progress")
+async def get_concept_job(
+    job_id: str,
+    token_data: dict = Depends(role_required(["instructor"]))
+):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 # AI evaluation
 @router.post("/ai-evaluation", summary="Evaluate submissions")
 async def create_or_update_progress_report(
@@ -434,8 +415,8 @@ async def create_or_update_progress_report(
         if not submission:
             raise HTTPException(status_code=404, detail="Submission not found")
         
-        report = submission.report or {} 
-        if "ai-evaluation" in report:
+        report = await load_report(session, submission.submission_id, [CODE, AI_EVALUATION])
+        if AI_EVALUATION in report:
             raise HTTPException(status_code=400, detail="AI evaluation allready exist for this submission.")
 
         # Get the assignment by ID
@@ -466,7 +447,7 @@ async def create_or_update_progress_report(
         ### Student Code Submission
         Here is the student's submitted code (written by the student, not the AI):
 
-        {report["code"]}
+        {report.get(CODE, "")}
 
         ---
 
@@ -542,10 +523,11 @@ async def create_or_update_progress_report(
             except json.JSONDecodeError:
                 raise HTTPException(status_code=500, detail=f"Invalid JSON from Gemini: {response_text}")
             
-            report["ai-evaluation"] = evaluation_json.get("evaluation")
-            flag_modified(submission, "report")
-            submission.report = report
+            # Only the ai-evaluation row is written; the code is not touched
+            await put_artifacts(session, submission.submission_id, {AI_EVALUATION: evaluation_json.get("evaluation")})
             await session.commit()
+            # The trigger may have changed submission.status (AI evaluation fallback)
+            await invalidate_tags(SUBMISSIONS)
         except Exception as e:
             print("❌ Error evaluating submission:", e)
             traceback.print_exc()
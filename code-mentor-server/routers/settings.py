@@ -3,11 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import async_session
 from models import User, Instructor
-from auth.auth import verify_token
-from passlib.context import CryptContext
+from auth.auth import verify_token, hash_password_async
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 @router.get("/settings/profile")
 async def get_profile(token: dict = Depends(verify_token)):
@@ -81,7 +79,7 @@ async def update_account(
         if not new_password or len(new_password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters long")
         
-        hashed_password = pwd_context.hash(new_password)
+        hashed_password = await hash_password_async(new_password)
         user.password = hashed_password
 
         session.add(user)
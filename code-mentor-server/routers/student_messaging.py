@@ -1,5 +1,5 @@
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import async_session
@@ -7,8 +7,17 @@ from models import Conversation, Instructor, Student
 from datetime import datetime
 from sqlalchemy import text
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from auth.auth import verify_token
+from services.messaging import (
+    DEFAULT_HISTORY_PAGE,
+    append_message,
+    create_conversation,
+    find_conversation_between,
+    inbox,
+    message_page,
+)
+from services.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
@@ -35,46 +44,20 @@ async def get_student_conversations(token: dict = Depends(verify_token)):
     logging.info(f"Fetching conversations for student user_id: {user_id}")
     
     async with async_session() as session:
-        # Get all conversations
-        result = await session.execute(select(Conversation))
-        all_conversations = result.scalars().all()
-        
-        # Filter conversations where the student is a participant
-        student_conversations = []
-        for conversation in all_conversations:
-            # Check if user_id exists in participants
-            participant_ids = [participant["user_id"] for participant in conversation.participants]
-            if user_id in participant_ids:
-                student_conversations.append(conversation)
-        
-        # Format the response
-        formatted_conversations = []
-        for conversation in student_conversations:
-            # Get instructor name for conversation display
-            instructor_id = None
-            for participant in conversation.participants:
-                if participant["user_id"] != user_id:  # Find the other participant (instructor)
-                    instructor_id = participant["user_id"]
-                    break
-            
-            instructor_name = "Instructor"
-            if instructor_id:
-                # Fetch instructor details
-                instructor_result = await session.execute(
-                    select(Instructor).where(Instructor.instructor_id == instructor_id)
-                )
-                instructor = instructor_result.scalar_one_or_none()
-                if instructor:
-                    instructor_name = instructor.instructor_name
-            
-            formatted_conversations.append({
-                "conversation_id": conversation.conversation_id,
-                "name": instructor_name,  # Use instructor name as conversation name
-                "is_group": conversation.is_group,
-                "created_at": conversation.created_at.isoformat(),
-                "participants": conversation.participants,
-                "messages": conversation.messages or []
-            })
+        # Membership, instructor name and latest message in one indexed query
+        rows = await inbox(session, user_id, Instructor.instructor_id, Instructor.instructor_name)
+
+        formatted_conversations = [
+            {
+                "conversation_id": row["conversation"].conversation_id,
+                "name": row["counterpart_name"] or "Instructor",  # Use instructor name as conversation name
+                "is_group": row["conversation"].is_group,
+                "created_at": row["conversation"].created_at.isoformat(),
+                "participants": row["conversation"].participants,
+                "messages": row["messages"],
+            }
+            for row in rows
+        ]
         
         logging.info(f"Found {len(formatted_conversations)} conversations for student {user_id}")
         return formatted_conversations
@@ -97,30 +80,21 @@ async def add_student_message(conversation_id: int, message_data: MessageIn, tok
             logging.warning(f"Student {sender_id} is not a participant in conversation {conversation_id}")
             raise HTTPException(status_code=403, detail="Not authorized to send messages in this conversation")
         
-        # Create new message
-        new_message = {
-            "message_id": len(conversation.messages) + 1 if conversation.messages else 1,
-            "sender_id": sender_id,
-            "text": message_data.text,
-            "sent_at": datetime.utcnow().isoformat()
-        }
-
-        # Initialize messages array if None
-        if conversation.messages is None:
-            conversation.messages = []
-        
-        conversation.messages.append(new_message)
-        
-        # Update conversation
-        session.add(conversation)
-        await session.commit()
-        await session.refresh(conversation)
+        # Appending is a single INSERT into the message table
+        new_message = await append_message(session, conversation_id, sender_id, message_data.text)
 
         logging.info(f"Message added successfully to conversation {conversation_id}")
         return new_message
 
 @router.get("/student/conversations/{conversation_id}/messages", response_model=List[dict])
-async def get_student_messages(conversation_id: int, token: dict = Depends(verify_token)):
+async def get_student_messages(
+    conversation_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_HISTORY_PAGE, ge=1, le=MAX_PAGE_SIZE),
+    token: dict = Depends(verify_token),
+):
+    """Latest page of messages, oldest first; older pages via the X-Next-Cursor header."""
     user_id = token["user_id"]
     logging.info(f"Student {user_id} fetching messages from conversation {conversation_id}")
     
@@ -136,21 +110,13 @@ async def get_student_messages(conversation_id: int, token: dict = Depends(verif
             logging.warning(f"Student {user_id} is not a participant in conversation {conversation_id}")
             raise HTTPException(status_code=403, detail="Not authorized to view messages in this conversation")
         
-        # Format messages
-        formatted_messages = []
-        for message in (conversation.messages or []):
-            formatted_message = {
-                "message_id": message.get("message_id"),
-                "sender_id": message.get("sender_id"),
-                "text": message.get("text"),
-                "sent_at": message.get("sent_at")
-            }
-            # Ensure sent_at is string
-            if not isinstance(formatted_message["sent_at"], str):
-                formatted_message["sent_at"] = formatted_message["sent_at"].isoformat()
-            
-            formatted_messages.append(formatted_message)
-        
+        try:
+            formatted_messages, older = await message_page(session, conversation_id, cursor, limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if older:
+            response.headers[NEXT_CURSOR_HEADER] = older
+
         logging.info(f"Found {len(formatted_messages)} messages for conversation {conversation_id}")
         return formatted_messages
 
@@ -203,38 +169,25 @@ async def create_student_conversation(conversation_data: dict, token: dict = Dep
             raise HTTPException(status_code=404, detail="Instructor not found")
         
         # Check if conversation already exists between this student and instructor
-        existing_conversations_result = await session.execute(select(Conversation))
-        existing_conversations = existing_conversations_result.scalars().all()
-        
-        for conv in existing_conversations:
-            participant_ids = [p["user_id"] for p in conv.participants]
-            if student_id in participant_ids and instructor_id in participant_ids:
-                logging.info(f"Conversation already exists: {conv.conversation_id}")
-                return {
-                    "conversation_id": conv.conversation_id,
-                    "name": conv.name,
-                    "created_at": conv.created_at.isoformat(),
-                    "participants": conv.participants
-                }
-        
-        # Create new conversation
-        participants = [
-            {"user_id": instructor_id},  # Instructor
-            {"user_id": student_id}      # Student
-        ]
+        conv = await find_conversation_between(session, student_id, instructor_id)
+        if conv:
+            logging.info(f"Conversation already exists: {conv.conversation_id}")
+            return {
+                "conversation_id": conv.conversation_id,
+                "name": conv.name,
+                "created_at": conv.created_at.isoformat(),
+                "participants": conv.participants
+            }
         
-        new_conversation = Conversation(
+        # Create new conversation (instructor first, then student)
+        new_conversation = await create_conversation(
+            session,
             name=instructor.instructor_name,  # Use instructor name as conversation name
-            participants=participants,
+            participant_ids=[instructor_id, student_id],
             is_group=False,
             created_at=datetime.utcnow(),
-            messages=[]
         )
         
-        session.add(new_conversation)
-        await session.commit()
-        await session.refresh(new_conversation)
-        
         logging.info(f"New conversation created with ID: {new_conversation.conversation_id}")
         return {
             "conversation_id": new_conversation.conversation_id,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import async_session
@@ -8,6 +8,9 @@ from typing import List, Optional
 from sqlalchemy.orm import joinedload
 from datetime import datetime,date
 from sqlalchemy.orm import selectinload
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page, split_page
+from services.submission_artifacts import load_artifacts
+from services.submission_stats import submission_filters
 
 
 router = APIRouter(
@@ -43,8 +46,11 @@ class SubmissionOut(BaseModel):
     submission_id: int
     assignment: AssignmentOut
     student: StudentOut
-    report: Optional[dict]
+    report: Optional[dict] = None
     submitted_at: Optional[datetime]  # Use datetime directly
+    status: str = "Pending"
+    score: Optional[float] = None
+    graded_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
@@ -54,15 +60,59 @@ class SubmissionOut(BaseModel):
 # --------------------------
 
 
-@router.get("/", response_model=List[SubmissionOut])
-async def get_submissions():
+@router.get("/", response_model=List[SubmissionOut], response_model_exclude_unset=True)
+async def get_submissions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    batch_id: Optional[int] = None,
+    assignment_id: Optional[int] = None,
+    instructor_id: Optional[int] = None,
+    status: Optional[str] = None,
+    include_report: bool = False,
+):
+    """
+    Paginated like GET /submission/: newest first, next page cursor in the
+    X-Next-Cursor header, report only with include_report=true.
+    """
+    query = (
+        select(Submission)
+        .options(joinedload(Submission.assignment), joinedload(Submission.student))
+        .where(*submission_filters(
+            assignment_id=assignment_id,
+            batch_id=batch_id,
+            instructor_id=instructor_id,
+            status=status,
+        ))
+    )
+    try:
+        query = keyset_page(query, Submission.submitted_at, Submission.submission_id, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
     async with async_session() as session:
-        result = await session.execute(
-            select(Submission)
-            .options(joinedload(Submission.assignment), joinedload(Submission.student))
-        )
-        submissions = result.scalars().all()
-        return submissions
+        result = await session.execute(query)
+        submissions, next_cursor = split_page(result.scalars().all(), limit, "submitted_at", "submission_id")
+        # Artifacts for the whole page in one query
+        reports = await load_artifacts(session, [s.submission_id for s in submissions]) if include_report else {}
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    out = []
+    for submission in submissions:
+        item = {
+            "submission_id": submission.submission_id,
+            "assignment": submission.assignment,
+            "student": submission.student,
+            "submitted_at": submission.submitted_at,
+            "status": submission.status,
+            "score": submission.score,
+            "graded_at": submission.graded_at,
+        }
+        if include_report:
+            item["report"] = reports[submission.submission_id]
+        out.append(item)
+    return out
 
 # Get a single submission by ID with related data
 @router.get("/{submission_id}", response_model=SubmissionOut)
@@ -73,7 +123,8 @@ async def get_submission(submission_id: int):
             .where(Submission.submission_id == submission_id)
             .options(
                 selectinload(Submission.assignment),
-                selectinload(Submission.student)
+                selectinload(Submission.student),
+                selectinload(Submission.artifacts),
             )
         )
         submission = result.scalar_one_or_none()
@@ -3,6 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from database import async_session
 from models.submission import Submission
+from services.response_cache import SUBMISSIONS, invalidate_tags
+from services.submission_artifacts import INSTRUCTOR_EVALUATION, load_report, put_artifacts
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import joinedload
@@ -27,7 +29,7 @@ class SubmissionDetail(BaseModel):
     submittedAt: str
     code: str
     status: str
-    score: Optional[int]
+    score: Optional[float]
     batch: str
     paste: bool
     output: Optional[str] = ""
@@ -59,9 +61,9 @@ async def get_submission_detail(submission_id: int, session: AsyncSession = Depe
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
-    report = submission.report or {}
-    ai_eval = report.get("ai-evaluation", {})
-    instructor_eval = report.get("instructor-evaluation", {})
+    report = await load_report(session, submission.submission_id)
+    ai_eval = report.get("ai-evaluation") or {}
+    instructor_eval = report.get("instructor-evaluation") or {}
 
     return {
         "id": submission.submission_id,
@@ -70,8 +72,8 @@ async def get_submission_detail(submission_id: int, session: AsyncSession = Depe
         "studentId": submission.student.index_no,
         "submittedAt": submission.submitted_at.strftime("%b %d, %Y - %I:%M %p") if submission.submitted_at else "Not submitted",
         "code": report.get("code", ""),
-        "status": instructor_eval.get("status", ai_eval.get("status", "Pending")),
-        "score": instructor_eval.get("score", ai_eval.get("overall_score")),
+        "status": submission.status,
+        "score": submission.score if submission.score is not None else ai_eval.get("overall_score"),
         "batch": str(submission.student.batch_id),
         "paste": report.get("paste", False),
         "output": report.get("output", ""),
@@ -101,9 +103,6 @@ async def save_grade_feedback(
         if not submission:
             raise HTTPException(status_code=404, detail="Submission not found")
 
-        # Create a new report dictionary to avoid reference issues
-        current_report = submission.report or {}
-        
         # Calculate grade
         if grade_feedback.score >= 90:
             grade = "A"
@@ -124,16 +123,12 @@ async def save_grade_feedback(
             "grade": grade
         }
 
-        # Update report
-        updated_report = {
-            **current_report,
-            "instructor-evaluation": instructor_eval
-        }
-
-        # Direct assignment
-        submission.report = updated_report
+        # Only the instructor-evaluation row is rewritten; a trigger updates
+        # the submission's status, score and graded_at
+        await put_artifacts(session, submission_id, {INSTRUCTOR_EVALUATION: instructor_eval})
 
         await session.commit()
+        await invalidate_tags(SUBMISSIONS)
         await session.refresh(submission)
         
         return await get_submission_detail(submission_id, session)
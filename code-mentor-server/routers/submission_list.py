@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from database import async_session
+from database import read_session
 from models.submission import Submission
+from models.assignment import Assignment
+from models.student import Student
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page, split_page
+from services.submission_artifacts import load_artifacts, load_report
+from services.submission_stats import submission_filters
 from pydantic import BaseModel
 from typing import List, Optional
 from sqlalchemy.orm import joinedload
@@ -43,8 +48,9 @@ class SubmissionListOut(BaseModel):
     studentId: str
     submittedAt: str
     status: str
-    score: Optional[int]
+    score: Optional[float]
     batch: str
+    report: Optional[dict] = None   # only with include_report=true
 
 class SubmissionDetailOut(BaseModel):
     id: int
@@ -56,7 +62,7 @@ class SubmissionDetailOut(BaseModel):
     paste: bool
     output: str
     status: str
-    score: Optional[int]
+    score: Optional[float]
     batch: str
     plagiarism: Optional[dict]
     ai_feedback: Optional[list]
@@ -71,30 +77,74 @@ class SubmissionDetailOut(BaseModel):
 
 
 
-@router.get("/", response_model=List[SubmissionListOut])
-async def get_submissions():
-    async with async_session() as session:
+@router.get("/", response_model=List[SubmissionListOut], response_model_exclude_unset=True)
+async def get_submissions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    batch_id: Optional[int] = None,
+    assignment_id: Optional[int] = None,
+    instructor_id: Optional[int] = None,
+    status: Optional[str] = None,
+    include_report: bool = False,
+):
+    """
+    Newest submissions first, one page at a time. The cursor for the next
+    page is returned in the X-Next-Cursor header (absent on the last page).
+    The report (with the code) is only included when include_report=true.
+    """
+    async with read_session() as session:
         try:
-            result = await session.execute(
-                select(Submission)
-                .options(joinedload(Submission.assignment), joinedload(Submission.student))
+            columns = [
+                Submission.submission_id,
+                Submission.submitted_at,
+                Submission.status,
+                Submission.score,
+                Assignment.assignment_name,
+                Student.student_name,
+                Student.index_no,
+                Student.batch_id,
+            ]
+            query = (
+                select(*columns)
+                .join(Assignment, Submission.assignment_id == Assignment.assignment_id)
+                .join(Student, Submission.student_id == Student.student_id)
+                .where(*submission_filters(
+                    assignment_id=assignment_id,
+                    batch_id=batch_id,
+                    instructor_id=instructor_id,
+                    status=status,
+                ))
             )
-            submissions = result.scalars().all()
+            try:
+                query = keyset_page(query, Submission.submitted_at, Submission.submission_id, cursor, limit)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            result = await session.execute(query)
+            rows, next_cursor = split_page(result.all(), limit, "submitted_at", "submission_id")
+            if next_cursor:
+                response.headers[NEXT_CURSOR_HEADER] = next_cursor
+            # Artifacts for the whole page in one query
+            reports = await load_artifacts(session, [row.submission_id for row in rows]) if include_report else {}
 
             submissions_list = []
-            for submission in submissions:
-                report = submission.report or {}
-                submissions_list.append({
-                    "id": submission.submission_id,
-                    "assignment": submission.assignment.assignment_name,
-                    "student": submission.student.student_name,
-                    "studentId": submission.student.index_no,
-                    "submittedAt": submission.submitted_at.strftime("%b %d, %Y - %I:%M %p") if submission.submitted_at else "Not submitted",
-                    "status": report.get("instructor-evaluation", {}).get("status", report.get("status", "Pending")),
-                    "score": report.get("instructor-evaluation", {}).get("score", report.get("score")),
-                    "batch": str(submission.student.batch_id),
-                })
+            for row in rows:
+                item = {
+                    "id": row.submission_id,
+                    "assignment": row.assignment_name,
+                    "student": row.student_name,
+                    "studentId": row.index_no,
+                    "submittedAt": row.submitted_at.strftime("%b %d, %Y - %I:%M %p"),
+                    "status": row.status,
+                    "score": row.score,
+                    "batch": str(row.batch_id),
+                }
+                if include_report:
+                    item["report"] = reports[row.submission_id]
+                submissions_list.append(item)
             return submissions_list
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error fetching submissions: {e}")
             raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -102,7 +152,7 @@ async def get_submissions():
 
 @router.get("/{submission_id}", response_model=SubmissionDetailOut)
 async def get_submission_detail(submission_id: int):
-    async with async_session() as session:
+    async with read_session() as session:
         try:
             result = await session.execute(
                 select(Submission)
@@ -116,7 +166,7 @@ async def get_submission_detail(submission_id: int):
             if not submission:
                 raise HTTPException(status_code=404, detail="Submission not found")
 
-            report = submission.report or {}
+            report = await load_report(session, submission.submission_id)
             return {
                 "id": submission.submission_id,
                 "assignment": submission.assignment.assignment_name,
@@ -126,8 +176,8 @@ async def get_submission_detail(submission_id: int):
                 "code": report.get("code", ""),
                 "paste": report.get("paste", False),
                 "output": report.get("output", ""),
-                "status": report.get("instructor-evaluation", {}).get("status", report.get("status", "Pending")),
-                "score": report.get("instructor-evaluation", {}).get("score", report.get("score")),
+                "status": submission.status,
+                "score": submission.score,
                 "batch": str(submission.student.batch_id),
                 "feedback": report.get("instructor-evaluation", {}).get("feedback", []),
                 "grade": report.get("instructor-evaluation", {}).get("grade", "N/A"),
@@ -1,13 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from database import async_session
-from models.submission import Submission
+from database import read_session
 from pydantic import BaseModel
 from typing import List, Optional
 from sqlalchemy.orm import joinedload
 from datetime import datetime, date
-from sqlalchemy import or_, and_
+from services.submission_stats import grading_counts
 
 router = APIRouter(
     prefix="/submissionlist-summary",
@@ -45,7 +43,7 @@ class SubmissionListOut(BaseModel):
     studentId: str
     submittedAt: str
     status: str
-    score: Optional[int]
+    score: Optional[float]
     batch: str
 
 class SubmissionDetailOut(BaseModel):
@@ -58,7 +56,7 @@ class SubmissionDetailOut(BaseModel):
     paste: bool
     output: str
     status: str
-    score: Optional[int]
+    score: Optional[float]
     batch: str
     plagiarism: Optional[dict]
     ai_feedback: Optional[list]
@@ -75,17 +73,9 @@ class GradeFeedback(BaseModel):
 async def get_graded_count():
     """Fetch the count of submissions with 'Graded' status."""
     try:
-        async with async_session() as session:
-            # Count submissions where instructor-evaluation.status is "Graded"
-            result = await session.execute(
-                select(Submission).where(
-                    Submission.report["instructor-evaluation"]["status"].astext == "Graded"
-                )
-            )
-            submissions = result.scalars().all()
-            count = len(submissions)
-            print(f"Graded Count: {count}")
-            return {"count": count}
+        async with read_session() as session:
+            counts = await grading_counts(session)
+            return {"count": counts["graded"]}
     except Exception as e:
         print(f"Error fetching graded count: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -94,72 +84,23 @@ async def get_graded_count():
 async def get_pending_review_count():
     """Fetch the count of submissions that are pending review."""
     try:
-        async with async_session() as session:
-            # Count submissions that are NOT graded (pending)
-            # This includes:
-            # 1. Submissions with no instructor-evaluation at all
-            # 2. Submissions with instructor-evaluation but no status field
-            # 3. Submissions with instructor-evaluation.status = "Pending"
-            # 4. Submissions with instructor-evaluation.status != "Graded"
-            
-            # First, get total submissions
-            total_result = await session.execute(select(Submission))
-            total_submissions = total_result.scalars().all()
-            
-            # Then get graded submissions
-            graded_result = await session.execute(
-                select(Submission).where(
-                    Submission.report["instructor-evaluation"]["status"].astext == "Graded"
-                )
-            )
-            graded_submissions = graded_result.scalars().all()
-            
-            # Pending = Total - Graded
-            pending_count = len(total_submissions) - len(graded_submissions)
-            
-            print(f"Total Submissions: {len(total_submissions)}")
-            print(f"Graded Submissions: {len(graded_submissions)}")
-            print(f"Pending Review Count: {pending_count}")
-            
-            return {"count": pending_count}
-            
+        async with read_session() as session:
+            # Pending = every submission whose instructor-evaluation status is
+            # not "Graded" (no evaluation, no status, "Pending", ...)
+            counts = await grading_counts(session)
+            return {"count": counts["pending"]}
     except Exception as e:
         print(f"Error fetching pending review count: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-# Alternative approach with more detailed filtering
+# Detailed breakdown from the same aggregate query
 @router.get("/pending-review-count-detailed")
-async def get_pending_review_count_detailed():
-    """Alternative implementation with detailed filtering."""
+async def get_pending_review_count_detailed(assignment_id: Optional[int] = None):
+    """Pending count together with the totals it is derived from."""
     try:
-        async with async_session() as session:
-            # Build conditions for pending submissions
-            conditions = [
-                # No instructor-evaluation section at all
-                ~Submission.report.has_key("instructor-evaluation"),
-                # instructor-evaluation exists but no status field
-                and_(
-                    Submission.report.has_key("instructor-evaluation"),
-                    ~Submission.report["instructor-evaluation"].has_key("status")
-                ),
-                # instructor-evaluation.status is "Pending"
-                Submission.report["instructor-evaluation"]["status"].astext == "Pending",
-                # instructor-evaluation.status exists but is not "Graded"
-                and_(
-                    Submission.report["instructor-evaluation"].has_key("status"),
-                    Submission.report["instructor-evaluation"]["status"].astext != "Graded"
-                )
-            ]
-            
-            result = await session.execute(
-                select(Submission).where(or_(*conditions))
-            )
-            pending_submissions = result.scalars().all()
-            count = len(pending_submissions)
-            
-            print(f"Pending Review Count (Detailed): {count}")
-            return {"count": count}
-            
+        async with read_session() as session:
+            counts = await grading_counts(session, assignment_id=assignment_id)
+            return {"count": counts["pending"], **counts}
     except Exception as e:
         print(f"Error fetching pending review count (detailed): {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal Server Error")
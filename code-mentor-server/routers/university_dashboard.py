@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from database import async_session, get_db
-from models import Admin, Instructor, Student, Assignment,University,Batch
-from auth.auth import verify_token
+from database import get_read_db, read_session
+from models import Admin, Student, University
+from auth.principal import Principal, get_principal
+from services.plan_catalogue import plan_catalogue
+from services.university_stats import active_plan_key, format_bytes, get_stats
 
 
 
@@ -14,7 +16,7 @@ async def get_university_dashboard(uni_id: int):
     """
     Fetch data for the university dashboard.
     """
-    async with async_session() as session:
+    async with read_session() as session:
         # Fetch university details
         university = await session.execute(
             select(University).where(University.university_id == uni_id)
@@ -23,29 +25,14 @@ async def get_university_dashboard(uni_id: int):
         if not university:
             raise HTTPException(status_code=404, detail="University not found")
 
-        # Fetch active instructors
-        active_instructors = await session.execute(
-            select(Instructor).where(Instructor.uni_id == uni_id)
-        )
-        active_instructors_count = active_instructors.scalars().all()
-
-        # Fetch active students
-        active_students = await session.execute(
-            select(Student).where(Student.uni_id == uni_id)
-        )
-        active_students_count = active_students.scalars().all()
+        # Counters and storage usage, precomputed (services/university_stats.py)
+        stats = await get_stats(session, uni_id)
 
-        # Fetch courses created
-        courses_created = await session.execute(
-            select(Assignment).where(Assignment.batch_id.in_(
-                select(Batch.batch_id).where(Batch.uni_id == uni_id)
-            ))
-        )
-        courses_created_count = courses_created.scalars().all()
-
-        # Mock storage data (replace with actual storage logic if available)
-        storage_used = "87 GB"
-        storage_limit = "200 GB"
+        # Storage limit from the active plan
+        plan_key = await active_plan_key(session, uni_id)
+        plan = await plan_catalogue.get(session, plan_key) if plan_key else None
+        storage_used = format_bytes(stats["storage_bytes"])
+        storage_limit = plan["storage"] if plan and plan["storage"] else None
 
         # Fetch recent activity (e.g., new students, instructors, courses)
         recent_activity = []
@@ -61,66 +48,43 @@ async def get_university_dashboard(uni_id: int):
 
         return {
             "university_name": university.university_name,
-            "active_instructors": len(active_instructors_count),
-            "active_students": len(active_students_count),
-            "courses_created": len(courses_created_count),
+            "active_instructors": stats["instructors"],
+            "active_students": stats["students"],
+            "courses_created": stats["assignments"],
             "storage_used": storage_used,
             "storage_limit": storage_limit,
+            "storage_breakdown": {
+                "code": format_bytes(stats["code_bytes"]),
+                "logs": format_bytes(stats["log_bytes"]),
+                "reports": format_bytes(stats["report_bytes"]),
+            },
             "recent_activity": recent_activity,
         }
 
 @router.get("/university-stats")
-async def get_university_stats(token: dict = Depends(verify_token), db: AsyncSession = Depends(get_db)):
+async def get_university_stats(principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_read_db)):
     try:
-        # Extract admin_id from token
-        admin_id = token["user_id"]
-
-        # Fetch uni_id for the admin
-        admin_query = await db.execute(
-            select(Admin.uni_id).where(Admin.admin_id == admin_id)
-        )
-        uni_id = admin_query.scalar_one_or_none()
+        # uni_id of the admin (profile row loaded once per request)
+        uni_id = await principal.admin_uni_id(db)
 
-        if not uni_id:
-            raise HTTPException(status_code=404, detail="University not found for the admin")
-
-        # Fetch active instructors count
-        active_instructors_query = await db.execute(
-            select(Instructor).where(Instructor.uni_id == uni_id)
-        )
-        active_instructors_count = active_instructors_query.scalars().all()
-
-        # Fetch active students count
-        active_students_query = await db.execute(
-            select(Student).where(Student.uni_id == uni_id)
-        )
-        active_students_count = active_students_query.scalars().all()
-
-        # Fetch courses created count
-        courses_created_query = await db.execute(
-            select(Assignment).where(Assignment.instructor_id.in_(
-                select(Instructor.instructor_id).where(Instructor.uni_id == uni_id)
-            ))
-        )
-        courses_created_count = courses_created_query.scalars().all()
+        # Counters kept in university_stats
+        stats = await get_stats(db, uni_id)
 
         return {
-            "activeInstructors": len(active_instructors_count),
-            "activeStudents": len(active_students_count),
-            "coursesCreated": len(courses_created_count),
+            "activeInstructors": stats["instructors"],
+            "activeStudents": stats["students"],
+            "coursesCreated": stats["assignments"],
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/university/details")
-async def get_university_details(token: dict = Depends(verify_token)):
-    user_id = token["user_id"]  # Extract admin_id from token
-    async with async_session() as session:
-        # Fetch admin details to find university_id
-        admin_result = await session.execute(
-            select(Admin).where(Admin.admin_id == user_id)
-        )
-        admin = admin_result.scalar_one_or_none()
+async def get_university_details(principal: Principal = Depends(get_principal)):
+    async with read_session() as session:
+        # Admin profile of the token's user, to find university_id
+        admin = await principal.load(Admin, session)
         
         if not admin:
             raise HTTPException(status_code=404, detail="Admin not found")
@@ -0,0 +1,29 @@
+import asyncio
+from pathlib import Path
+from database import engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+async def apply():
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection  # asyncpg connection: runs multi-statement scripts
+        driver.add_log_listener(lambda _conn, notice: print("  ", notice.message))  # RAISE NOTICE from migrations
+        await driver.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migration ("
+            " name VARCHAR(255) PRIMARY KEY,"
+            " applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        )
+        applied = {r["name"] for r in await driver.fetch("SELECT name FROM schema_migration")}
+
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            if path.name in applied:
+                continue
+            print("Applying", path.name)
+            async with driver.transaction():
+                await driver.execute(path.read_text(encoding="utf-8"))
+                await driver.execute("INSERT INTO schema_migration (name) VALUES ($1)", path.name)
+        print("Migrations up to date.")
+
+if __name__ == '__main__':
+    asyncio.run(apply())
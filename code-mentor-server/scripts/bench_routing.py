@@ -0,0 +1,88 @@
+"""
+Benchmarks route matching for the full app, without a server or database.
+
+Every HTTP route gets a sample request (path parameters filled with "1"),
+which is matched against the route table the way Starlette's router does:
+routes are tried in order until one matches fully. Reports the time per
+match, the number of routes tried per request and the slowest paths,
+followed by the route audit (duplicate and shadowed routes).
+
+    python scripts/bench_routing.py --iterations 2000
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from starlette.routing import Match, Route  # noqa: E402
+
+from main import app  # noqa: E402
+from routers import audit_routes  # noqa: E402
+
+PARAM = re.compile(r"{[^}]+}")
+
+
+def sample_requests(routes):
+    samples = []
+    for route in routes:
+        if not isinstance(route, Route):
+            continue
+        method = sorted((route.methods or {"GET"}) - {"HEAD"})[0]
+        samples.append((method, PARAM.sub("1", route.path)))
+    return samples
+
+
+def match(routes, scope):
+    """(routes tried, matched) for one request."""
+    partial = False
+    for tried, route in enumerate(routes, start=1):
+        result, _ = route.matches(scope)
+        if result == Match.FULL:
+            return tried, True
+        partial = partial or result == Match.PARTIAL
+    return len(routes), partial
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000, help="matches per sample request")
+    parser.add_argument("--top", type=int, default=5, help="slowest paths to list")
+    args = parser.parse_args()
+
+    routes = app.router.routes
+    samples = sample_requests(routes)
+    per_path = []
+    tried_counts = []
+    for method, path in samples:
+        scope = {"type": "http", "method": method, "path": path, "root_path": "", "headers": [], "query_string": b""}
+        tried, _ = match(routes, scope)
+        tried_counts.append(tried)
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            match(routes, scope)
+        per_path.append(((time.perf_counter() - started) / args.iterations, method, path, tried))
+
+    times_us = [seconds * 1e6 for seconds, *_ in per_path]
+    print(f"routes in table:     {len(routes)}")
+    print(f"sample requests:     {len(samples)}")
+    print(f"match time:          mean {statistics.mean(times_us):.2f}us  median {statistics.median(times_us):.2f}us  max {max(times_us):.2f}us")
+    print(f"routes tried:        mean {statistics.mean(tried_counts):.1f}  max {max(tried_counts)}")
+    print(f"slowest {args.top}:")
+    for seconds, method, path, tried in sorted(per_path, reverse=True)[:args.top]:
+        print(f"  {seconds * 1e6:8.2f}us  {tried:4d} tried  {method} {path}")
+
+    report = audit_routes(app)
+    print(f"duplicate routes:    {len(report['duplicates'])}")
+    for entry in report["duplicates"]:
+        print(f"  {entry['route']}  <- {entry['by']}")
+    print(f"shadowed routes:     {len(report['shadowed'])}")
+    for entry in report["shadowed"]:
+        print(f"  {entry['route']}  <- {entry['by']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures how long importing the app takes and how much memory it uses.
+
+Each run is a fresh interpreter that imports main (which imports every
+router), then reports wall time, peak RSS and whether the LLM SDKs were
+loaded. With --preload the LLM clients are also built, which is what every
+worker paid at import time before the SDKs were loaded lazily:
+
+    python scripts/measure_startup.py --runs 5
+    python scripts/measure_startup.py --runs 5 --preload groq,gemini
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+SDK_MODULES = ("groq", "google.genai")
+
+# Runs in the child interpreter; prints one JSON line
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+preload = {preload!r}
+if preload:
+    from services.llm import preload as preload_clients
+    preload_clients(preload)
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "sdks": [name for name in {sdks!r} if name in sys.modules],
+    "modules": len(sys.modules),
+}}))
+"""
+
+
+def measure_once(preload):
+    code = PROBE.format(preload=preload, sdks=SDK_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SERVER_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--preload", default="", help="comma-separated LLM providers to build after import")
+    args = parser.parse_args()
+    preload = [name.strip() for name in args.preload.split(",") if name.strip()]
+
+    samples = [measure_once(preload) for _ in range(args.runs)]
+    seconds = [s["seconds"] for s in samples]
+    rss = [s["rss_mb"] for s in samples]
+    print(f"runs:           {args.runs}")
+    print(f"preloaded:      {', '.join(preload) or '-'}")
+    print(f"import time:    median {statistics.median(seconds):.3f}s  min {min(seconds):.3f}s  max {max(seconds):.3f}s")
+    print(f"peak RSS:       median {statistics.median(rss):.1f} MB")
+    print(f"modules loaded: {samples[-1]['modules']}")
+    print(f"LLM SDKs:       {', '.join(samples[-1]['sdks']) or 'not loaded'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+# services/__init__.py
+#
+# Shared, framework-independent logic used by several routers
+# (paste detection, editor session bookkeeping, caches, ...).
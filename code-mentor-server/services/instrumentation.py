@@ -0,0 +1,342 @@
+# services/instrumentation.py
+"""
+Per-request timing for the hot paths: HTTP latency per route, and within
+each request the time and count of SQL statements, LLM calls (with token
+usage) and subprocess runs.
+
+MetricsMiddleware opens a RequestStats for every HTTP request in a context
+variable; the SQLAlchemy engine hooks (instrument_engine), the LLM client
+wrappers (services/llm.py) and track_subprocess() add to whichever request
+is current. When the request finishes its numbers are folded into per-route
+aggregates, rendered in the Prometheus text format by render_prometheus()
+(GET /metrics), and written as one JSON log line on the
+"services.instrumentation" logger.
+
+Latency is measured until the last body chunk is sent; work done by
+background tasks after the response is still counted for the route's DB,
+LLM and subprocess totals.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from services.metrics import LatencyStats
+
+logger = logging.getLogger("services.instrumentation")
+
+REQUEST_LOG = os.getenv("REQUEST_LOG", "1") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# -------------------------
+# Per-request context
+# -------------------------
+class RequestStats:
+    __slots__ = ("method", "path", "db_ms", "db_queries", "llm_ms", "llm_calls",
+                 "llm_prompt_tokens", "llm_completion_tokens", "subprocess_ms", "subprocess_runs")
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.llm_ms = 0.0
+        self.llm_calls = 0
+        self.llm_prompt_tokens = 0
+        self.llm_completion_tokens = 0
+        self.subprocess_ms = 0.0
+        self.subprocess_runs = 0
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_request() -> Optional[RequestStats]:
+    """Stats of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+# -------------------------
+# Aggregates
+# -------------------------
+class RouteStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = LatencyStats()
+        self.statuses: Dict[str, int] = {}
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.llm_ms = 0.0
+        self.llm_calls = 0
+        self.subprocess_ms = 0.0
+        self.subprocess_runs = 0
+
+    def add(self, stats: RequestStats, status: int, seconds: float) -> None:
+        self.latency.observe(seconds)
+        with self._lock:
+            key = str(status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            self.db_ms += stats.db_ms
+            self.db_queries += stats.db_queries
+            self.llm_ms += stats.llm_ms
+            self.llm_calls += stats.llm_calls
+            self.subprocess_ms += stats.subprocess_ms
+            self.subprocess_runs += stats.subprocess_runs
+
+
+class ProviderStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = LatencyStats()
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, seconds: float, prompt_tokens: int, completion_tokens: int, failed: bool) -> None:
+        self.latency.observe(seconds)
+        with self._lock:
+            self.errors += int(failed)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+
+_routes_lock = threading.Lock()
+route_stats: Dict[Tuple[str, str], RouteStats] = {}       # (method, route template)
+llm_stats: Dict[str, ProviderStats] = {}                   # provider
+db_query_stats = LatencyStats()                            # every SQL statement
+subprocess_stats = LatencyStats()                          # every tracked subprocess run
+
+
+def _route(method: str, route: str) -> RouteStats:
+    stats = route_stats.get((method, route))
+    if stats is None:
+        with _routes_lock:
+            stats = route_stats.setdefault((method, route), RouteStats())
+    return stats
+
+
+def _provider(name: str) -> ProviderStats:
+    stats = llm_stats.get(name)
+    if stats is None:
+        with _routes_lock:
+            stats = llm_stats.setdefault(name, ProviderStats())
+    return stats
+
+
+# -------------------------
+# Recording hooks
+# -------------------------
+# Called with the SQL text before each statement on an instrumented engine
+# (services/query_guard.py); an exception raised by one aborts the statement.
+_statement_observers: List[Callable[[str], None]] = []
+
+
+def add_statement_observer(observer: Callable[[str], None]) -> None:
+    if observer not in _statement_observers:
+        _statement_observers.append(observer)
+
+
+def instrument_engine(engine) -> None:
+    """Times every statement run through the (async) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if getattr(sync_engine, "_request_metrics", False):
+        return
+    sync_engine._request_metrics = True
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        for observer in _statement_observers:
+            observer(statement)
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("query_started")
+        if not started:
+            return
+        seconds = time.perf_counter() - started.pop()
+        db_query_stats.observe(seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.db_ms += seconds * 1000
+            stats.db_queries += 1
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def record_llm_call(provider: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0, failed: bool = False) -> None:
+    _provider(provider).add(seconds, prompt_tokens, completion_tokens, failed)
+    stats = _current.get()
+    if stats is not None:
+        stats.llm_ms += seconds * 1000
+        stats.llm_calls += 1
+        stats.llm_prompt_tokens += prompt_tokens
+        stats.llm_completion_tokens += completion_tokens
+
+
+@contextmanager
+def track_subprocess() -> Iterator[None]:
+    """Times a subprocess run (code execution) for the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        subprocess_stats.observe(seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.subprocess_ms += seconds * 1000
+            stats.subprocess_runs += 1
+
+
+# -------------------------
+# Middleware
+# -------------------------
+def _log_request(stats: RequestStats, route: str, status: int, seconds: float) -> None:
+    ms = seconds * 1000
+    slow = ms >= SLOW_REQUEST_MS
+    if not (REQUEST_LOG or slow):
+        return
+    record = {
+        "event": "request",
+        "method": stats.method,
+        "route": route,
+        "path": stats.path,
+        "status": status,
+        "durationMs": round(ms, 2),
+        "dbMs": round(stats.db_ms, 2),
+        "dbQueries": stats.db_queries,
+        "llmMs": round(stats.llm_ms, 2),
+        "llmCalls": stats.llm_calls,
+        "llmTokens": stats.llm_prompt_tokens + stats.llm_completion_tokens,
+        "subprocessMs": round(stats.subprocess_ms, 2),
+        "slow": slow,
+    }
+    logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record))
+
+
+class MetricsMiddleware:
+    """ASGI middleware; safe for streaming responses."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope.get("method", ""), scope.get("path", ""))
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+        finished: List[float] = []
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished.append(time.perf_counter())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            seconds = (finished[0] if finished else time.perf_counter()) - started
+            # FastAPI puts the matched route in the scope; templates keep the label set small
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            _route(stats.method, route).add(stats, status, seconds)
+            _log_request(stats, route, status, seconds)
+
+
+# -------------------------
+# Prometheus exposition
+# -------------------------
+def _labels(**labels: str) -> str:
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _histogram(lines: List[str], name: str, stats: LatencyStats, **labels: str) -> None:
+    """LatencyStats (ms buckets) as a cumulative Prometheus histogram in seconds."""
+    snapshot = stats.snapshot()
+    cumulative = 0
+    for bound_ms, count in zip(snapshot["bucketsMs"], snapshot["histogram"]):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=f'{bound_ms / 1000:g}')} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {snapshot['count']}")
+    lines.append(f"{name}_sum{_labels(**labels)} {snapshot['totalMs'] / 1000:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {snapshot['count']}")
+
+
+def render_prometheus(pool_wait_stats: Optional[Dict[str, LatencyStats]] = None) -> str:
+    lines: List[str] = []
+    routes = sorted(route_stats.items())
+
+    lines += ["# HELP http_request_duration_seconds Time until the response was sent.",
+              "# TYPE http_request_duration_seconds histogram"]
+    for (method, route), stats in routes:
+        _histogram(lines, "http_request_duration_seconds", stats.latency, method=method, route=route)
+
+    lines += ["# HELP http_requests_total Requests by route and status.", "# TYPE http_requests_total counter"]
+    for (method, route), stats in routes:
+        for status, count in sorted(stats.statuses.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    per_route = (
+        ("http_request_db_seconds_total", "counter", "Time spent in SQL statements.", lambda s: s.db_ms / 1000),
+        ("http_request_db_queries_total", "counter", "SQL statements executed.", lambda s: s.db_queries),
+        ("http_request_llm_seconds_total", "counter", "Time spent waiting on LLM calls.", lambda s: s.llm_ms / 1000),
+        ("http_request_llm_calls_total", "counter", "LLM calls made.", lambda s: s.llm_calls),
+        ("http_request_subprocess_seconds_total", "counter", "Time spent in subprocess runs.", lambda s: s.subprocess_ms / 1000),
+        ("http_request_subprocess_runs_total", "counter", "Subprocess runs.", lambda s: s.subprocess_runs),
+    )
+    for name, kind, help_text, value in per_route:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for (method, route), stats in routes:
+            lines.append(f"{name}{_labels(method=method, route=route)} {value(stats):g}")
+
+    lines += ["# HELP db_query_duration_seconds Duration of single SQL statements.",
+              "# TYPE db_query_duration_seconds histogram"]
+    _histogram(lines, "db_query_duration_seconds", db_query_stats)
+
+    if pool_wait_stats:
+        lines += ["# HELP db_pool_checkout_wait_seconds Time waiting for a pooled connection.",
+                  "# TYPE db_pool_checkout_wait_seconds histogram"]
+        for pool, stats in sorted(pool_wait_stats.items()):
+            _histogram(lines, "db_pool_checkout_wait_seconds", stats, pool=pool)
+
+    providers = sorted(llm_stats.items())
+    lines += ["# HELP llm_call_duration_seconds Duration of LLM API calls.", "# TYPE llm_call_duration_seconds histogram"]
+    for provider, stats in providers:
+        _histogram(lines, "llm_call_duration_seconds", stats.latency, provider=provider)
+    lines += ["# HELP llm_tokens_total Tokens reported by the LLM APIs.", "# TYPE llm_tokens_total counter"]
+    for provider, stats in providers:
+        lines.append(f"llm_tokens_total{_labels(provider=provider, kind='prompt')} {stats.prompt_tokens}")
+        lines.append(f"llm_tokens_total{_labels(provider=provider, kind='completion')} {stats.completion_tokens}")
+    lines += ["# HELP llm_call_errors_total LLM calls that raised.", "# TYPE llm_call_errors_total counter"]
+    for provider, stats in providers:
+        lines.append(f"llm_call_errors_total{_labels(provider=provider)} {stats.errors}")
+
+    lines += ["# HELP subprocess_duration_seconds Duration of code execution subprocesses.",
+              "# TYPE subprocess_duration_seconds histogram"]
+    _histogram(lines, "subprocess_duration_seconds", subprocess_stats)
+
+    return "\n".join(lines) + "\n"
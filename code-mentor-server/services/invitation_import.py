@@ -0,0 +1,213 @@
+# services/invitation_import.py
+"""
+Bulk invitation import from an uploaded CSV (columns: email, name, role).
+
+The upload is read and decoded in chunks; only complete records (a quoted
+field may span lines) are handed to the csv module, so memory stays flat
+whatever the size of the file. Rows are validated, de-duplicated within
+the file and against the university's invitations and every student and
+instructor email (one lookup query per chunk, then set membership), and
+inserted IMPORT_CHUNK at a time with INSERT ... ON CONFLICT DO NOTHING on
+ux_invitation_uni_email. Each chunk is committed on its own.
+
+Every data row gets a report entry: created, skipped (duplicate) or
+invalid, with the reason.
+"""
+import codecs
+import csv
+import io
+import re
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from sqlalchemy import func, select, union
+from sqlalchemy.dialects.postgresql import insert
+
+from models.instructor import Instructor
+from models.invitation import Invitation
+from models.student import Student
+
+IMPORT_CHUNK = 1000
+READ_CHUNK_BYTES = 64 * 1024
+REQUIRED_COLUMNS = ("email", "name", "role")
+ROLES = ("instructor", "student")
+MAX_FIELD_LENGTH = 255
+
+CREATED = "created"
+SKIPPED = "skipped"
+INVALID = "invalid"
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class CSVImportError(ValueError):
+    """The upload is not a usable CSV (encoding, missing columns)."""
+
+
+class ImportResult:
+    __slots__ = ("invitations", "report", "counts")
+
+    def __init__(self):
+        self.invitations: List[dict] = []
+        self.report: List[dict] = []
+        self.counts: Dict[str, int] = {CREATED: 0, SKIPPED: 0, INVALID: 0}
+
+    def add(self, line: int, email: Optional[str], status: str, reason: Optional[str] = None) -> None:
+        self.report.append({"line": line, "email": email, "status": status, "reason": reason})
+        self.counts[status] += 1
+
+    def summary(self) -> dict:
+        return {"rows": len(self.report), **self.counts}
+
+
+# -------------------------
+# Streaming parse
+# -------------------------
+async def _record_blocks(upload, chunk_size: int = READ_CHUNK_BYTES) -> AsyncIterator[List[str]]:
+    """Lists of lines that end on a record boundary, one list per chunk read."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    carry = ""  # incomplete line, or the open lines of a quoted field
+    while True:
+        chunk = await upload.read(chunk_size)
+        try:
+            text = carry + decoder.decode(chunk, final=not chunk)
+        except UnicodeDecodeError:
+            raise CSVImportError("CSV file must be UTF-8 encoded")
+        if not chunk:
+            if text:
+                yield list(io.StringIO(text, newline=""))
+            return
+
+        block: List[str] = []
+        pending: List[str] = []
+        quoted = False
+        lines = list(io.StringIO(text, newline=""))
+        for index, line in enumerate(lines):
+            pending.append(line)
+            if line.count('"') % 2:
+                quoted = not quoted
+            # A trailing "\r" may be the first half of a "\r\n" split across chunks
+            complete = line.endswith("\n") or (line.endswith("\r") and index < len(lines) - 1)
+            if not quoted and complete:
+                block.extend(pending)
+                pending = []
+        carry = "".join(pending)
+        if block:
+            yield block
+
+
+async def _rows(upload) -> AsyncIterator[tuple]:
+    """(first line number, {column: value}) for every non-empty data row."""
+    header: Optional[List[str]] = None
+    line_offset = 0
+    async for block in _record_blocks(upload):
+        reader = csv.reader(block)
+        consumed = 0
+        for values in reader:
+            line = line_offset + consumed + 1
+            consumed = reader.line_num
+            if not any(value.strip() for value in values):
+                continue
+            if header is None:
+                header = [value.strip().lower() for value in values]
+                missing = [column for column in REQUIRED_COLUMNS if column not in header]
+                if missing:
+                    raise CSVImportError(f"CSV is missing required columns: {', '.join(missing)}")
+                continue
+            yield line, dict(zip(header, values))
+        line_offset += reader.line_num
+    if header is None:
+        raise CSVImportError("CSV file is empty")
+
+
+def _validate(row: dict) -> tuple:
+    """(email, name, role, reason); reason is None for a valid row."""
+    email = (row.get("email") or "").strip().lower()
+    name = (row.get("name") or "").strip()
+    role = (row.get("role") or "").strip().lower()
+    if not email:
+        return email, name, role, "missing email"
+    if len(email) > MAX_FIELD_LENGTH or not _EMAIL.match(email):
+        return email, name, role, "invalid email"
+    if not name:
+        return email, name, role, "missing name"
+    if len(name) > MAX_FIELD_LENGTH:
+        return email, name, role, "name too long"
+    if role not in ROLES:
+        return email, name, role, f"role must be one of: {', '.join(ROLES)}"
+    return email, name, role, None
+
+
+# -------------------------
+# Batched writes
+# -------------------------
+async def _existing_emails(session, uni_id: int, emails: List[str]) -> Set[str]:
+    """Emails of the chunk already invited to the university or registered as a user."""
+    query = union(
+        select(func.lower(Invitation.email)).where(Invitation.uni_id == uni_id, func.lower(Invitation.email).in_(emails)),
+        # Case-insensitive like the invitation check (lower(email) indexes, migrations/015)
+        select(func.lower(Student.email)).where(func.lower(Student.email).in_(emails)),
+        select(func.lower(Instructor.email)).where(func.lower(Instructor.email).in_(emails)),
+    )
+    return set((await session.execute(query)).scalars().all())
+
+
+async def _flush_chunk(session, uni_id: int, chunk: List[tuple], result: ImportResult) -> None:
+    """Inserts the valid rows of one chunk and reports each of them."""
+    existing = await _existing_emails(session, uni_id, [email for _, email, _, _ in chunk])
+    fresh = [entry for entry in chunk if entry[1] not in existing]
+
+    created: Dict[str, dict] = {}
+    if fresh:
+        statement = (
+            insert(Invitation)
+            .values([
+                {"email": email, "name": name, "role": role, "status": "pending", "uni_id": uni_id}
+                for _, email, name, role in fresh
+            ])
+            .on_conflict_do_nothing()
+            .returning(Invitation.id, Invitation.email, Invitation.name, Invitation.role, Invitation.status)
+        )
+        for row in await session.execute(statement):
+            created[row.email] = {"id": row.id, "email": row.email, "name": row.name, "role": row.role, "status": row.status}
+        await session.commit()
+
+    for line, email, _, _ in chunk:
+        invitation = created.get(email)
+        if invitation is not None:
+            result.invitations.append(invitation)
+            result.add(line, email, CREATED)
+        elif email in existing:
+            result.add(line, email, SKIPPED, "already invited or registered")
+        else:
+            # Inserted by a concurrent request between the lookup and the insert
+            result.add(line, email, SKIPPED, "already invited")
+
+
+async def import_invitations(session, uni_id: int, upload, chunk_size: int = IMPORT_CHUNK) -> ImportResult:
+    """
+    Imports the invitations of an uploaded CSV for a university. Raises
+    CSVImportError when the file cannot be read as a CSV with the required
+    columns; chunks committed before that point are kept.
+    """
+    result = ImportResult()
+    seen: Set[str] = set()
+    chunk: List[tuple] = []
+    async for line, row in _rows(upload):
+        email, name, role, reason = _validate(row)
+        if reason is not None:
+            result.add(line, email or None, INVALID, reason)
+            continue
+        if email in seen:
+            result.add(line, email, SKIPPED, "duplicate in file")
+            continue
+        seen.add(email)
+        chunk.append((line, email, name, role))
+        if len(chunk) >= chunk_size:
+            await _flush_chunk(session, uni_id, chunk, result)
+            chunk = []
+    if chunk:
+        await _flush_chunk(session, uni_id, chunk, result)
+
+    # Report in file order (rows of a chunk are reported when it is flushed)
+    result.report.sort(key=lambda entry: entry["line"])
+    return result
@@ -0,0 +1,147 @@
+# services/llm.py
+"""
+Lazily created LLM clients.
+
+Routers used to import the groq and google-genai SDKs and build their
+clients at import time, so every worker paid for both SDKs at startup
+whether or not it ever served an AI route. Providers are now registered
+here as factories; the SDK is imported and the client built on first use,
+once per process.
+
+Routers keep a module-level handle from lazy_client(name); attribute
+access on it (client.chat..., client.models...) resolves the real client.
+Set LLM_PRELOAD (e.g. "groq,gemini") to build clients at startup on
+workers that serve AI traffic, so the first request does not pay for it.
+The completion calls of each client are timed and their token usage is
+recorded in the request metrics (services/instrumentation.py).
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+from services.instrumentation import record_llm_call
+
+logger = logging.getLogger("services.llm")
+
+_factories: Dict[str, Callable[[], Any]] = {}
+_clients: Dict[str, Any] = {}
+_load_seconds: Dict[str, float] = {}
+_lock = threading.Lock()  # clients may first be requested from threadpool code
+
+
+def register_provider(name: str, factory: Callable[[], Any]) -> None:
+    """Registers (or replaces) the factory of a provider; drops an already built client."""
+    with _lock:
+        _factories[name] = factory
+        _clients.pop(name, None)
+
+
+def get_client(name: str) -> Any:
+    """The provider's client, importing its SDK and building it on first call."""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            factory = _factories.get(name)
+            if factory is None:
+                raise KeyError(f"Unknown LLM provider: {name}")
+            started = time.perf_counter()
+            client = factory()
+            _load_seconds[name] = time.perf_counter() - started
+            _clients[name] = client
+            logger.info("LLM provider %s loaded in %.3fs", name, _load_seconds[name])
+    return client
+
+
+class LazyClient:
+    """Module-level stand-in for a client; resolves it on first attribute access."""
+
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(get_client(self._name), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._name in _clients else "not loaded"
+        return f"<LazyClient {self._name} ({state})>"
+
+
+def lazy_client(name: str) -> LazyClient:
+    return LazyClient(name)
+
+
+def preload(names: Iterable[str]) -> List[str]:
+    """Builds the named clients now. Returns the ones that failed (logged, not raised)."""
+    failed = []
+    for name in names:
+        try:
+            get_client(name)
+        except Exception:
+            logger.exception("Preloading LLM provider %s failed", name)
+            failed.append(name)
+    return failed
+
+
+def preload_from_env() -> List[str]:
+    names = [name.strip() for name in os.getenv("LLM_PRELOAD", "").split(",") if name.strip()]
+    return preload(names)
+
+
+def loaded_providers() -> Dict[str, float]:
+    """{provider: seconds its import and construction took} for clients built so far."""
+    return {name: round(seconds, 4) for name, seconds in _load_seconds.items() if name in _clients}
+
+
+# -------------------------
+# Providers
+# -------------------------
+def _timed(provider: str, call: Callable, usage: Callable[[Any], tuple]) -> Callable:
+    """Wraps an SDK call so its duration and token usage reach the request metrics."""
+    def timed_call(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = call(*args, **kwargs)
+        except Exception:
+            record_llm_call(provider, time.perf_counter() - started, failed=True)
+            raise
+        prompt_tokens, completion_tokens = usage(response)
+        record_llm_call(provider, time.perf_counter() - started, prompt_tokens or 0, completion_tokens or 0)
+        return response
+    return timed_call
+
+
+def _groq_usage(completion) -> tuple:
+    usage = getattr(completion, "usage", None)
+    return getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0)
+
+
+def _gemini_usage(response) -> tuple:
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "prompt_token_count", 0), getattr(usage, "candidates_token_count", 0)
+
+
+def _groq_client():
+    from groq import Groq
+    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    completions = client.chat.completions
+    completions.create = _timed("groq", completions.create, _groq_usage)
+    return client
+
+
+def _gemini_client():
+    from google import genai
+    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY", ""))
+    models = client.models
+    models.generate_content = _timed("gemini", models.generate_content, _gemini_usage)
+    return client
+
+
+register_provider("groq", _groq_client)
+register_provider("gemini", _gemini_client)
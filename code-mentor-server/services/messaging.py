@@ -0,0 +1,167 @@
+# services/messaging.py
+"""
+Conversations, their participants and their message history.
+
+Sending a message is a single INSERT. History is read newest-first in
+keyset pages over (sent_at, message_id) on the (conversation_id, sent_at)
+index, and conversation lists only fetch each conversation's latest message.
+Membership lives in conversation_participant, indexed by user, so a user's
+inbox and the conversation between two users are index lookups.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, literal_column, select, true
+from sqlalchemy.orm import aliased
+
+from models.message import Conversation, ConversationParticipant, Message
+from services.pagination import keyset_page, split_page
+
+DEFAULT_HISTORY_PAGE = 50
+
+
+async def append_message(session, conversation_id: int, sender_id: int, text: str) -> dict:
+    """Adds one message and commits."""
+    message = Message(conversation_id=conversation_id, sender_id=sender_id, text=text)
+    session.add(message)
+    await session.commit()
+    await session.refresh(message)
+    return message.to_dict()
+
+
+async def message_page(
+    session,
+    conversation_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_HISTORY_PAGE,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    The latest `limit` messages before `cursor`, oldest first, and the
+    cursor for the page of older messages (None when there are none).
+    """
+    query = keyset_page(
+        select(Message).where(Message.conversation_id == conversation_id),
+        Message.sent_at, Message.message_id, cursor, limit,
+    )
+    result = await session.execute(query)
+    rows, older = split_page(result.scalars().all(), limit, "sent_at", "message_id")
+    return [m.to_dict() for m in reversed(rows)], older
+
+
+async def latest_messages(session, conversation_ids: Iterable[int]) -> Dict[int, dict]:
+    """{conversation_id: latest message} in one DISTINCT ON query."""
+    ids = list(conversation_ids)
+    if not ids:
+        return {}
+    result = await session.execute(
+        select(Message)
+        .where(Message.conversation_id.in_(ids))
+        .distinct(Message.conversation_id)
+        .order_by(Message.conversation_id, Message.sent_at.desc(), Message.message_id.desc())
+    )
+    return {m.conversation_id: m.to_dict() for m in result.scalars().all()}
+
+
+# -------------------------
+# Participants
+# -------------------------
+async def create_conversation(
+    session,
+    name: str,
+    participant_ids: Sequence[int],
+    is_group: bool = False,
+    created_at=None,
+) -> Conversation:
+    """Creates a conversation with its participant rows and commits."""
+    ordered = list(dict.fromkeys(participant_ids))  # drop duplicates, keep order
+    conversation = Conversation(
+        name=name,
+        participants=[{"user_id": uid} for uid in ordered],
+        is_group=is_group,
+        created_at=created_at,
+    )
+    session.add(conversation)
+    await session.flush()
+    session.add_all([
+        ConversationParticipant(conversation_id=conversation.conversation_id, user_id=uid, position=i)
+        for i, uid in enumerate(ordered)
+    ])
+    await session.commit()
+    await session.refresh(conversation)
+    return conversation
+
+
+async def find_conversation_between(session, user_id: int, other_id: int) -> Optional[Conversation]:
+    """The oldest conversation both users take part in, via the participant index."""
+    other = aliased(ConversationParticipant)
+    result = await session.execute(
+        select(Conversation)
+        .join(ConversationParticipant, ConversationParticipant.conversation_id == Conversation.conversation_id)
+        .join(other, and_(other.conversation_id == Conversation.conversation_id, other.user_id == other_id))
+        .where(ConversationParticipant.user_id == user_id)
+        .order_by(Conversation.conversation_id)
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def inbox(session, user_id: int, counterpart_id_column=None, counterpart_name_column=None) -> List[dict]:
+    """
+    A user's conversations in one query: each row carries the first other
+    participant, its name (when a name table is given, e.g.
+    Instructor.instructor_id / Instructor.instructor_name) and the latest
+    message. Newest conversations first.
+    """
+    me = aliased(ConversationParticipant)
+    other = aliased(ConversationParticipant)
+
+    counterpart = (
+        select(other.user_id.label("counterpart_id"))
+        .where(other.conversation_id == Conversation.conversation_id, other.user_id != user_id)
+        .order_by(other.position)
+        .limit(1)
+        .lateral("counterpart")
+    )
+    latest = (
+        select(Message)
+        .where(Message.conversation_id == Conversation.conversation_id)
+        .order_by(Message.sent_at.desc(), Message.message_id.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    columns = [Conversation, counterpart.c.counterpart_id, latest.c.message_id, latest.c.sender_id, latest.c.text, latest.c.sent_at]
+    if counterpart_name_column is not None:
+        columns.append(counterpart_name_column.label("counterpart_name"))
+    else:
+        columns.append(literal_column("NULL").label("counterpart_name"))
+
+    query = (
+        select(*columns)
+        .join(me, and_(me.conversation_id == Conversation.conversation_id, me.user_id == user_id))
+        .outerjoin(counterpart, true())
+        .outerjoin(latest, true())
+    )
+    if counterpart_id_column is not None:
+        query = query.outerjoin(
+            counterpart_id_column.table, counterpart_id_column == counterpart.c.counterpart_id
+        )
+    query = query.order_by(Conversation.conversation_id.desc())
+
+    out = []
+    for row in await session.execute(query):
+        conversation = row.Conversation
+        last = []
+        if row.message_id is not None:
+            last = [{
+                "message_id": row.message_id,
+                "conversation_id": conversation.conversation_id,
+                "sender_id": row.sender_id,
+                "text": row.text,
+                "sent_at": row.sent_at.isoformat(),
+            }]
+        out.append({
+            "conversation": conversation,
+            "counterpart_id": row.counterpart_id,
+            "counterpart_name": row.counterpart_name,
+            "messages": last,
+        })
+    return out
@@ -0,0 +1,62 @@
+# services/metrics.py
+"""
+Small in-process latency statistics: a fixed-bucket histogram plus count,
+total and max, so recording is O(1) and memory does not grow with traffic.
+"""
+from bisect import bisect_left
+from typing import Optional, Sequence
+import threading
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyStats:
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.histogram = [0] * (len(self.buckets_ms) + 1)
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+            self.histogram[bisect_left(self.buckets_ms, ms)] += 1
+
+    def percentile_ms(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return self.buckets_ms[i] if i < len(self.buckets_ms) else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, total, peak = self.count, self.total_ms, self.max_ms
+            histogram = list(self.histogram)
+        return {
+            "count": count,
+            "totalMs": round(total, 3),
+            "meanMs": round(total / count, 3) if count else None,
+            "maxMs": round(peak, 3),
+            "p50Ms": self.percentile_ms(0.5),
+            "p95Ms": self.percentile_ms(0.95),
+            "p99Ms": self.percentile_ms(0.99),
+            "bucketsMs": list(self.buckets_ms),
+            "histogram": histogram,
+        }
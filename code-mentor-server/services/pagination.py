@@ -0,0 +1,55 @@
+# services/pagination.py
+"""
+Keyset (cursor) pagination over a (timestamp, id) sort key, newest first.
+
+A page is fetched with WHERE (ts, id) < (cursor_ts, cursor_id) ORDER BY
+ts DESC, id DESC LIMIT n, so every page is an index range scan no matter
+how deep the client has scrolled. Cursors are opaque url-safe strings.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = f"{ts.isoformat()}|{row_id}".encode("utf-8")
+    return urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(query, ts_column, id_column, cursor: Optional[str], limit: int):
+    """
+    Adds the keyset condition, ordering and limit to `query`. One extra row
+    is fetched so the caller can tell whether there is a next page; pass
+    the rows to split_page(). The timestamp column must not be NULL.
+    """
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(ts_column, id_column) < tuple_(ts, row_id))
+    return query.order_by(ts_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], limit: int, ts_attr: str, id_attr: str) -> Tuple[List[Any], Optional[str]]:
+    """(rows of this page, cursor for the next page or None)."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, ts_attr), getattr(last, id_attr))
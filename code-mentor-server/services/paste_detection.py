@@ -0,0 +1,189 @@
+# services/paste_detection.py
+"""
+Paste detection engine shared by the keystroke and editor routers.
+
+Every editor change is reduced to a single Edit (what was removed and what
+was inserted, found by a common prefix/suffix scan) and the inserted text is
+scored on a few cheap features: size, timing, newline count and token
+structure. All regexes are precompiled and use single character classes, so
+scoring is linear in the inserted text and never backtracks.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+import re
+
+# -------------------------
+# Thresholds (tunable)
+# -------------------------
+PASTE_MIN_LEN = 10                 # minimal inserted length to consider
+PASTE_TIME_THRESHOLD_SEC = 0.12    # 120 ms (fast)
+PASTE_NEWLINE_DIFF = 2             # multiple new lines threshold
+PASTE_MIN_TOKENS = 2               # several words/identifiers in one insertion
+
+# Runs of code punctuation / whitespace, e.g. "();" or ", {"
+STRUCTURED_PATTERN = re.compile(r"[{}\[\]();,'\"=<>+\-\s]{3,}")
+# Identifiers and numbers
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+# -------------------------
+# Edits and the document model
+# -------------------------
+@dataclass
+class Edit:
+    start: int              # offset of the change in the previous text
+    removed: int            # number of characters replaced
+    inserted: str           # text inserted at `start`
+    delta_time: float       # seconds since the previous change
+    newline_delta: int      # newlines added minus newlines removed
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    # Binary search over slice comparisons: the comparisons run in C and the
+    # compared ranges halve every step, so the total work is O(n).
+    hi = min(len(a), len(b))
+    if a[:hi] == b[:hi]:
+        return hi
+    lo = 0
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    len_a, len_b = len(a), len(b)
+    hi = limit
+    if a[len_a - hi:] == b[len_b - hi:]:
+        return hi
+    lo = 0
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len_a - mid:len_a - lo] == b[len_b - mid:len_b - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def diff_texts(old: str, new: str) -> Tuple[int, int, str]:
+    """
+    Returns (start, removed, inserted) describing how `old` became `new`
+    as one contiguous replacement.
+    """
+    start = _common_prefix_len(old, new)
+    limit = min(len(old), len(new)) - start
+    suffix = _common_suffix_len(old, new, limit) if limit > 0 else 0
+    return start, len(old) - start - suffix, new[start:len(new) - suffix]
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+class DocumentModel:
+    """
+    Server-side copy of one editor buffer. Each update records the change as
+    an Edit, so callers only ever look at the inserted text.
+    """
+    __slots__ = ("text", "updated_at")
+
+    def __init__(self, text: str = "", updated_at: Optional[datetime] = None):
+        self.text = text
+        self.updated_at = updated_at
+
+    def _elapsed(self, at: datetime) -> float:
+        if self.updated_at is None:
+            return 0.0
+        return (at - self.updated_at).total_seconds()
+
+    def replace(self, new_text: str, at: Optional[datetime] = None) -> Edit:
+        """Apply a full-text update (the client sent the whole buffer)."""
+        at = at or _now()
+        start, removed, inserted = diff_texts(self.text, new_text)
+        newline_delta = inserted.count("\n") - self.text.count("\n", start, start + removed)
+        edit = Edit(start, removed, inserted, self._elapsed(at), newline_delta)
+        self.text = new_text
+        self.updated_at = at
+        return edit
+
+    def apply_delta(self, start: int, removed: int, inserted: str, at: Optional[datetime] = None) -> Edit:
+        """Apply an incremental update (offset, replaced length, new text)."""
+        at = at or _now()
+        start = max(0, min(start, len(self.text)))
+        removed = max(0, min(removed, len(self.text) - start))
+        newline_delta = inserted.count("\n") - self.text.count("\n", start, start + removed)
+        edit = Edit(start, removed, inserted, self._elapsed(at), newline_delta)
+        self.text = self.text[:start] + inserted + self.text[start + removed:]
+        self.updated_at = at
+        return edit
+
+
+# -------------------------
+# Scoring
+# -------------------------
+@dataclass
+class PasteScore:
+    length: int
+    newlines: int
+    tokens: int
+    structured: bool
+    fast: Optional[bool]    # None when timing is not meaningful for the caller
+
+    @property
+    def is_paste(self) -> bool:
+        if self.length < PASTE_MIN_LEN or self.fast is False:
+            return False
+        return self.structured or self.newlines >= PASTE_NEWLINE_DIFF or self.tokens >= PASTE_MIN_TOKENS
+
+
+def score_insertion(inserted: str, delta_time: Optional[float] = None, newline_delta: Optional[int] = None) -> PasteScore:
+    """
+    Scores one insertion. `delta_time` is only taken into account when given;
+    callers that see one request per editor change (so any large insertion
+    happened at once) pass None.
+    """
+    length = len(inserted)
+    if length < PASTE_MIN_LEN:
+        # Cheap early exit for ordinary typing
+        return PasteScore(length, 0, 0, False, None)
+
+    tokens = 0
+    for _ in TOKEN_PATTERN.finditer(inserted):
+        tokens += 1
+        if tokens >= PASTE_MIN_TOKENS:
+            break
+
+    return PasteScore(
+        length=length,
+        newlines=inserted.count("\n") if newline_delta is None else newline_delta,
+        tokens=tokens,
+        structured=STRUCTURED_PATTERN.search(inserted) is not None,
+        fast=None if delta_time is None else delta_time < PASTE_TIME_THRESHOLD_SEC,
+    )
+
+
+def score_edit(edit: Edit, use_timing: bool = True) -> PasteScore:
+    return score_insertion(
+        edit.inserted,
+        edit.delta_time if use_timing else None,
+        edit.newline_delta,
+    )
+
+
+def looks_like_paste(prev_code: str, new_code: str, delta_time: float) -> bool:
+    """
+    Detects if the user likely pasted content instead of typing.
+    Heuristics:
+      - inserted length >= PASTE_MIN_LEN
+      - operation happened very fast (delta_time < threshold)
+      - inserted text contains structured code characters, several tokens
+        or multiple newlines
+    """
+    start, removed, inserted = diff_texts(prev_code, new_code)
+    newline_delta = inserted.count("\n") - prev_code.count("\n", start, start + removed)
+    return score_insertion(inserted, delta_time, newline_delta).is_paste
@@ -0,0 +1,287 @@
+# services/paste_index.py
+"""
+Cross-submission paste fingerprint index.
+
+Every recorded paste is indexed in memory by its SHA-256 text hash and, when
+the pasted text is available, by winnowed rolling-hash shingles so that
+near-identical pastes (re-indented, a variable renamed) are found as well.
+Lookups are plain dict/set operations. New pastes are queued and written to
+the paste_fingerprint table in batches by flush_pending(); load_from_db()
+rebuilds the in-memory index on startup without touching the JSON logs.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import logging
+import re
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.future import select
+
+from models.paste_fingerprint import PasteFingerprint
+
+logger = logging.getLogger("services.paste_index")
+
+# -------------------------
+# Shingling parameters
+# -------------------------
+SHINGLE_SIZE = 25             # characters per shingle (after whitespace normalisation)
+WINNOW_WINDOW = 16            # keep the minimum hash of every 16 consecutive shingles
+MAX_SHINGLED_CHARS = 10_000   # only the start of very large pastes is shingled
+MAX_POSTINGS_PER_SHINGLE = 500
+MAX_PENDING = 10_000          # queued pastes kept while the database is unavailable
+
+_MOD = (1 << 61) - 1
+_BASE = 257
+_WHITESPACE = re.compile(r"\s+")
+
+
+def compute_text_hash(text: str) -> str:
+    # Same fingerprint the client sends as `textHash`
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def shingle_fingerprints(text: str) -> List[int]:
+    """
+    Rabin-Karp hashes of every SHINGLE_SIZE-character window, reduced by
+    winnowing to a small, position-independent set of fingerprints.
+    """
+    normalized = _WHITESPACE.sub(" ", text[:MAX_SHINGLED_CHARS]).strip()
+    k = SHINGLE_SIZE
+    if len(normalized) < k:
+        return []
+
+    high = pow(_BASE, k - 1, _MOD)
+    h = 0
+    for ch in normalized[:k]:
+        h = (h * _BASE + ord(ch)) % _MOD
+    hashes = [h]
+    for i in range(k, len(normalized)):
+        h = ((h - ord(normalized[i - k]) * high) * _BASE + ord(normalized[i])) % _MOD
+        hashes.append(h)
+
+    if len(hashes) <= WINNOW_WINDOW:
+        return [min(hashes)]
+
+    selected: Set[int] = set()
+    for i in range(len(hashes) - WINNOW_WINDOW + 1):
+        selected.add(min(hashes[i:i + WINNOW_WINDOW]))
+    # Hashes are below 2**61, so they fit a BIGINT column as they are
+    return sorted(selected)
+
+
+# -------------------------
+# In-memory index
+# -------------------------
+@dataclass(frozen=True)
+class PasteOccurrence:
+    text_hash: str
+    student_id: int
+    assignment_id: Optional[int]
+    seen_at: datetime
+    text_length: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "textHash": self.text_hash,
+            "studentId": self.student_id,
+            "assignmentId": self.assignment_id,
+            "seenAt": self.seen_at.isoformat(),
+            "textLength": self.text_length,
+        }
+
+
+class PasteFingerprintIndex:
+    def __init__(self):
+        self._by_hash: Dict[str, List[PasteOccurrence]] = {}
+        self._students_by_hash: Dict[str, Set[int]] = {}
+        self._by_shingle: Dict[int, List[PasteOccurrence]] = {}
+        self._by_student: Dict[int, List[PasteOccurrence]] = {}
+        self._shingles: Dict[PasteOccurrence, Tuple[int, ...]] = {}
+        # Hashes pasted by two or more different students, maintained on insert
+        self._shared: Set[str] = set()
+        self._pending: List[Tuple[PasteOccurrence, List[int]]] = []
+
+    def _index(self, occurrence: PasteOccurrence, shingles: Iterable[int]) -> None:
+        self._by_hash.setdefault(occurrence.text_hash, []).append(occurrence)
+        students = self._students_by_hash.setdefault(occurrence.text_hash, set())
+        students.add(occurrence.student_id)
+        if len(students) > 1:
+            self._shared.add(occurrence.text_hash)
+        self._by_student.setdefault(occurrence.student_id, []).append(occurrence)
+        shingles = tuple(shingles)
+        if shingles:
+            self._shingles[occurrence] = shingles
+        for shingle in shingles:
+            postings = self._by_shingle.setdefault(shingle, [])
+            if len(postings) < MAX_POSTINGS_PER_SHINGLE:
+                postings.append(occurrence)
+
+    def add(
+        self,
+        student_id: int,
+        assignment_id: Optional[int] = None,
+        text: Optional[str] = None,
+        text_hash: Optional[str] = None,
+        text_length: Optional[int] = None,
+        seen_at: Optional[datetime] = None,
+    ) -> Optional[PasteOccurrence]:
+        """
+        Records one paste. Either the pasted `text` or the client-computed
+        `text_hash` is required; shingles are only available with the text.
+        """
+        if text is None and not text_hash:
+            return None
+        occurrence = PasteOccurrence(
+            text_hash=text_hash or compute_text_hash(text),
+            student_id=student_id,
+            assignment_id=assignment_id,
+            seen_at=seen_at or datetime.now(tz=timezone.utc),
+            text_length=len(text) if text is not None else int(text_length or 0),
+        )
+        shingles = shingle_fingerprints(text) if text else []
+        self._index(occurrence, shingles)
+        self._pending.append((occurrence, shingles))
+        if len(self._pending) > MAX_PENDING:
+            dropped = len(self._pending) - MAX_PENDING
+            del self._pending[:dropped]
+            logger.warning("Paste queue full, dropped %d unsaved fingerprints", dropped)
+        return occurrence
+
+    # ---- lookups ----
+    def by_hash(self, text_hash: str) -> List[PasteOccurrence]:
+        return list(self._by_hash.get(text_hash, ()))
+
+    def shared(self, assignment_id: Optional[int] = None) -> List[dict]:
+        """Identical pastes seen from more than one student."""
+        groups = []
+        for text_hash in self._shared:
+            occurrences = self._by_hash[text_hash]
+            if assignment_id is not None:
+                occurrences = [o for o in occurrences if o.assignment_id == assignment_id]
+                if len({o.student_id for o in occurrences}) < 2:
+                    continue
+            groups.append({
+                "textHash": text_hash,
+                "students": sorted({o.student_id for o in occurrences}),
+                "occurrences": [o.to_dict() for o in occurrences],
+            })
+        groups.sort(key=lambda g: len(g["students"]), reverse=True)
+        return groups
+
+    def similar(self, text: str, exclude_student: Optional[int] = None, limit: int = 20) -> List[dict]:
+        """Pastes sharing shingles with `text`, best matches first."""
+        return self._rank(shingle_fingerprints(text), exclude_student, limit)
+
+    def for_student(self, student_id: int, assignment_id: Optional[int] = None) -> List[dict]:
+        """
+        A student's pastes, each with identical pastes and near matches
+        recorded for other students.
+        """
+        out = []
+        for occurrence in self._by_student.get(student_id, ()):
+            if assignment_id is not None and occurrence.assignment_id != assignment_id:
+                continue
+            identical = [o.to_dict() for o in self._by_hash.get(occurrence.text_hash, ()) if o.student_id != student_id]
+            out.append({
+                **occurrence.to_dict(),
+                "identical": identical,
+                "similar": self._rank(self._shingles.get(occurrence, ()), student_id, 10),
+            })
+        return out
+
+    def _rank(self, shingles, exclude_student: Optional[int], limit: int) -> List[dict]:
+        if not shingles:
+            return []
+        counts: Dict[PasteOccurrence, int] = {}
+        for shingle in shingles:
+            for occurrence in self._by_shingle.get(shingle, ()):
+                if occurrence.student_id != exclude_student:
+                    counts[occurrence] = counts.get(occurrence, 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {**occurrence.to_dict(), "similarity": round(shared / len(shingles), 3)}
+            for occurrence, shared in ranked
+        ]
+
+    # ---- persistence ----
+    async def flush_pending(self, session) -> int:
+        """
+        Writes queued pastes to paste_fingerprint in one INSERT. When that
+        fails on a bad row (e.g. a student or assignment that no longer
+        exists) the batch is retried row by row and the failing rows are
+        dropped; connection errors keep the batch queued for the next flush.
+        """
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        rows = [
+            {
+                "text_hash": o.text_hash,
+                "student_id": o.student_id,
+                "assignment_id": o.assignment_id,
+                "text_length": o.text_length,
+                "shingles": shingles or None,
+                "seen_at": o.seen_at,
+            }
+            for o, shingles in batch
+        ]
+        try:
+            await session.execute(insert(PasteFingerprint), rows)
+            await session.commit()
+            return len(rows)
+        except IntegrityError:
+            await session.rollback()
+        except Exception:
+            # Keep the rows for the next flush (bounded by MAX_PENDING)
+            self._pending = (batch + self._pending)[-MAX_PENDING:]
+            raise
+
+        written = 0
+        for row in rows:
+            try:
+                async with session.begin_nested():
+                    await session.execute(insert(PasteFingerprint), [row])
+                written += 1
+            except IntegrityError:
+                logger.warning(
+                    "Dropped paste fingerprint for student %s, assignment %s: row rejected",
+                    row["student_id"], row["assignment_id"],
+                )
+        await session.commit()
+        return written
+
+    async def load_from_db(self, session) -> int:
+        result = await session.execute(select(PasteFingerprint).order_by(PasteFingerprint.seen_at))
+        count = 0
+        for row in result.scalars():
+            occurrence = PasteOccurrence(
+                text_hash=row.text_hash,
+                student_id=row.student_id,
+                assignment_id=row.assignment_id,
+                seen_at=row.seen_at,
+                text_length=row.text_length or 0,
+            )
+            self._index(occurrence, row.shingles or ())
+            count += 1
+        logger.info("Loaded %d paste fingerprints", count)
+        return count
+
+
+# Process-wide index used by the routers
+paste_index = PasteFingerprintIndex()
+
+FLUSH_INTERVAL_SEC = 5.0
+
+async def flush_periodically(session_factory, interval: float = FLUSH_INTERVAL_SEC):
+    """Background loop started on app startup; persists queued pastes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await paste_index.flush_pending(session)
+        except Exception:
+            logger.exception("Failed to persist paste fingerprints")
@@ -0,0 +1,93 @@
+# services/plan_catalogue.py
+"""
+In-process cache of the plan catalogue.
+
+Plans change rarely and every billing page needs them, so the whole table
+is loaded once and served from memory. A commit that inserts, updates or
+deletes a Plan through the ORM clears the cache in this process and
+invalidates the cached GET /packages/ responses (PLANS tag); changes made
+elsewhere (SQL scripts, other workers) are picked up after
+PLAN_CACHE_TTL_SEC.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models.plan import Plan
+from services.response_cache import PLANS, invalidate_tags
+
+logger = logging.getLogger("services.plan_catalogue")
+
+PLAN_CACHE_TTL_SEC = 300
+
+_PLAN_FIELDS = (
+    "plan_key", "name", "description", "monthly_price", "yearly_price",
+    "instructors", "students", "storage", "features",
+)
+
+
+def plan_to_dict(plan: Plan) -> dict:
+    return {field: getattr(plan, field) for field in _PLAN_FIELDS}
+
+
+class PlanCatalogue:
+    def __init__(self, ttl: float = PLAN_CACHE_TTL_SEC):
+        self.ttl = ttl
+        self._plans: Optional[Dict[str, dict]] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._plans is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def _load(self, session) -> Dict[str, dict]:
+        if self._fresh():
+            return self._plans
+        async with self._lock:
+            if not self._fresh():  # another request may have loaded it meanwhile
+                result = await session.execute(select(Plan).order_by(Plan.plan_id))
+                self._plans = {p.plan_key: plan_to_dict(p) for p in result.scalars().all()}
+                self._loaded_at = time.monotonic()
+            return self._plans
+
+    async def all(self, session) -> List[dict]:
+        return list((await self._load(session)).values())
+
+    async def get(self, session, plan_key: str) -> Optional[dict]:
+        return (await self._load(session)).get(plan_key)
+
+    def invalidate(self) -> None:
+        self._plans = None
+
+
+plan_catalogue = PlanCatalogue()
+_invalidations: Set[asyncio.Task] = set()  # keeps the scheduled tasks referenced until they finish
+
+
+@event.listens_for(Session, "after_flush")
+def _note_plan_writes(session, flush_context):
+    if any(isinstance(obj, Plan) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["plans_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("plans_changed", False):
+        plan_catalogue.invalidate()
+        # after_commit is synchronous; the response cache is invalidated on the loop
+        try:
+            task = asyncio.get_running_loop().create_task(invalidate_tags(PLANS))
+        except RuntimeError:
+            logger.warning("Plans changed outside the event loop; cached responses expire by TTL")
+            return
+        _invalidations.add(task)
+        task.add_done_callback(_invalidations.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("plans_changed", None)
@@ -0,0 +1,248 @@
+# services/provisioning.py
+"""
+Bulk creation of student and instructor accounts for one university.
+
+Records are validated and de-duplicated up front (role, batch of the
+university, username and email unique within the request), then handled
+PROVISION_BATCH at a time:
+
+  1. one lookup per batch drops usernames and emails that already exist;
+  2. the passwords of the remaining records are bcrypt-hashed on the auth
+     worker pool, the next batch's hashing overlapping this batch's writes;
+  3. users are inserted with one INSERT ... ON CONFLICT (username) DO
+     NOTHING RETURNING, their student/instructor rows with one INSERT per
+     role, and the batch is committed.
+
+Bulk hashing takes at most PROVISION_HASH_CONCURRENCY of the hashing slots
+so logins keep being served during an import. provision_users() yields a
+progress event per batch, ready to stream back to the client.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import func, literal, select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+
+from auth.auth import PASSWORD_HASH_CONCURRENCY, hash_password_async
+from database import async_session
+from models.batch import Batch
+from models.instructor import Instructor
+from models.student import Student
+from models.user import User
+
+logger = logging.getLogger("services.provisioning")
+
+PROVISION_BATCH = 500
+MAX_PROVISION_RECORDS = 10000
+PROVISION_HASH_CONCURRENCY = int(os.getenv("PROVISION_HASH_CONCURRENCY", str(max(1, PASSWORD_HASH_CONCURRENCY // 2))))
+ROLES = ("student", "instructor")
+
+CREATED = "created"
+SKIPPED = "skipped"
+INVALID = "invalid"
+FAILED = "failed"
+
+
+def _result(index: int, record: dict, status: str, reason: Optional[str] = None, user_id: Optional[int] = None) -> dict:
+    return {
+        "index": index,
+        "username": record.get("username"),
+        "email": record.get("email"),
+        "status": status,
+        "userId": user_id,
+        "reason": reason,
+    }
+
+
+# -------------------------
+# Validation
+# -------------------------
+def _validate(records: Sequence[dict], batch_ids: Set[int]) -> tuple:
+    """
+    (valid [(index, record)], invalid results); duplicates within the request
+    are invalid. Valid records carry their email stripped and lowercased.
+    """
+    valid, invalid = [], []
+    usernames: Set[str] = set()
+    emails: Set[str] = set()
+    for index, record in enumerate(records):
+        username = record["username"]
+        email = record["email"].strip().lower()
+        if record["role"] not in ROLES:
+            reason = f"role must be one of: {', '.join(ROLES)}"
+        elif record["role"] == "student" and record.get("batch_id") not in batch_ids:
+            reason = "batch_id is not a batch of this university"
+        elif not username or not record["password"] or not record["name"] or not email:
+            reason = "username, password, name and email are required"
+        elif username in usernames:
+            reason = "duplicate username in request"
+        elif email in emails:
+            reason = "duplicate email in request"
+        else:
+            usernames.add(username)
+            emails.add(email)
+            valid.append((index, {**record, "email": email}))
+            continue
+        invalid.append(_result(index, record, INVALID, reason))
+    return valid, invalid
+
+
+async def _university_batches(session, uni_id: int) -> Set[int]:
+    result = await session.execute(select(Batch.batch_id).where(Batch.uni_id == uni_id))
+    return set(result.scalars().all())
+
+
+# -------------------------
+# Per batch
+# -------------------------
+async def _drop_existing(session, batch: List[tuple]) -> tuple:
+    """
+    (records whose username and email are free, skipped results). One query
+    per batch; its transaction is ended before returning, so no connection
+    sits idle in a transaction while the batch's passwords are hashed.
+    """
+    usernames = [record["username"] for _, record in batch]
+    emails = [record["email"] for _, record in batch]
+    query = union(
+        select(literal("username").label("kind"), User.username.label("value")).where(User.username.in_(usernames)),
+        # Case-insensitive, on the lower(email) indexes (migrations/015)
+        select(literal("email"), func.lower(Student.email)).where(func.lower(Student.email).in_(emails)),
+        select(literal("email"), func.lower(Instructor.email)).where(func.lower(Instructor.email).in_(emails)),
+    )
+    taken = {"username": set(), "email": set()}
+    for row in await session.execute(query):
+        taken[row.kind].add(row.value)
+    await session.commit()
+
+    fresh, skipped = [], []
+    for index, record in batch:
+        if record["username"] in taken["username"]:
+            skipped.append(_result(index, record, SKIPPED, "username already exists"))
+        elif record["email"] in taken["email"]:
+            skipped.append(_result(index, record, SKIPPED, "email already registered"))
+        else:
+            fresh.append((index, record))
+    return fresh, skipped
+
+
+async def _hash_passwords(batch: List[tuple], slots: asyncio.Semaphore) -> List[str]:
+    async def one(password: str) -> str:
+        async with slots:
+            return await hash_password_async(password)
+    return await asyncio.gather(*(one(record["password"]) for _, record in batch))
+
+
+async def _insert_batch(session, uni_id: int, batch: List[tuple], hashes: List[str]) -> List[dict]:
+    """Creates the users and their profile rows of one batch and commits."""
+    if not batch:
+        return []
+    statement = (
+        insert(User)
+        .values([
+            {"username": record["username"], "password": password_hash, "role": record["role"]}
+            for (_, record), password_hash in zip(batch, hashes)
+        ])
+        .on_conflict_do_nothing(index_elements=[User.username])
+        .returning(User.user_id, User.username)
+    )
+    user_ids: Dict[str, int] = {row.username: row.user_id for row in await session.execute(statement)}
+
+    students, instructors, results = [], [], []
+    for index, record in batch:
+        user_id = user_ids.get(record["username"])
+        if user_id is None:
+            # Taken by a concurrent request after the lookup
+            results.append(_result(index, record, SKIPPED, "username already exists"))
+            continue
+        if record["role"] == "student":
+            students.append({
+                "student_id": user_id,
+                "student_name": record["name"],
+                "email": record["email"],
+                "contact_no": record.get("contact_no"),
+                "index_no": record.get("index_no"),
+                "uni_id": uni_id,
+                "batch_id": record["batch_id"],
+            })
+        else:
+            instructors.append({
+                "instructor_id": user_id,
+                "instructor_name": record["name"],
+                "email": record["email"],
+                "contact_no": record.get("contact_no"),
+                "index_no": record.get("index_no"),
+                "uni_id": uni_id,
+            })
+        results.append(_result(index, record, CREATED, user_id=user_id))
+
+    if students:
+        await session.execute(insert(Student).values(students))
+    if instructors:
+        await session.execute(insert(Instructor).values(instructors))
+    await session.commit()
+    return results
+
+
+# -------------------------
+# Entry point
+# -------------------------
+async def provision_users(uni_id: int, records: Sequence[dict], batch_size: int = PROVISION_BATCH) -> AsyncIterator[dict]:
+    """
+    Creates the accounts and yields progress events: "started", one "batch"
+    per batch (with a result per record) and "done" with the totals. A batch
+    that fails is rolled back and reported; later batches still run.
+    """
+    started = time.perf_counter()
+    counts = {CREATED: 0, SKIPPED: 0, INVALID: 0, FAILED: 0}
+    slots = asyncio.Semaphore(PROVISION_HASH_CONCURRENCY)
+
+    async with async_session() as session:
+        valid, invalid = _validate(records, await _university_batches(session, uni_id))
+        await session.commit()  # not idle in a transaction while the client reads "started"
+        counts[INVALID] = len(invalid)
+        batches = [valid[i:i + batch_size] for i in range(0, len(valid), batch_size)]
+        yield {"event": "started", "total": len(records), "batches": len(batches), "invalid": invalid}
+
+        processed = len(invalid)
+        hashing: Optional[asyncio.Task] = None
+        try:
+            if batches:
+                fresh, skipped = await _drop_existing(session, batches[0])
+                hashing = asyncio.create_task(_hash_passwords(fresh, slots))
+            for number in range(len(batches)):
+                batch, batch_skipped = fresh, skipped
+                hashes = await hashing
+                hashing = None
+                # Start hashing the next batch while this one is written
+                if number + 1 < len(batches):
+                    fresh, skipped = await _drop_existing(session, batches[number + 1])
+                    hashing = asyncio.create_task(_hash_passwords(fresh, slots))
+
+                try:
+                    results = await _insert_batch(session, uni_id, batch, hashes)
+                except IntegrityError as e:
+                    await session.rollback()
+                    logger.warning("Provisioning batch %d for university %s rolled back: %s", number, uni_id, e.orig)
+                    results = [_result(index, record, FAILED, "conflicting username or email, retry the record")
+                               for index, record in batch]
+                results = batch_skipped + results
+
+                for result in results:
+                    counts[result["status"]] += 1
+                processed += len(batches[number])
+                yield {
+                    "event": "batch",
+                    "batch": number,
+                    "processed": processed,
+                    "total": len(records),
+                    "results": sorted(results, key=lambda result: result["index"]),
+                }
+        finally:
+            if hashing is not None:
+                hashing.cancel()
+
+    yield {"event": "done", "summary": counts, "elapsed": round(time.perf_counter() - started, 3)}
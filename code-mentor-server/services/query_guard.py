@@ -0,0 +1,225 @@
+# services/query_guard.py
+"""
+Query counting and N+1 detection per request.
+
+The statement hook of services/instrumentation.py (instrument_engine)
+passes every SQL statement here; it is fingerprinted (whitespace
+collapsed, literals and bind parameters replaced by ?, IN and VALUES lists
+collapsed) and counted with its fingerprint in the current scope. A
+scope is a sampled HTTP request (QueryGuardMiddleware) or a block of test
+code (assert_max_queries). A scope is in violation when it runs more than
+max_queries statements, or the same statement shape more than
+repeat_threshold times, the signature of a query issued in a loop.
+
+QUERY_GUARD_MODE selects what a violating request does:
+  off    no counting;
+  log    log a warning with the top fingerprints when the request ends
+         (the default; QUERY_GUARD_SAMPLE_RATE samples requests);
+  raise  raise QueryBudgetExceeded from the statement that crosses a limit,
+         so development servers and test runs fail loudly.
+Any other value is a configuration error (ValueError at import).
+
+Recent violations are kept for GET /db/query-guard.
+"""
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+from services.instrumentation import add_statement_observer, instrument_engine
+
+logger = logging.getLogger("services.query_guard")
+
+OFF = "off"
+LOG = "log"
+RAISE = "raise"
+
+MODES = (OFF, LOG, RAISE)
+
+
+def _mode_from_env() -> str:
+    mode = os.getenv("QUERY_GUARD_MODE", LOG).strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"QUERY_GUARD_MODE must be one of {', '.join(MODES)}, not {mode!r}")
+    return mode
+
+
+QUERY_GUARD_MODE = _mode_from_env()
+QUERY_GUARD_SAMPLE_RATE = float(os.getenv("QUERY_GUARD_SAMPLE_RATE", "1.0"))
+QUERY_GUARD_MAX_QUERIES = int(os.getenv("QUERY_GUARD_MAX_QUERIES", "50"))
+QUERY_GUARD_REPEAT_THRESHOLD = int(os.getenv("QUERY_GUARD_REPEAT_THRESHOLD", "10"))
+MAX_RECENT_VIOLATIONS = 100
+
+recent_violations: deque = deque(maxlen=MAX_RECENT_VIOLATIONS)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A scope ran more statements, or repeated a statement more often, than allowed."""
+
+
+# -------------------------
+# Fingerprints
+# -------------------------
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Shape of a statement: the same for every execution of the same query in a loop."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(?)", shape)
+    return _ROWS.sub(r"\1", shape)
+
+
+# -------------------------
+# Scopes
+# -------------------------
+class QueryScope:
+    def __init__(self, label: str, max_queries: Optional[int], repeat_threshold: Optional[int], mode: str):
+        self.label = label
+        self.max_queries = max_queries
+        self.repeat_threshold = repeat_threshold
+        self.mode = mode
+        self.count = 0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str) -> None:
+        shape = fingerprint(statement)
+        self.count += 1
+        self.shapes[shape] += 1
+        if self.mode == RAISE and self.violations():
+            raise QueryBudgetExceeded(self.describe())
+
+    def violations(self) -> List[str]:
+        found = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            found.append(f"{self.count} queries (limit {self.max_queries})")
+        if self.repeat_threshold is not None and self.shapes:
+            shape, repeats = self.shapes.most_common(1)[0]
+            if repeats > self.repeat_threshold:
+                found.append(f"statement repeated {repeats} times (limit {self.repeat_threshold}), likely N+1")
+        return found
+
+    def top(self, limit: int = 5) -> List[dict]:
+        return [{"count": count, "statement": shape[:300]} for shape, count in self.shapes.most_common(limit)]
+
+    def describe(self) -> str:
+        lines = [f"{self.label}: {'; '.join(self.violations())}"]
+        lines += [f"  {entry['count']:4d}x {entry['statement']}" for entry in self.top()]
+        return "\n".join(lines)
+
+
+_scope: ContextVar[Optional[QueryScope]] = ContextVar("query_scope", default=None)
+
+
+def _count(statement: str) -> None:
+    scope = _scope.get()
+    if scope is not None:
+        scope.record(statement)
+
+
+add_statement_observer(_count)
+
+
+def install(engine) -> None:
+    """Counts the statements of every scope on this (async) engine; shares the metrics hook."""
+    instrument_engine(engine)
+
+
+@contextmanager
+def assert_max_queries(
+    max_queries: int,
+    repeat_threshold: Optional[int] = None,
+    label: str = "block",
+    mode: str = LOG,
+) -> Iterator[QueryScope]:
+    """
+    Test helper: fails with QueryBudgetExceeded when the block runs more than
+    max_queries statements (or one statement shape more than repeat_threshold
+    times). Works around awaited code in the same task:
+
+        with assert_max_queries(3):
+            await client.get("/messages/conversations")
+
+    By default the block runs to completion and fails on exit; mode=RAISE
+    fails from the statement that crosses the limit, with its traceback.
+    """
+    if mode not in (LOG, RAISE):
+        raise ValueError(f"mode must be {LOG!r} or {RAISE!r}, not {mode!r}")
+    scope = QueryScope(label, max_queries, repeat_threshold, mode)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+    if scope.violations():
+        raise QueryBudgetExceeded(scope.describe())
+
+
+# -------------------------
+# Requests
+# -------------------------
+def _sampled() -> bool:
+    if QUERY_GUARD_MODE == OFF:
+        return False
+    return QUERY_GUARD_SAMPLE_RATE >= 1.0 or random.random() < QUERY_GUARD_SAMPLE_RATE
+
+
+class QueryGuardMiddleware:
+    """ASGI middleware opening a query scope for sampled HTTP requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _sampled():
+            await self.app(scope, receive, send)
+            return
+
+        guard = QueryScope(
+            f"{scope.get('method', '')} {scope.get('path', '')}",
+            QUERY_GUARD_MAX_QUERIES,
+            QUERY_GUARD_REPEAT_THRESHOLD,
+            QUERY_GUARD_MODE,
+        )
+        token = _scope.set(guard)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _scope.reset(token)
+            problems = guard.violations()
+            if problems:
+                route = getattr(scope.get("route"), "path", None) or guard.label
+                recent_violations.append({
+                    "at": time.time(),
+                    "route": route,
+                    "path": scope.get("path", ""),
+                    "queries": guard.count,
+                    "violations": problems,
+                    "top": guard.top(),
+                })
+                logger.warning("Query budget exceeded on %s\n%s", route, guard.describe())
+
+
+def status() -> Dict[str, object]:
+    return {
+        "mode": QUERY_GUARD_MODE,
+        "sampleRate": QUERY_GUARD_SAMPLE_RATE,
+        "maxQueries": QUERY_GUARD_MAX_QUERIES,
+        "repeatThreshold": QUERY_GUARD_REPEAT_THRESHOLD,
+        "recentViolations": list(recent_violations),
+    }
@@ -0,0 +1,147 @@
+# services/report_fanout.py
+"""
+Adds a new concept to every progress report of a batch.
+
+The concept is appended in Postgres with jsonb_set, one UPDATE per chunk
+of FANOUT_CHUNK students walked in student_id order, so no report is
+loaded into the application and each transaction stays short. Reports
+that already contain the concept id are skipped, which makes a retried
+or duplicated job harmless.
+
+Each fan-out runs as a tracked background job; its progress and any error
+can be read back with get_job().
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import func, select, text
+
+from database import async_session
+from models.student import Student
+from services.topic_mastery import class_averages
+
+logger = logging.getLogger("services.report_fanout")
+
+FANOUT_CHUNK = 1000
+MAX_TRACKED_JOBS = 200
+
+_APPEND_CHUNK = text("""
+    WITH chunk AS (
+        SELECT student_id FROM student
+        WHERE batch_id = :batch_id AND student_id > :after
+        ORDER BY student_id
+        LIMIT :chunk
+    ), updated AS (
+        UPDATE progress_report pr
+        SET content = jsonb_set(
+            COALESCE(pr.content, '{}'::JSONB),
+            '{concepts}',
+            COALESCE(pr.content -> 'concepts', '[]'::JSONB) || jsonb_build_array(CAST(:concept AS JSONB))
+        )
+        FROM chunk
+        WHERE pr.student_id = chunk.student_id
+          AND NOT COALESCE(pr.content -> 'concepts', '[]'::JSONB)
+                  @> jsonb_build_array(jsonb_build_object('id', CAST(:concept AS JSONB) -> 'id'))
+        RETURNING pr.student_id
+    )
+    SELECT (SELECT max(student_id) FROM chunk) AS last_id,
+           (SELECT count(*) FROM chunk) AS students,
+           (SELECT count(*) FROM updated) AS updated
+""")
+
+
+class FanoutJob:
+    __slots__ = ("job_id", "batch_id", "concept_id", "status", "total", "processed",
+                 "updated", "error", "started_at", "finished_at")
+
+    def __init__(self, batch_id: int, concept_id):
+        self.job_id = uuid.uuid4().hex
+        self.batch_id = batch_id
+        self.concept_id = concept_id
+        self.status = "pending"  # pending | running | done | failed
+        self.total = None
+        self.processed = 0
+        self.updated = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+_jobs: "OrderedDict[str, FanoutJob]" = OrderedDict()
+_tasks = set()  # strong references, so running jobs are not garbage collected
+
+
+def get_job(job_id: str) -> Optional[FanoutJob]:
+    return _jobs.get(job_id)
+
+
+def _prepare(concept: dict) -> dict:
+    concept = dict(concept)
+    if isinstance(concept.get("topics"), list):
+        concept["topics"] = [{**topic, "completed": False} for topic in concept["topics"]]
+    return concept
+
+
+async def append_concept(batch_id: int, concept: dict, job: Optional[FanoutJob] = None) -> int:
+    """Appends `concept` to the batch's progress reports. Returns the number of reports changed."""
+    payload = json.dumps(_prepare(concept))
+    after, updated = 0, 0
+    if job is not None:
+        async with async_session() as session:
+            job.total = await session.scalar(
+                select(func.count()).select_from(Student).where(Student.batch_id == batch_id)
+            )
+    while True:
+        async with async_session() as session:
+            row = (await session.execute(
+                _APPEND_CHUNK, {"batch_id": batch_id, "after": after, "chunk": FANOUT_CHUNK, "concept": payload}
+            )).one()
+            await session.commit()
+        if not row.students:
+            return updated
+        after = row.last_id
+        updated += row.updated
+        if job is not None:
+            job.processed += row.students
+            job.updated = updated
+        if row.students < FANOUT_CHUNK:
+            return updated
+
+
+async def _run(job: FanoutJob, concept: dict) -> None:
+    job.status = "running"
+    job.started_at = time.time()
+    try:
+        await append_concept(job.batch_id, concept, job)
+        class_averages.invalidate(job.batch_id)
+        job.status = "done"
+        logger.info("Concept %s added to %d reports of batch %s", job.concept_id, job.updated, job.batch_id)
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        logger.exception("Concept fan-out %s failed for batch %s", job.job_id, job.batch_id)
+    finally:
+        job.finished_at = time.time()
+
+
+def start_concept_fanout(batch_id: int, concept: dict) -> FanoutJob:
+    """Schedules append_concept() on the running loop and returns its job."""
+    job = FanoutJob(batch_id, concept.get("id"))
+    _jobs[job.job_id] = job
+    while len(_jobs) > MAX_TRACKED_JOBS:
+        _jobs.popitem(last=False)
+    # A fresh context: the job outlives the request, so it must not count
+    # towards the request's query scope (services/query_guard.py) or metrics
+    task = asyncio.create_task(_run(job, concept), context=contextvars.Context())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
@@ -0,0 +1,302 @@
+# services/response_cache.py
+"""
+Response cache for read-heavy GET endpoints.
+
+An endpoint opts in with @cached_response(ttl, tags) and its router is
+created with route_class=CachedRoute. The fully serialized 200 response
+(after response_model filtering) is stored under a key built from the path
+and query string, and from the Authorization header when the policy varies
+on it, so protected endpoints are cached per token. For those the bearer
+token is verified before the lookup: an expired or invalid token never
+gets a cached response and reaches the auth dependency instead.
+
+Invalidation is by tag: every entry remembers the version of each of its
+tags when it was computed, and write endpoints call invalidate_tags(...)
+to bump those versions, which turns every older entry into a miss. An
+invalidation that lands while a response is being computed therefore
+cannot be overwritten by that (stale) response.
+
+Responses carry an ETag; a matching If-None-Match gets an empty 304.
+
+The default backend is an in-process LRU. Setting RESPONSE_CACHE_URL to a
+redis:// URL shares entries and tag versions between workers (requires
+the redis package).
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from auth.auth import verify_token
+
+logger = logging.getLogger("services.response_cache")
+
+DEFAULT_TTL_SEC = 60
+DEFAULT_MAX_ENTRIES = 1024
+CACHE_STATUS_HEADER = "X-Cache"
+
+# Tags shared by the cached reads and the writes that invalidate them
+SUBMISSIONS = "submissions"
+ASSIGNMENTS = "assignments"
+BATCHES = "batches"
+CONCEPTS = "concepts"
+PLANS = "plans"
+
+_POLICY_ATTR = "__response_cache__"
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: Optional[str]
+    etag: str
+    versions: Tuple[int, ...]
+
+
+# -------------------------
+# Backends
+# -------------------------
+class CacheBackend:
+    """Storage for entries and tag versions. Subclass to plug in a shared store."""
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        raise NotImplementedError
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires, entry = item
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisBackend(CacheBackend):
+    """Entries and tag versions in Redis, shared by every worker."""
+
+    PREFIX = "response-cache:"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency, only needed for a shared cache
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raw = await self._redis.get(self.PREFIX + key)
+        if raw is None:
+            return None
+        header, body = raw.split(b"\n", 1)
+        meta = json.loads(header)
+        return CachedResponse(body=body, media_type=meta["m"], etag=meta["e"], versions=tuple(meta["v"]))
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        header = json.dumps({"m": entry.media_type, "e": entry.etag, "v": list(entry.versions)}).encode("utf-8")
+        await self._redis.set(self.PREFIX + key, header + b"\n" + entry.body, px=int(ttl * 1000))
+
+    async def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        if not tags:
+            return ()
+        values = await self._redis.mget([self.PREFIX + "tag:" + tag for tag in tags])
+        return tuple(int(v) if v is not None else 0 for v in values)
+
+    async def bump(self, tags: Iterable[str]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self.PREFIX + "tag:" + tag)
+            await pipe.execute()
+
+
+def _backend_from_env() -> CacheBackend:
+    url = os.getenv("RESPONSE_CACHE_URL", "")
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    return MemoryBackend(int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+
+
+# -------------------------
+# Cache
+# -------------------------
+class ResponseCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def use(self, backend: CacheBackend) -> None:
+        """Swaps the backend (e.g. a shared store configured at startup)."""
+        self.backend = backend
+
+    async def lookup(self, key: str, tags: Sequence[str]) -> Tuple[Optional[CachedResponse], Tuple[int, ...]]:
+        """(entry if present and none of its tags changed, current tag versions)."""
+        versions = await self.backend.tag_versions(tags)
+        entry = await self.backend.get(key)
+        if entry is not None and entry.versions != versions:
+            entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry, versions
+
+    async def store(self, key: str, body: bytes, media_type: Optional[str], versions: Tuple[int, ...], ttl: float) -> CachedResponse:
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        entry = CachedResponse(body=body, media_type=media_type, etag=etag, versions=versions)
+        await self.backend.set(key, entry, ttl)
+        return entry
+
+    async def invalidate(self, *tags: str) -> None:
+        await self.backend.bump(tags)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+        }
+
+
+response_cache = ResponseCache(_backend_from_env())
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """Called by write endpoints after their commit. Never fails the write."""
+    try:
+        await response_cache.invalidate(*tags)
+    except Exception:
+        logger.exception("Failed to invalidate cached responses for %s", tags)
+
+
+# -------------------------
+# Endpoint integration
+# -------------------------
+@dataclass
+class CachePolicy:
+    ttl: float
+    tags: Tuple[str, ...]
+    vary_on_auth: bool
+
+    def key(self, request: Request) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        key = f"{request.url.path}?{query}"
+        if self.vary_on_auth:
+            auth = request.headers.get("authorization", "")
+            key += "|" + hashlib.sha256(auth.encode("utf-8")).hexdigest()[:32]
+        return key
+
+
+def cached_response(ttl: float = DEFAULT_TTL_SEC, tags: Sequence[str] = (), vary_on_auth: bool = False) -> Callable:
+    """
+    Marks a GET endpoint as cacheable. Takes effect on routers created with
+    route_class=CachedRoute. Set vary_on_auth for endpoints behind an auth
+    dependency.
+    """
+    policy = CachePolicy(ttl=ttl, tags=tuple(tags), vary_on_auth=vary_on_auth)
+
+    def decorator(endpoint: Callable) -> Callable:
+        setattr(endpoint, _POLICY_ATTR, policy)
+        return endpoint
+    return decorator
+
+
+def _token_valid(request: Request) -> bool:
+    """Whether the request carries a bearer token verify_token accepts (now, not when cached)."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        verify_token(token)
+    except HTTPException:
+        return False
+    return True
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class CachedRoute(APIRoute):
+    """APIRoute that serves endpoints marked with @cached_response from the cache."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        policy: Optional[CachePolicy] = getattr(self.endpoint, _POLICY_ATTR, None)
+        if policy is None:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+            if policy.vary_on_auth and not _token_valid(request):
+                return await handler(request)  # the auth dependency answers 401
+            key = policy.key(request)
+            try:
+                entry, versions = await response_cache.lookup(key, policy.tags)
+            except Exception:
+                logger.exception("Response cache lookup failed")
+                return await handler(request)
+
+            status = "HIT"
+            if entry is None:
+                status = "MISS"
+                response = await handler(request)
+                body = getattr(response, "body", None)
+                if response.status_code != 200 or body is None:
+                    return response
+                try:
+                    entry = await response_cache.store(key, body, response.media_type, versions, policy.ttl)
+                except Exception:
+                    logger.exception("Response cache store failed")
+                    return response
+
+            headers = {"ETag": entry.etag, CACHE_STATUS_HEADER: status}
+            if _etag_matches(request, entry.etag):
+                return Response(status_code=304, headers=headers)
+            return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+        return cached_handler
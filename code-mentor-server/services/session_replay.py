@@ -0,0 +1,230 @@
+# services/session_replay.py
+"""
+Replay storage for editor sessions.
+
+Every change the editor socket applies is appended to a per-session delta
+segment file. Every SNAPSHOT_EVERY deltas the full document is written to a
+snapshot file and one small entry (time, byte offset into the delta file,
+byte offset into the snapshot file) is appended to the session's index.
+
+Reconstructing the document at time t is a bisect over the index, one seek
+into the snapshot file and at most SNAPSHOT_EVERY deltas read from a seek
+position in the delta file, so scrubbing cost does not grow with the length
+of the session. Readers are generators, so routers can stream frames.
+"""
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("services.session_replay")
+
+REPLAY_DIR = Path("logs") / "replay"
+SNAPSHOT_EVERY = 200   # deltas between two snapshots
+MAX_CACHED_INDEXES = 256
+
+
+def _paths(session_id: str) -> Tuple[Path, Path, Path]:
+    base = REPLAY_DIR / session_id
+    return (
+        base.with_suffix(".deltas.jsonl"),
+        base.with_suffix(".snapshots.jsonl"),
+        base.with_suffix(".index.jsonl"),
+    )
+
+
+def _dump(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _apply(text: str, delta: dict) -> str:
+    start = max(0, min(delta["s"], len(text)))
+    end = min(len(text), start + max(0, delta["r"]))
+    return text[:start] + delta["x"] + text[end:]
+
+
+# -------------------------
+# Writer
+# -------------------------
+class ReplayRecorder:
+    """
+    Appends one session's changes. Files are kept open for the lifetime of
+    the editor socket and appended to in binary mode so the recorded offsets
+    are exact byte positions.
+    """
+
+    def __init__(self, session_id: str, snapshot_every: int = SNAPSHOT_EVERY):
+        REPLAY_DIR.mkdir(parents=True, exist_ok=True)
+        self.session_id = session_id
+        self.snapshot_every = snapshot_every
+        deltas, snapshots, index = _paths(session_id)
+        self._deltas = deltas.open("ab")
+        self._snapshots = snapshots.open("ab")
+        self._index = index.open("ab")
+        self._since_snapshot = 0
+        self.has_snapshot = False  # replays of this recorder's deltas need a base snapshot first
+
+    def snapshot(self, text: str, at: Optional[float] = None) -> None:
+        """Writes the full document; replays can start from here."""
+        at = time.time() if at is None else at
+        self._deltas.flush()
+        self._snapshots.flush()
+        entry = {
+            "t": at,
+            "d": self._deltas.tell(),
+            "s": self._snapshots.tell(),
+        }
+        self._snapshots.write(_dump({"t": at, "text": text}))
+        self._snapshots.flush()
+        self._index.write(_dump(entry))
+        self._index.flush()
+        self._since_snapshot = 0
+        self.has_snapshot = True
+
+    def record(self, start: int, removed: int, inserted: str, document_text: str, at: Optional[float] = None) -> None:
+        """
+        Appends one change. `document_text` is the buffer after the change
+        and is only written when a snapshot is due.
+        """
+        at = time.time() if at is None else at
+        self._deltas.write(_dump({"t": at, "s": start, "r": removed, "x": inserted}))
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot(document_text, at)
+
+    def close(self) -> None:
+        for f in (self._deltas, self._snapshots, self._index):
+            try:
+                f.close()
+            except Exception:
+                logger.exception("Failed to close replay file for %s", self.session_id)
+
+
+# -------------------------
+# Reader
+# -------------------------
+@dataclass
+class _Index:
+    size: int
+    times: List[float]
+    delta_offsets: List[int]
+    snapshot_offsets: List[int]
+
+
+# session_id -> index, reloaded when the index file grows; least recently
+# used sessions are dropped beyond MAX_CACHED_INDEXES
+_index_cache: "OrderedDict[str, _Index]" = OrderedDict()
+
+
+def _load_index(session_id: str) -> Optional[_Index]:
+    _, _, index_path = _paths(session_id)
+    try:
+        size = os.path.getsize(index_path)
+    except OSError:
+        return None
+    cached = _index_cache.get(session_id)
+    if cached is not None and cached.size == size:
+        _index_cache.move_to_end(session_id)
+        return cached
+
+    times, delta_offsets, snapshot_offsets = [], [], []
+    with index_path.open("rb") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            times.append(entry["t"])
+            delta_offsets.append(entry["d"])
+            snapshot_offsets.append(entry["s"])
+    if not times:
+        return None
+    index = _Index(size, times, delta_offsets, snapshot_offsets)
+    _index_cache[session_id] = index
+    _index_cache.move_to_end(session_id)
+    while len(_index_cache) > MAX_CACHED_INDEXES:
+        _index_cache.popitem(last=False)
+    return index
+
+
+def _read_snapshot(session_id: str, offset: int) -> dict:
+    _, snapshots, _ = _paths(session_id)
+    with snapshots.open("rb") as f:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+
+def _iter_deltas(session_id: str, offset: int) -> Iterator[dict]:
+    deltas, _, _ = _paths(session_id)
+    with deltas.open("rb") as f:
+        f.seek(offset)
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Partially written last line
+                return
+
+
+def _seek(session_id: str, at: float) -> Optional[Tuple[_Index, int, dict]]:
+    index = _load_index(session_id)
+    if index is None:
+        return None
+    pos = max(0, bisect_right(index.times, at) - 1)
+    return index, pos, _read_snapshot(session_id, index.snapshot_offsets[pos])
+
+
+def session_bounds(session_id: str) -> Optional[Tuple[float, float]]:
+    """(first, last) recorded time of a session, or None if nothing was recorded."""
+    index = _load_index(session_id)
+    if index is None:
+        return None
+    end = index.times[-1]
+    for delta in _iter_deltas(session_id, index.delta_offsets[-1]):
+        end = delta["t"]
+    return index.times[0], end
+
+
+def document_at(session_id: str, at: float) -> Optional[str]:
+    """The document as it was at time `at` (epoch seconds)."""
+    found = _seek(session_id, at)
+    if found is None:
+        return None
+    index, pos, snapshot = found
+    text = snapshot["text"]
+    for delta in _iter_deltas(session_id, index.delta_offsets[pos]):
+        if delta["t"] > at:
+            break
+        text = _apply(text, delta)
+    return text
+
+
+def iter_frames(session_id: str, start: float, end: Optional[float] = None) -> Iterator[dict]:
+    """
+    Replay frames from `start` to `end`: one "snapshot" frame with the full
+    document at `start`, then one "delta" frame per change. The client applies
+    deltas to its copy, so each frame stays small.
+    """
+    found = _seek(session_id, start)
+    if found is None:
+        return
+    index, pos, snapshot = found
+    text = snapshot["text"]
+    started = False
+    for delta in _iter_deltas(session_id, index.delta_offsets[pos]):
+        if end is not None and delta["t"] > end:
+            break
+        if delta["t"] <= start:
+            text = _apply(text, delta)
+            continue
+        if not started:
+            yield {"type": "snapshot", "t": start, "text": text}
+            started = True
+        yield {"type": "delta", "t": delta["t"], "start": delta["s"], "removed": delta["r"], "text": delta["x"]}
+    if not started:
+        yield {"type": "snapshot", "t": start, "text": text}
@@ -0,0 +1,70 @@
+# services/submission_artifacts.py
+"""
+Reads and writes of submission content (code, output, evaluations).
+
+Each top-level report key is one submission_artifact row, so callers load
+only the kinds they need and an update rewrites only the rows it changes:
+grading touches the small instructor-evaluation row, never the code.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from models.submission_artifact import SubmissionArtifact
+
+CODE = "code"
+OUTPUT = "output"
+PASTE = "paste"
+AI_EVALUATION = "ai-evaluation"
+INSTRUCTOR_EVALUATION = "instructor-evaluation"
+
+
+async def load_artifacts(
+    session,
+    submission_ids: Iterable[int],
+    kinds: Optional[Iterable[str]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """{submission_id: report dict} for many submissions in one query."""
+    ids = list(submission_ids)
+    out: Dict[int, Dict[str, Any]] = {sid: {} for sid in ids}
+    if not ids:
+        return out
+    query = select(SubmissionArtifact.submission_id, SubmissionArtifact.kind, SubmissionArtifact.content).where(
+        SubmissionArtifact.submission_id.in_(ids)
+    )
+    if kinds is not None:
+        query = query.where(SubmissionArtifact.kind.in_(list(kinds)))
+    for row in await session.execute(query):
+        out[row.submission_id][row.kind] = row.content
+    return out
+
+
+async def load_report(session, submission_id: int, kinds: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    return (await load_artifacts(session, [submission_id], kinds))[submission_id]
+
+
+async def put_artifacts(session, submission_id: int, content: Dict[str, Any], replace: bool = False) -> None:
+    """
+    Upserts one row per key of `content`. Rows whose content did not change
+    are not rewritten. With replace=True, kinds missing from `content` are
+    deleted (a resubmission replaces the whole report). Does not commit.
+    """
+    if replace:
+        stale = delete(SubmissionArtifact).where(SubmissionArtifact.submission_id == submission_id)
+        if content:
+            stale = stale.where(SubmissionArtifact.kind.not_in(list(content)))
+        await session.execute(stale)
+    if not content:
+        return
+
+    stmt = insert(SubmissionArtifact).values([
+        {"submission_id": submission_id, "kind": kind, "content": value}
+        for kind, value in content.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SubmissionArtifact.submission_id, SubmissionArtifact.kind],
+        set_={"content": stmt.excluded.content, "updated_at": func.now()},
+        where=SubmissionArtifact.content.is_distinct_from(stmt.excluded.content),
+    )
+    await session.execute(stmt)
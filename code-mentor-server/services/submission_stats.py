@@ -0,0 +1,68 @@
+# services/submission_stats.py
+"""
+Shared submission queries: list filters and the dashboard aggregates.
+
+Counts are computed in Postgres with count(*) FILTER (WHERE ...), so one
+round trip returns every figure and no submission rows (or their JSONB
+reports) are loaded into the application.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+
+from models.assignment import Assignment
+from models.student import Student
+from models.submission import Submission
+
+# submission.status is maintained from report->'instructor-evaluation' by a
+# trigger (migrations/003) and indexed together with assignment_id.
+IS_GRADED = Submission.status == "Graded"
+# No evaluation, no status, "Pending" or any other non-graded status
+IS_PENDING = Submission.status != "Graded"
+
+
+def submission_filters(
+    assignment_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+    batch_id: Optional[int] = None,
+    instructor_id: Optional[int] = None,
+    status: Optional[str] = None,
+) -> List:
+    """
+    WHERE conditions on submission. Batch and instructor are matched through
+    subqueries, so callers do not need to join student or assignment.
+    """
+    conditions = []
+    if assignment_id is not None:
+        conditions.append(Submission.assignment_id == assignment_id)
+    if student_id is not None:
+        conditions.append(Submission.student_id == student_id)
+    if batch_id is not None:
+        conditions.append(Submission.student_id.in_(
+            select(Student.student_id).where(Student.batch_id == batch_id)
+        ))
+    if instructor_id is not None:
+        conditions.append(Submission.assignment_id.in_(
+            select(Assignment.assignment_id).where(Assignment.instructor_id == instructor_id)
+        ))
+    if status:
+        conditions.append(Submission.status == status)
+    return conditions
+
+
+async def grading_counts(
+    session,
+    assignment_id: Optional[int] = None,
+    student_id: Optional[int] = None,
+) -> Dict[str, int]:
+    """{"total", "graded", "pending"} in a single aggregate query."""
+    query = select(
+        func.count().label("total"),
+        func.count().filter(IS_GRADED).label("graded"),
+        func.count().filter(IS_PENDING).label("pending"),
+    ).select_from(Submission).where(
+        *submission_filters(assignment_id=assignment_id, student_id=student_id)
+    )
+
+    row = (await session.execute(query)).one()
+    return {"total": row.total, "graded": row.graded, "pending": row.pending}
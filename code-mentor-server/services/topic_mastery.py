@@ -0,0 +1,125 @@
+# services/topic_mastery.py
+"""
+Per-student topic mastery and the batch aggregates built on it.
+
+A submission marks the topics of its assignment's topic map as completed
+with one INSERT ... ON CONFLICT DO NOTHING into student_topic_mastery; only
+the newly completed topics come back, so the progress report is updated
+for those alone. Class averages are one aggregate query per batch, cached
+for CLASS_AVERAGE_TTL_SEC, and progress over time is read from the
+completion timestamps.
+"""
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, select, text
+
+from models.student_topic_mastery import StudentTopicMastery
+
+CLASS_AVERAGE_TTL_SEC = 300
+
+# Topics of the assignment's topic map that exist in the student's batch
+# conceptual map; returns only the rows that were not there yet.
+_RECORD_MASTERY = text("""
+    INSERT INTO student_topic_mastery (student_id, concept_id, topic_id, assignment_id, completed_at)
+    SELECT DISTINCT s.student_id, (cc ->> 'id')::INTEGER, (ct ->> 'id')::INTEGER, tm.assignment_id, :completed_at
+    FROM student s
+    JOIN conceptual_map cm ON cm.batch_id = s.batch_id
+    JOIN topic_map tm ON tm.assignment_id = :assignment_id
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(cm.content -> 'concepts') = 'array' THEN cm.content -> 'concepts' ELSE '[]'::JSONB END
+    ) cc
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(cc -> 'topics') = 'array' THEN cc -> 'topics' ELSE '[]'::JSONB END
+    ) ct
+    WHERE s.student_id = :student_id
+      AND (cc ->> 'id') ~ '^[0-9]+$'
+      AND (ct ->> 'id') ~ '^[0-9]+$'
+      AND jsonb_typeof(tm.content -> (cc ->> 'id')) = 'array'
+      AND EXISTS (
+          SELECT 1 FROM jsonb_array_elements_text(tm.content -> (cc ->> 'id')) t
+          WHERE t = ct ->> 'id'
+      )
+    ON CONFLICT DO NOTHING
+    RETURNING concept_id, topic_id
+""")
+
+# Per concept of the batch: completed topics / (topics * students), in percent.
+_CLASS_AVERAGES = text("""
+    WITH concepts AS (
+        SELECT (cc ->> 'id')::INTEGER AS concept_id,
+               CASE WHEN jsonb_typeof(cc -> 'topics') = 'array' THEN jsonb_array_length(cc -> 'topics') ELSE 0 END AS topic_count
+        FROM conceptual_map cm
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(cm.content -> 'concepts') = 'array' THEN cm.content -> 'concepts' ELSE '[]'::JSONB END
+        ) cc
+        WHERE cm.batch_id = :batch_id AND (cc ->> 'id') ~ '^[0-9]+$'
+    ), students AS (
+        SELECT count(*) AS n FROM student WHERE batch_id = :batch_id
+    ), done AS (
+        SELECT m.concept_id, count(*) AS completed
+        FROM student_topic_mastery m
+        JOIN student s ON s.student_id = m.student_id
+        WHERE s.batch_id = :batch_id
+        GROUP BY m.concept_id
+    )
+    SELECT c.concept_id,
+           COALESCE(round(100.0 * COALESCE(d.completed, 0) / NULLIF(c.topic_count * students.n, 0), 2), 0) AS average
+    FROM concepts c
+    CROSS JOIN students
+    LEFT JOIN done d ON d.concept_id = c.concept_id
+""")
+
+
+async def record_mastery(session, student_id: int, assignment_id: int, completed_at) -> List[Tuple[int, int]]:
+    """Marks the assignment's topics completed. Returns the newly completed (concept_id, topic_id). Does not commit."""
+    result = await session.execute(
+        _RECORD_MASTERY,
+        {"student_id": student_id, "assignment_id": assignment_id, "completed_at": completed_at},
+    )
+    return [(row.concept_id, row.topic_id) for row in result]
+
+
+async def completed_counts(session, student_id: int) -> Dict[int, int]:
+    """{concept_id: completed topics} for one student."""
+    result = await session.execute(
+        select(StudentTopicMastery.concept_id, func.count())
+        .where(StudentTopicMastery.student_id == student_id)
+        .group_by(StudentTopicMastery.concept_id)
+    )
+    return {concept_id: count for concept_id, count in result.all()}
+
+
+async def weekly_completions(session, student_id: int) -> List[Tuple[object, int]]:
+    """[(week start, topics completed that week)], oldest first."""
+    week = func.date_trunc("week", StudentTopicMastery.completed_at)
+    result = await session.execute(
+        select(week.label("week"), func.count())
+        .where(StudentTopicMastery.student_id == student_id)
+        .group_by(week)
+        .order_by(week)
+    )
+    return [(row[0], row[1]) for row in result.all()]
+
+
+class ClassAverages:
+    """Per-batch cache of the class averages."""
+
+    def __init__(self, ttl: float = CLASS_AVERAGE_TTL_SEC):
+        self.ttl = ttl
+        self._cache: Dict[int, Tuple[float, Dict[int, float]]] = {}
+
+    async def get(self, session, batch_id: int) -> Dict[int, float]:
+        cached = self._cache.get(batch_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        result = await session.execute(_CLASS_AVERAGES, {"batch_id": batch_id})
+        averages = {row.concept_id: float(row.average) for row in result}
+        self._cache[batch_id] = (time.monotonic() + self.ttl, averages)
+        return averages
+
+    def invalidate(self, batch_id: int) -> None:
+        self._cache.pop(batch_id, None)
+
+
+class_averages = ClassAverages()
@@ -0,0 +1,269 @@
+# services/typing_analytics.py
+"""
+Streaming typing-behaviour statistics per editor session.
+
+Events are folded into a fixed-size TypingStats as they are logged: an
+inter-key interval histogram with fixed buckets, burst and idle-gap
+counters and typed/pasted character totals. Nothing is kept per event, so
+memory per session is constant however long the session runs.
+
+Sessions opened over the editor socket are bound to a student and
+assignment; on submit their stats are merged into the summary stored under
+report["typing-analytics"], so dashboards read one small JSON object.
+"""
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+
+logger = logging.getLogger("services.typing_analytics")
+
+# -------------------------
+# Parameters
+# -------------------------
+# Upper bounds (ms) of the interval histogram buckets; the last bucket is open-ended
+INTERVAL_BUCKETS_MS = (50, 100, 150, 200, 300, 500, 800, 1200, 2000, 3500)
+BURST_GAP_SEC = 0.5        # keystrokes closer than this belong to the same burst
+BURST_MIN_KEYS = 5         # shorter runs are not counted as bursts
+IDLE_GAP_SEC = 5.0         # pauses at least this long are idle gaps, not intervals
+SESSION_TTL_SEC = 6 * 3600 # live sessions not touched for this long are dropped
+
+SUMMARY_KEY = "typing-analytics"
+
+
+class TypingStats:
+    __slots__ = (
+        "keystrokes", "pastes", "typed_chars", "pasted_chars",
+        "histogram", "interval_sum", "interval_count",
+        "bursts", "burst_keys", "longest_burst", "_run",
+        "idle_count", "idle_total", "idle_longest",
+        "_last_at", "_expect_paste", "sessions",
+    )
+
+    def __init__(self):
+        self.keystrokes = 0
+        self.pastes = 0
+        self.typed_chars = 0
+        self.pasted_chars = 0
+        self.histogram = [0] * (len(INTERVAL_BUCKETS_MS) + 1)
+        self.interval_sum = 0.0
+        self.interval_count = 0
+        self.bursts = 0
+        self.burst_keys = 0
+        self.longest_burst = 0
+        self._run = 0
+        self.idle_count = 0
+        self.idle_total = 0.0
+        self.idle_longest = 0.0
+        self._last_at: Optional[float] = None
+        # Length of a paste reported by the client whose text has not arrived yet
+        self._expect_paste = 0
+        self.sessions = 1
+
+    # ---- ingestion ----
+    def _close_run(self) -> None:
+        if self._run >= BURST_MIN_KEYS:
+            self.bursts += 1
+            self.burst_keys += self._run
+            self.longest_burst = max(self.longest_burst, self._run)
+        self._run = 0
+
+    def _tick(self, at: float) -> None:
+        if self._last_at is not None:
+            gap = at - self._last_at
+            if gap < 0:
+                # Out-of-order client clock; ignore the interval
+                gap = None
+            elif gap >= IDLE_GAP_SEC:
+                self.idle_count += 1
+                self.idle_total += gap
+                self.idle_longest = max(self.idle_longest, gap)
+            else:
+                self.histogram[bisect_right(INTERVAL_BUCKETS_MS, gap * 1000)] += 1
+                self.interval_sum += gap
+                self.interval_count += 1
+            if gap is None or gap >= BURST_GAP_SEC:
+                self._close_run()
+        self._last_at = at if self._last_at is None else max(at, self._last_at)
+
+    def keystroke(self, at: float, added: int = 0, detected_paste: bool = False) -> None:
+        if self._expect_paste and added == self._expect_paste:
+            # The text of a paste the client already reported
+            self._expect_paste = 0
+            return
+        if detected_paste:
+            self.pastes += 1
+            self.pasted_chars += added
+            self._close_run()
+            return
+        self._tick(at)
+        self.keystrokes += 1
+        self.typed_chars += added
+        self._run += 1
+
+    def paste(self, at: float, length: int = 0) -> None:
+        self._close_run()
+        self._last_at = at if self._last_at is None else max(at, self._last_at)
+        self.pastes += 1
+        self.pasted_chars += length
+        self._expect_paste = length
+
+    # ---- summaries ----
+    def _percentile_ms(self, fraction: float) -> Optional[int]:
+        if not self.interval_count:
+            return None
+        target = fraction * self.interval_count
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return INTERVAL_BUCKETS_MS[i] if i < len(INTERVAL_BUCKETS_MS) else int(IDLE_GAP_SEC * 1000)
+        return None
+
+    def summary(self) -> dict:
+        # Count a burst that is still running without closing it
+        bursts, burst_keys, longest = self.bursts, self.burst_keys, self.longest_burst
+        if self._run >= BURST_MIN_KEYS:
+            bursts, burst_keys, longest = bursts + 1, burst_keys + self._run, max(longest, self._run)
+        total_chars = self.typed_chars + self.pasted_chars
+        return {
+            "version": 1,
+            "sessions": self.sessions,
+            "keystrokes": self.keystrokes,
+            "pastes": self.pastes,
+            "typedChars": self.typed_chars,
+            "pastedChars": self.pasted_chars,
+            "pasteRatio": round(self.pasted_chars / total_chars, 3) if total_chars else 0.0,
+            "intervals": {
+                "bucketsMs": list(INTERVAL_BUCKETS_MS),
+                "histogram": list(self.histogram),
+                "count": self.interval_count,
+                "totalSec": round(self.interval_sum, 3),
+                "meanMs": round(self.interval_sum * 1000 / self.interval_count, 1) if self.interval_count else None,
+                "p50Ms": self._percentile_ms(0.5),
+                "p90Ms": self._percentile_ms(0.9),
+            },
+            "bursts": {"count": bursts, "keys": burst_keys, "longest": longest},
+            "idle": {
+                "count": self.idle_count,
+                "totalSec": round(self.idle_total, 3),
+                "longestSec": round(self.idle_longest, 3),
+            },
+            "activeSec": round(self.interval_sum, 3),
+        }
+
+    @classmethod
+    def from_summary(cls, data: dict) -> "TypingStats":
+        """Rebuilds mergeable counters from a stored summary."""
+        stats = cls()
+        stats.sessions = int(data.get("sessions", 1))
+        stats.keystrokes = int(data.get("keystrokes", 0))
+        stats.pastes = int(data.get("pastes", 0))
+        stats.typed_chars = int(data.get("typedChars", 0))
+        stats.pasted_chars = int(data.get("pastedChars", 0))
+        intervals = data.get("intervals") or {}
+        if list(intervals.get("bucketsMs") or ()) == list(INTERVAL_BUCKETS_MS):
+            stats.histogram = [int(c) for c in intervals.get("histogram", stats.histogram)]
+        stats.interval_count = int(intervals.get("count", 0))
+        stats.interval_sum = float(intervals.get("totalSec", 0.0))
+        bursts = data.get("bursts") or {}
+        stats.bursts = int(bursts.get("count", 0))
+        stats.burst_keys = int(bursts.get("keys", 0))
+        stats.longest_burst = int(bursts.get("longest", 0))
+        idle = data.get("idle") or {}
+        stats.idle_count = int(idle.get("count", 0))
+        stats.idle_total = float(idle.get("totalSec", 0.0))
+        stats.idle_longest = float(idle.get("longestSec", 0.0))
+        return stats
+
+    def merge(self, other: "TypingStats") -> None:
+        # Includes a burst that is still running in `other`
+        other_bursts = other.summary()["bursts"]
+        self.sessions += other.sessions
+        self.keystrokes += other.keystrokes
+        self.pastes += other.pastes
+        self.typed_chars += other.typed_chars
+        self.pasted_chars += other.pasted_chars
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        self.interval_sum += other.interval_sum
+        self.interval_count += other.interval_count
+        self.bursts += other_bursts["count"]
+        self.burst_keys += other_bursts["keys"]
+        self.longest_burst = max(self.longest_burst, other_bursts["longest"])
+        self.idle_count += other.idle_count
+        self.idle_total += other.idle_total
+        self.idle_longest = max(self.idle_longest, other.idle_longest)
+
+
+# -------------------------
+# Live sessions
+# -------------------------
+class TypingAnalytics:
+    def __init__(self):
+        self._sessions: Dict[str, TypingStats] = {}
+        self._touched: Dict[str, float] = {}
+        # session_id -> (student_id, assignment_id) for socket sessions
+        self._owners: Dict[str, Tuple[int, Optional[int]]] = {}
+
+    def stats(self, session_id: str) -> TypingStats:
+        stats = self._sessions.get(session_id)
+        if stats is None:
+            stats = self._sessions[session_id] = TypingStats()
+        self._touched[session_id] = time.monotonic()
+        return stats
+
+    def observe(self, session_id: str, event_type: str, at: datetime, details: dict, detected_paste: bool = False) -> None:
+        """Folds one logged editor event into the session's stats."""
+        stats = self.stats(session_id)
+        ts = at.timestamp()
+        if event_type == "paste":
+            stats.paste(ts, int(details.get("textLength") or 0))
+        elif event_type in ("keystroke", "typing"):
+            added = details.get("addedLength") or details.get("charCount") or 0
+            stats.keystroke(ts, int(added), detected_paste)
+
+    def bind(self, session_id: str, student_id: int, assignment_id: Optional[int]) -> None:
+        self._owners[session_id] = (student_id, assignment_id)
+        self.prune()
+
+    def prune(self, ttl: float = SESSION_TTL_SEC) -> None:
+        cutoff = time.monotonic() - ttl
+        for session_id in [s for s, t in self._touched.items() if t < cutoff]:
+            self.discard(session_id)
+
+    def discard(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._touched.pop(session_id, None)
+        self._owners.pop(session_id, None)
+
+    def _sessions_for(self, student_id: int, assignment_id: Optional[int]) -> List[str]:
+        return [s for s, owner in self._owners.items() if owner == (student_id, assignment_id)]
+
+    def collect(self, student_id: int, assignment_id: Optional[int], previous: Optional[dict] = None) -> Optional[dict]:
+        """
+        Merges the student's live sessions for an assignment into the
+        `previous` stored summary and resets them, so a later submit only
+        adds what happened since. Returns None when there is nothing to report.
+        """
+        session_ids = self._sessions_for(student_id, assignment_id)
+        if not session_ids:
+            return previous
+        merged: Optional[TypingStats] = TypingStats.from_summary(previous) if previous else None
+        for session_id in session_ids:
+            stats = self._sessions.get(session_id)
+            if stats is None:
+                continue
+            if merged is None:
+                merged = stats
+            else:
+                merged.merge(stats)
+            fresh = TypingStats()
+            fresh.sessions = 0
+            fresh._last_at = stats._last_at
+            self._sessions[session_id] = fresh
+        return merged.summary() if merged is not None else previous
+
+
+# Process-wide aggregator fed by routers.editor.process_event_batch
+typing_analytics = TypingAnalytics()
@@ -0,0 +1,85 @@
+# services/university_stats.py
+"""
+Precomputed per-university dashboard figures.
+
+university_stats holds one row per university. Instructor, student and
+assignment counts are kept current by statement-level triggers in the same
+transaction as the write; storage totals, and any drift in the counts, are
+recomputed by reconcile_university_stats() every RECONCILE_INTERVAL_SEC.
+Reading the dashboard is a primary-key lookup whatever the university's size.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import select, text
+
+from models.subscription import Subscription
+from models.university_stats import UniversityStats
+
+logger = logging.getLogger("services.university_stats")
+
+RECONCILE_INTERVAL_SEC = 900.0
+
+_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
+def format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in _UNITS:
+        if value < 1024 or unit == _UNITS[-1]:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+async def get_stats(session, uni_id: int) -> dict:
+    """Counters for one university; zeros until the first reconcile."""
+    stats = await session.get(UniversityStats, uni_id)
+    if stats is None:
+        return {
+            "instructors": 0, "students": 0, "assignments": 0,
+            "code_bytes": 0, "log_bytes": 0, "report_bytes": 0,
+            "storage_bytes": 0, "reconciled_at": None,
+        }
+    return {
+        "instructors": stats.instructors,
+        "students": stats.students,
+        "assignments": stats.assignments,
+        "code_bytes": stats.code_bytes,
+        "log_bytes": stats.log_bytes,
+        "report_bytes": stats.report_bytes,
+        "storage_bytes": stats.code_bytes + stats.log_bytes + stats.report_bytes,
+        "reconciled_at": stats.reconciled_at,
+    }
+
+
+async def active_plan_key(session, uni_id: int) -> Optional[str]:
+    """Plan of the university's newest active subscription."""
+    return await session.scalar(
+        select(Subscription.plan_key)
+        .where(Subscription.uni_id == uni_id, Subscription.status == "active")
+        .order_by(Subscription.created_at.desc())
+        .limit(1)
+    )
+
+
+async def reconcile(session) -> int:
+    """Recomputes every university's row. Returns the number of rows written."""
+    updated = await session.scalar(text("SELECT reconcile_university_stats()"))
+    await session.commit()
+    return updated or 0
+
+
+async def reconcile_periodically(session_factory, interval: float = RECONCILE_INTERVAL_SEC):
+    """
+    Background loop started on app startup. Reconciles right away, so new
+    universities do not show zeros until the first interval has passed.
+    """
+    while True:
+        try:
+            async with session_factory() as session:
+                count = await reconcile(session)
+            logger.info("Reconciled stats for %d universities", count)
+        except Exception:
+            logger.exception("Failed to reconcile university stats")
+        await asyncio.sleep(interval)
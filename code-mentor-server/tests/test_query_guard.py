@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from services import query_guard
+from services.query_guard import LOG, RAISE, QueryBudgetExceeded, assert_max_queries, fingerprint
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    query_guard.install(engine)
+    yield engine
+    engine.dispose()
+
+
+def run(engine, statements):
+    with engine.connect() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+
+def test_fingerprint_collapses_literals_and_lists():
+    assert fingerprint("SELECT * FROM t WHERE id = 1") == fingerprint("SELECT *  FROM t\nWHERE id = 42")
+    assert fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3)") == "SELECT * FROM t WHERE id IN (?)"
+    assert fingerprint("SELECT 'a'") == fingerprint("SELECT 'it''s'")
+
+
+def test_within_budget(engine):
+    with assert_max_queries(3) as scope:
+        run(engine, ["SELECT 1", "SELECT 2"])
+    assert scope.count == 2
+
+
+def test_over_budget_fails_on_exit(engine):
+    with pytest.raises(QueryBudgetExceeded, match="3 queries"):
+        with assert_max_queries(2) as scope:
+            run(engine, ["SELECT 1", "SELECT 2", "SELECT 3"])
+    # LOG mode lets the block finish
+    assert scope.count == 3
+
+
+def test_repeated_statement_is_reported(engine):
+    with pytest.raises(QueryBudgetExceeded, match="likely N\\+1"):
+        with assert_max_queries(100, repeat_threshold=3):
+            run(engine, [f"SELECT {n}" for n in range(5)])
+
+
+def test_raise_mode_stops_at_the_crossing_statement(engine):
+    with pytest.raises(QueryBudgetExceeded):
+        with assert_max_queries(2, mode=RAISE) as scope:
+            run(engine, ["SELECT 1", "SELECT 2", "SELECT 3", "SELECT 4"])
+    assert scope.count == 3
+
+
+def test_statements_outside_a_scope_are_not_counted(engine):
+    run(engine, ["SELECT 1"])
+    with assert_max_queries(1, mode=LOG) as scope:
+        run(engine, ["SELECT 1"])
+    assert scope.count == 1
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        with assert_max_queries(1, mode="loud"):
+            pass
+
+
+def test_query_guard_mode_is_validated(monkeypatch):
+    monkeypatch.setenv("QUERY_GUARD_MODE", " Raise ")
+    assert query_guard._mode_from_env() == RAISE
+    monkeypatch.setenv("QUERY_GUARD_MODE", "rasie")
+    with pytest.raises(ValueError, match="QUERY_GUARD_MODE"):
+        query_guard._mode_from_env()